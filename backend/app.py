@@ -1,11 +1,45 @@
+import os
+
 from flask import Flask
 from flask_cors import CORS
+from controllers import snapshot_controller
+from routes.admin_router import admin_bp
 from routes.estatisticas_router import estatisticas_bp
+from routes.export_router import export_bp
+from routes.metricas_router import metricas_bp
 from routes.operadoras_router import operadoras_bp
+from routes.ranking_router import ranking_bp
+from routes.saude_router import saude_bp
+from cache.estatisticas_cache import iniciar_atualizacao_periodica
+from services import snapshot_service
+from services.estatisticas_service import calcular_estatisticas
+from utils.compressao import registrar_compressao
+from utils.metricas import registrar_metricas
 
 app = Flask(__name__)
 CORS(app)
 app.register_blueprint(operadoras_bp)
 app.register_blueprint(estatisticas_bp)
+app.register_blueprint(saude_bp)
+app.register_blueprint(export_bp)
+app.register_blueprint(metricas_bp)
+app.register_blueprint(admin_bp)
+app.register_blueprint(ranking_bp)
+# Registrado antes da compressão: o after_request da métrica roda por último
+registrar_metricas(app)
+registrar_compressao(app)
+
+# Modo sem banco: carrega os dados em memória já na subida e recarrega com SIGHUP
+if snapshot_service.ativo():
+    snapshot_service.atual()
+    snapshot_controller.registrar_recarga_por_sinal()
+
+# Mantém o snapshot de /api/estatisticas atualizado fora do caminho das requisições.
+# A thread nasce na primeira requisição, e não no import: só o processo que atende sobe
+# a thread (o observador do reloader do Flask e o master de um servidor com fork, não)
+if os.getenv("ESTATISTICAS_REFRESH_BACKGROUND", "1") == "1":
+    @app.before_request
+    def _iniciar_atualizador_estatisticas():
+        iniciar_atualizacao_periodica(calcular_estatisticas)
 
 if __name__ == "__main__": app.run(debug=True)
\ No newline at end of file
@@ -0,0 +1,38 @@
+# Entrada ASGI alternativa ao app.py (Flask continua disponível).
+# Execução: hypercorn app_async:app  (a partir da pasta backend/)
+import asyncio
+import os
+
+from quart import Quart
+from quart_cors import cors
+from routes.estatisticas_router_async import estatisticas_async_bp
+from routes.operadoras_router_async import operadoras_async_bp
+from routes.saude_router_async import saude_async_bp
+from cache.estatisticas_cache import atualizacao_periodica_async
+from db_async import abrir_pool, fechar_pool
+from services.estatisticas_service_async import calcular_estatisticas
+
+app = Quart(__name__)
+app = cors(app)
+app.register_blueprint(operadoras_async_bp)
+app.register_blueprint(estatisticas_async_bp)
+app.register_blueprint(saude_async_bp)
+
+_tarefas = []
+
+
+@app.before_serving
+async def iniciar():
+    await abrir_pool()
+    if os.getenv("ESTATISTICAS_REFRESH_BACKGROUND", "1") == "1":
+        _tarefas.append(asyncio.create_task(atualizacao_periodica_async(calcular_estatisticas)))
+
+
+@app.after_serving
+async def encerrar():
+    for tarefa in _tarefas:
+        tarefa.cancel()
+    await fechar_pool()
+
+
+if __name__ == "__main__": app.run(debug=True)
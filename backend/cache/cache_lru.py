@@ -0,0 +1,135 @@
+import functools
+import os
+import threading
+import time
+from collections import OrderedDict
+
+CACHE_MAX_ITENS = int(os.getenv("CACHE_MAX_ITENS", 1024))
+CACHE_TTL_PADRAO = int(os.getenv("CACHE_TTL_PADRAO", 300))
+
+_AUSENTE = object()
+
+# Todos os caches criados ficam registrados para expor estatísticas
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+class CacheLRU:
+    def __init__(self, nome, max_itens=CACHE_MAX_ITENS, ttl=CACHE_TTL_PADRAO):
+        self.nome = nome
+        self.max_itens = max_itens
+        self.ttl = ttl
+        self._itens = OrderedDict()  # chave -> (valor, expira_em)
+        self._lock = threading.Lock()
+        self._em_calculo = {}  # chave -> threading.Event (single-flight)
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "expirados": 0, "esperas_single_flight": 0}
+
+    def _buscar(self, chave):
+        # Deve ser chamado com o lock adquirido
+        item = self._itens.get(chave)
+        if item is None:
+            return _AUSENTE
+
+        valor, expira_em = item
+        if expira_em <= time.monotonic():
+            del self._itens[chave]
+            self._stats["expirados"] += 1
+            return _AUSENTE
+
+        self._itens.move_to_end(chave)
+        return valor
+
+    def obter(self, chave, padrao=None):
+        with self._lock:
+            valor = self._buscar(chave)
+            if valor is _AUSENTE:
+                self._stats["misses"] += 1
+                return padrao
+            self._stats["hits"] += 1
+            return valor
+
+    def espiar(self, chave, padrao=None):
+        # Leitura sem contar hit/miss (leituras internas, ex: idade do snapshot de estatísticas)
+        with self._lock:
+            valor = self._buscar(chave)
+        return padrao if valor is _AUSENTE else valor
+
+    def definir(self, chave, valor, ttl=None):
+        expira_em = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._itens[chave] = (valor, expira_em)
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.max_itens:
+                self._itens.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def remover(self, chave):
+        with self._lock:
+            self._itens.pop(chave, None)
+
+    def limpar(self):
+        with self._lock:
+            self._itens.clear()
+
+    def obter_ou_calcular(self, chave, calcular, ttl=None, cachear_se=None):
+        # Single-flight: só a primeira thread que perde o cache executa calcular();
+        # as demais aguardam o resultado dela em vez de repetir a mesma consulta.
+        while True:
+            with self._lock:
+                valor = self._buscar(chave)
+                if valor is not _AUSENTE:
+                    self._stats["hits"] += 1
+                    return valor
+
+                evento = self._em_calculo.get(chave)
+                if evento is None:
+                    self._stats["misses"] += 1
+                    evento = self._em_calculo[chave] = threading.Event()
+                    break
+                self._stats["esperas_single_flight"] += 1
+
+            evento.wait()
+            # Se quem calculou falhou ou não cacheou o resultado, uma das threads tenta de novo
+            with self._lock:
+                valor = self._buscar(chave)
+                if valor is not _AUSENTE:
+                    self._stats["hits"] += 1
+                    return valor
+
+        try:
+            valor = calcular()
+            if cachear_se is None or cachear_se(valor):
+                self.definir(chave, valor, ttl)
+            return valor
+        finally:
+            with self._lock:
+                del self._em_calculo[chave]
+            evento.set()
+
+    def estatisticas(self):
+        with self._lock:
+            return {"nome": self.nome, "itens": len(self._itens), "max_itens": self.max_itens, **self._stats}
+
+
+def criar_cache(nome, max_itens=CACHE_MAX_ITENS, ttl=CACHE_TTL_PADRAO):
+    with _caches_lock:
+        if nome not in _caches:
+            _caches[nome] = CacheLRU(nome, max_itens, ttl)
+        return _caches[nome]
+
+
+def estatisticas_caches():
+    with _caches_lock:
+        caches = list(_caches.values())
+    return [c.estatisticas() for c in caches]
+
+
+def cacheado(cache, ttl=None, chave=None, cachear_se=None):
+    # Decorador para funções de controller; por padrão a chave é (nome da função, argumentos)
+    def decorador(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            k = chave(*args, **kwargs) if chave else (func.__name__, args, tuple(sorted(kwargs.items())))
+            return cache.obter_ou_calcular(k, lambda: func(*args, **kwargs), ttl, cachear_se)
+        return wrapper
+    return decorador
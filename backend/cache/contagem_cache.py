@@ -0,0 +1,18 @@
+import os
+
+from cache.cache_lru import criar_cache
+
+# Estratégia padrão para o total das listagens paginadas:
+#   exact    -> COUNT(*) a cada requisição
+#   cached   -> COUNT(*) exato, reaproveitado por COUNT_CACHE_TTL segundos por (tabela, busca)
+#   estimate -> estimativa do planner para listagens sem filtro (cached nas demais)
+ESTRATEGIAS = ("exact", "cached", "estimate")
+COUNT_STRATEGY = os.getenv("COUNT_STRATEGY", "cached")
+COUNT_CACHE_TTL = int(os.getenv("COUNT_CACHE_TTL", 300))
+
+contagem_cache = criar_cache("contagens", ttl=COUNT_CACHE_TTL)
+
+
+def obter_contagem(tabela, termo, contar):
+    # COUNT(*) só roda em cache miss, e uma única vez mesmo com requisições simultâneas
+    return contagem_cache.obter_ou_calcular((tabela, termo), contar)
@@ -1,21 +1,140 @@
+import asyncio
+import logging
+import os
+import threading
 import time
 
-CACHE_TTL = 300  # Cachear resultado por 5 minutos (300 segundos)
+from cache.cache_lru import criar_cache
+from utils.metricas import Contador
 
-estatisticas_cache = {
-    "data": None,
-    "timestamp": 0
-}
+# Intervalo (s) para recalcular o snapshot das estatísticas em segundo plano
+CACHE_TTL = int(os.getenv("ESTATISTICAS_REFRESH_INTERVAL", 300))
 
-def cache_valido():
-    return (
-        estatisticas_cache["data"] is not None
-        and time.time() - estatisticas_cache["timestamp"] < CACHE_TTL
-    )
+# Uma entrada (dados, timestamp) sem expiração: o snapshot vencido continua sendo servido
+# enquanto é recalculado, então quem decide o recálculo é a idade, não o TTL do cache
+estatisticas_cache = criar_cache("estatisticas", max_itens=1, ttl=float("inf"))
+_CHAVE = "snapshot"
+
+# Garante um único recálculo por vez (requisições e thread periódica)
+_lock_calculo = threading.Lock()
+_lock_atualizador = threading.Lock()
+_atualizador_iniciado = False
+
+# Equivalentes para o app assíncrono (app_async.py)
+_lock_calculo_async = asyncio.Lock()
+_tarefa_async = None
+
+# hit: snapshot servido; miss: calculado na requisição; stale: servido vencido com recálculo disparado
+snapshot_requisicoes = Contador(
+    "estatisticas_snapshot_requisicoes_total", "Uso do snapshot de /api/estatisticas", ("resultado",)
+)
+
+
+def timestamp_snapshot():
+    entrada = estatisticas_cache.espiar(_CHAVE)
+    return entrada[1] if entrada else 0
+
+def idade_snapshot():
+    return time.time() - timestamp_snapshot()
 
 def get_cache():
-    return estatisticas_cache["data"]
+    entrada = estatisticas_cache.espiar(_CHAVE)
+    return entrada[0] if entrada else None
 
 def set_cache(data):
-    estatisticas_cache["data"] = data
-    estatisticas_cache["timestamp"] = time.time()
\ No newline at end of file
+    estatisticas_cache.definir(_CHAVE, (data, time.time()))
+
+
+def _recalcular(calcular):
+    # Deve ser chamado com _lock_calculo adquirido; libera ao final
+    try:
+        set_cache(calcular())
+    except Exception:
+        logging.exception("Falha ao recalcular o snapshot de estatísticas; mantendo o anterior")
+    finally:
+        _lock_calculo.release()
+
+
+def disparar_atualizacao(calcular):
+    # Se já existe um recálculo em andamento, não faz nada
+    if not _lock_calculo.acquire(blocking=False):
+        return
+    threading.Thread(target=_recalcular, args=(calcular,), daemon=True).start()
+
+
+def obter_estatisticas(calcular):
+    """Stale-while-revalidate: devolve (dados, calculado_agora).
+
+    Só calcula de forma síncrona quando ainda não existe snapshot; fora isso o snapshot
+    atual é servido e, se estiver vencido, o recálculo é disparado em segundo plano.
+    """
+    # Uma leitura contada por requisição (hits/misses em /api/saude/cache)
+    if estatisticas_cache.obter(_CHAVE) is None:
+        with _lock_calculo:
+            if get_cache() is None:
+                set_cache(calcular())
+                snapshot_requisicoes.incrementar(resultado="miss")
+                return get_cache(), True
+
+    if idade_snapshot() >= CACHE_TTL:
+        snapshot_requisicoes.incrementar(resultado="stale")
+        disparar_atualizacao(calcular)
+    else:
+        snapshot_requisicoes.incrementar(resultado="hit")
+
+    return get_cache(), False
+
+
+def iniciar_atualizacao_periodica(calcular):
+    # Idempotente: o app.py chama a cada requisição e só a primeira chamada sobe a thread
+    global _atualizador_iniciado
+    if _atualizador_iniciado:
+        return
+    with _lock_atualizador:
+        if _atualizador_iniciado:
+            return
+        _atualizador_iniciado = True
+
+    def loop():
+        while True:
+            _lock_calculo.acquire()
+            _recalcular(calcular)
+            time.sleep(CACHE_TTL)
+
+    threading.Thread(target=loop, name="atualizador-estatisticas", daemon=True).start()
+
+
+
+async def _recalcular_async(calcular):
+    async with _lock_calculo_async:
+        try:
+            set_cache(await calcular())
+        except Exception:
+            logging.exception("Falha ao recalcular o snapshot de estatísticas; mantendo o anterior")
+
+
+async def obter_estatisticas_async(calcular):
+    # Mesma política de obter_estatisticas, com o recálculo em uma task do event loop
+    global _tarefa_async
+
+    if estatisticas_cache.obter(_CHAVE) is None:
+        async with _lock_calculo_async:
+            if get_cache() is None:
+                set_cache(await calcular())
+                snapshot_requisicoes.incrementar(resultado="miss")
+                return get_cache(), True
+
+    if idade_snapshot() < CACHE_TTL:
+        snapshot_requisicoes.incrementar(resultado="hit")
+    else:
+        snapshot_requisicoes.incrementar(resultado="stale")
+        if _tarefa_async is None or _tarefa_async.done():
+            _tarefa_async = asyncio.create_task(_recalcular_async(calcular))
+
+    return get_cache(), False
+
+
+async def atualizacao_periodica_async(calcular):
+    while True:
+        await _recalcular_async(calcular)
+        await asyncio.sleep(CACHE_TTL)
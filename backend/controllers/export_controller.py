@@ -0,0 +1,102 @@
+import csv
+import datetime
+import decimal
+import io
+import json
+import re
+
+from services import export_service, snapshot_service
+from utils import validar_cnpj
+
+FORMATOS = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+
+def validar_filtros(args):
+    # Retorna (filtros, erro); todos os filtros são opcionais
+    filtros = {}
+
+    try:
+        if args.get("ano"):
+            filtros["ano"] = int(args["ano"])
+        if args.get("trimestre"):
+            filtros["trimestre"] = int(args["trimestre"])
+    except ValueError:
+        return None, "ano e trimestre devem ser numéricos"
+
+    if "trimestre" in filtros and filtros["trimestre"] not in (1, 2, 3, 4):
+        return None, "trimestre deve estar entre 1 e 4"
+
+    if args.get("uf"):
+        uf = args["uf"].strip().upper()
+        if not re.fullmatch(r"[A-Z]{2}", uf):
+            return None, "UF inválida"
+        filtros["uf"] = uf
+
+    if args.get("cnpj"):
+        cnpj_limpo = validar_cnpj.limpar_cnpj(args["cnpj"])
+        if not validar_cnpj.cnpj_valido(cnpj_limpo):
+            return None, "CNPJ inválido"
+        filtros["cnpj"] = cnpj_limpo
+
+    return filtros, None
+
+
+def _valor_json(valor):
+    if isinstance(valor, decimal.Decimal):
+        return float(valor)
+    if isinstance(valor, (datetime.date, datetime.datetime)):
+        return valor.isoformat()
+    raise TypeError(f"Tipo não serializável: {type(valor)}")
+
+
+def _gerar_csv(colunas, lotes):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, delimiter=";")
+
+    writer.writerow(colunas)
+    yield buffer.getvalue()
+
+    for rows in lotes:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(rows)
+        yield buffer.getvalue()
+
+
+def _gerar_ndjson(colunas, lotes):
+    for rows in lotes:
+        yield "".join(
+            json.dumps(dict(zip(colunas, r)), default=_valor_json, ensure_ascii=False) + "\n"
+            for r in rows
+        )
+
+
+def exportar(tipo, formato, args):
+    """Monta o gerador do export (um pedaço de texto por lote do cursor).
+
+    Retorna (gerador, mimetype, erro).
+    """
+    if formato not in FORMATOS:
+        return None, None, "formato deve ser csv ou ndjson"
+
+    filtros, erro = validar_filtros(args)
+    if erro:
+        return None, None, erro
+
+    despesas = tipo == "despesas"
+    colunas = export_service.COLUNAS_EXPORT_DESPESAS if despesas else export_service.COLUNAS_EXPORT_OPERADORAS
+
+    if snapshot_service.ativo():
+        snapshot = snapshot_service.atual()
+        gerar_lotes = snapshot.exportar_despesas if despesas else snapshot.exportar_operadoras
+        lotes = gerar_lotes(filtros, export_service.EXPORT_BATCH_SIZE)
+    else:
+        sql = export_service.sql_exportar_despesas if despesas else export_service.sql_exportar_operadoras
+        lotes = export_service.iterar_lotes(*sql(filtros))
+
+    gerador = _gerar_csv(colunas, lotes) if formato == "csv" else _gerar_ndjson(colunas, lotes)
+
+    return gerador, FORMATOS[formato], None
@@ -1,25 +1,95 @@
+import os
+
+from cache import contagem_cache
+from cache.cache_lru import cacheado, criar_cache
 from db import get_db_connection
-from services import operadoras_service
+from services import operadoras_service, snapshot_service
 from utils import validar_cnpj
+from utils.cursor_paginacao import CURSOR_DESPESAS, CURSOR_OPERADORAS, codificar_cursor, decodificar_cursor
+
+CACHE_OPERADORAS_TTL = int(os.getenv("CACHE_OPERADORAS_TTL", 300))
+BATCH_MAX_CNPJS = int(os.getenv("BATCH_MAX_CNPJS", 100))
+SERIE_MEDIA_MOVEL_MAX = 12
+
+operadoras_cache = criar_cache("operadoras", ttl=CACHE_OPERADORAS_TTL)
+
+
+def _sem_erro(resultado):
+    # Só guarda respostas de sucesso; erros de validação são baratos de recalcular
+    return resultado[1] is None
+
+
+# Nomes dos campos na ordem das colunas do SELECT: cada linha vira dict com um zip,
+# sem montar campo a campo (NUMERIC já chega como float, ver db.py)
+CAMPOS_INDICADORES_RESPOSTA = ("total_acumulado", "media_trimestral", "anos_ativos", "qtd_registros")
+CAMPOS_DESPESA = ("ano", "trimestre", "valor_despesas")
+
+
+def operadora_para_dict(row):
+    return dict(zip(operadoras_service.CAMPOS_OPERADORA, row))
+
+
+def indicadores_para_dict(indicadores):
+    return dict(zip(CAMPOS_INDICADORES_RESPOSTA, indicadores))
+
+
+def _consultar(nome, *args):
+    # Modo snapshot: a mesma consulta é respondida em memória, sem conexão com o banco
+    if snapshot_service.ativo():
+        return getattr(snapshot_service.atual(), nome)(*args)
 
+    with get_db_connection() as conn, conn.cursor() as cur:
+        return getattr(operadoras_service, nome)(cur, *args)
 
-def lista_operadoras(page, limit, search=None):
+
+def _total_paginacao(cur, tabela, termo, contar, estimar=None, estrategia=None):
+    # Retorna (total, total_is_estimate) conforme a estratégia de contagem
+    if estrategia not in contagem_cache.ESTRATEGIAS:
+        estrategia = contagem_cache.COUNT_STRATEGY
+
+    if estrategia == "exact":
+        return contar(), False
+
+    if estrategia == "estimate" and estimar is not None:
+        total = estimar()
+        if total is not None:
+            return total, True
+
+    return contagem_cache.obter_contagem(tabela, termo, contar), False
+
+
+def lista_operadoras(page, limit, search=None, count=None):
     offset = (page - 1) * limit
+    termo = search.strip() if search and search.strip() else None
 
-    conn = get_db_connection()
-    cur = conn.cursor()
+    if snapshot_service.ativo():
+        # Em memória a contagem é exata e barata; a estratégia de contagem não se aplica
+        snapshot = snapshot_service.atual()
+        rows = snapshot.listar_operadoras(limit, offset, search)
+        return montar_lista(rows, page, limit, snapshot.contar_operadoras(search), False)
 
-    # Passamos o search tanto para contar (paginação correta) quanto para listar
-    total = operadoras_service.contar_operadoras(cur, search)
-    rows = operadoras_service.listar_operadoras(cur, limit, offset, search)
+    # A conexão vem do pool e é devolvida ao sair do bloco
+    with get_db_connection() as conn, conn.cursor() as cur:
+        # Passamos o search tanto para contar (paginação correta) quanto para listar
+        total, total_estimado = _total_paginacao(
+            cur,
+            "dados_cadastrais",
+            termo,
+            lambda: operadoras_service.contar_operadoras(cur, search),
+            # A estimativa do planner só vale para a tabela inteira (sem filtro)
+            None if termo else lambda: operadoras_service.estimar_operadoras(cur),
+            count
+        )
+        rows = operadoras_service.listar_operadoras(cur, limit, offset, search)
 
-    cur.close()
-    conn.close()
+    return montar_lista(rows, page, limit, total, total_estimado)
 
-    data = [
-        {"cnpj": r[0], "razao_social": r[1], "uf": r[2]}
-        for r in rows
-    ]
+
+# As funções montar_* montam as respostas a partir das linhas do banco e são
+# compartilhadas com o controller assíncrono (controllers/operadoras_controller_async.py)
+
+def montar_lista(rows, page, limit, total, total_estimado):
+    data = [dict(zip(operadoras_service.CAMPOS_LISTA, r)) for r in rows]
 
     return {
         "data": data,
@@ -27,93 +97,236 @@ def lista_operadoras(page, limit, search=None):
             "page": page,
             "limit": limit,
             "total": total,
-            "total_pages": (total + limit - 1) // limit if limit > 0 else 0
+            "total_pages": (total + limit - 1) // limit if limit > 0 else 0,
+            "total_is_estimate": total_estimado
+        }
+    }
+
+
+def lista_operadoras_cursor(limit, cursor=None, search=None):
+    try:
+        apos = decodificar_cursor(cursor, CURSOR_OPERADORAS)
+    except ValueError as e:
+        return None, str(e)
+
+    limit = max(limit, 1)
+    # Uma linha a mais indica se existe próxima página
+    rows = _consultar("listar_operadoras_keyset", limit + 1, apos, search)
+
+    return montar_lista_cursor(rows, limit), None
+
+
+def montar_lista_cursor(rows, limit):
+    tem_mais = len(rows) > limit
+    rows = rows[:limit]
+
+    return {
+        "data": [dict(zip(operadoras_service.CAMPOS_LISTA, r)) for r in rows],
+        "meta": {
+            "limit": limit,
+            "next_cursor": codificar_cursor([rows[-1][3], rows[-1][0]]) if tem_mais else None,
+            "has_more": tem_mais
         }
     }
 
 
+@cacheado(operadoras_cache, cachear_se=_sem_erro)
 def detalhe_operadora(cnpj):
     cnpj_limpo = validar_cnpj.limpar_cnpj(cnpj)
 
     if not validar_cnpj.cnpj_valido(cnpj_limpo):
         return None, "CNPJ inválido"
 
-    conn = get_db_connection()
-    cur = conn.cursor()
-
-    row = operadoras_service.buscar_operadora_por_cnpj(cur, cnpj_limpo)
-
-    cur.close()
-    conn.close()
+    row = _consultar("buscar_operadora_por_cnpj", cnpj_limpo)
 
     if not row:
         return None, "Operadora não encontrada"
 
-    operadora = {
-        "cnpj": row[0],
-        "registro_operadora": row[1],
-        "razao_social": row[2],
-        "nome_fantasia": row[3],
-        "modalidade": row[4],
-        "logradouro": row[5],
-        "numero": row[6],
-        "complemento": row[7],
-        "bairro": row[8],
-        "cidade": row[9],
-        "uf": row[10],
-        "cep": row[11],
-        "ddd": row[12],
-        "telefone": row[13],
-        "fax": row[14],
-        "endereco_eletronico": row[15],
-        "representante": row[16],
-        "cargo_representante": row[17],
-        "regiao_de_comercializacao": row[18],
-        "data_registro_ans": row[19]
-    }
-
-    return operadora, None
+    return operadora_para_dict(row), None
 
 
+@cacheado(operadoras_cache, cachear_se=_sem_erro)
 def despesas_operadora(cnpj, page, limit):
     cnpj_limpo = validar_cnpj.limpar_cnpj(cnpj)
     if not validar_cnpj.cnpj_valido(cnpj_limpo):
         return None, "CNPJ inválido"
 
     offset = (page - 1) * limit
-    conn = get_db_connection()
-    cur = conn.cursor()
+
+    # Página, total e indicadores em um único round trip; o total vem exato do rollup
+    indicadores, rows = _consultar("listar_despesas_com_indicadores", cnpj_limpo, limit, offset)
+
+    return montar_despesas(cnpj_limpo, indicadores, rows, page, limit), None
+
+
+def montar_despesas(cnpj_limpo, indicadores, rows, page, limit):
+    total_registros = indicadores["qtd_registros"]
+
+    despesas = [dict(zip(CAMPOS_DESPESA, r)) for r in rows]
+
+    # MONTAGEM DO OBJETO DE RESPOSTA
+    return {
+        "cnpj": cnpj_limpo,
+        "data": despesas,
+        "estatisticas": {  # <--- SE ISSO ESTIVER AQUI, APARECE NO CONSOLE
+            "total_acumulado": indicadores["total_valor"],
+            "media_trimestral": indicadores["media_valor"],
+            "qtd_registros": total_registros
+        },
+        "meta": {
+            "page": page,
+            "limit": limit,
+            "total": total_registros,
+            "total_pages": (total_registros + limit - 1) // limit if limit > 0 else 0,
+            "total_is_estimate": False
+        }
+    }
+
+
+def despesas_operadora_cursor(cnpj, limit, cursor=None):
+    cnpj_limpo = validar_cnpj.limpar_cnpj(cnpj)
+    if not validar_cnpj.cnpj_valido(cnpj_limpo):
+        return None, "CNPJ inválido"
 
     try:
-        # Busca a lista e o total para a paginação
-        total_registros = operadoras_service.contar_despesas(cur, cnpj_limpo)
-        rows = operadoras_service.listar_despesas(cur, cnpj_limpo, limit, offset)
-        
-        # Busca os indicadores (o que estava faltando no seu log!)
-        indicadores = operadoras_service.obter_indicadores_financeiros(cur, cnpj_limpo)
-
-        despesas = [
-            {"ano": r[0], "trimestre": r[1], "valor_despesas": float(r[2]) if r[2] else 0}
-            for r in rows
-        ]
-
-        # MONTAGEM DO OBJETO DE RESPOSTA
-        return {
-            "cnpj": cnpj_limpo,
-            "data": despesas,
-            "estatisticas": {  # <--- SE ISSO ESTIVER AQUI, APARECE NO CONSOLE
-                "total_acumulado": indicadores["total_valor"],
-                "media_trimestral": indicadores["media_valor"],
-                "qtd_registros": total_registros
-            },
-            "meta": {
-                "page": page,
-                "limit": limit,
-                "total": total_registros,
-                "total_pages": (total_registros + limit - 1) // limit if limit > 0 else 0
-            }
-        }, None
-
-    finally:
-        cur.close()
-        conn.close()
\ No newline at end of file
+        apos = decodificar_cursor(cursor, CURSOR_DESPESAS)
+    except ValueError as e:
+        return None, str(e)
+
+    limit = max(limit, 1)
+    indicadores, rows = _consultar("listar_despesas_com_indicadores", cnpj_limpo, limit + 1, 0, apos)
+
+    return montar_despesas_cursor(cnpj_limpo, indicadores, rows, limit), None
+
+
+def montar_despesas_cursor(cnpj_limpo, indicadores, rows, limit):
+    tem_mais = len(rows) > limit
+    rows = rows[:limit]
+
+    return {
+        "cnpj": cnpj_limpo,
+        "data": [dict(zip(CAMPOS_DESPESA, r)) for r in rows],
+        "estatisticas": {
+            "total_acumulado": indicadores["total_valor"],
+            "media_trimestral": indicadores["media_valor"],
+            "qtd_registros": indicadores["qtd_registros"]
+        },
+        "meta": {
+            "limit": limit,
+            "next_cursor": codificar_cursor([rows[-1][0], rows[-1][1], rows[-1][3]]) if tem_mais else None,
+            "has_more": tem_mais
+        }
+    }
+
+
+@cacheado(operadoras_cache, cachear_se=_sem_erro)
+def serie_operadora(cnpj, deltas=False, media_movel=0):
+    cnpj_limpo = validar_cnpj.limpar_cnpj(cnpj)
+    if not validar_cnpj.cnpj_valido(cnpj_limpo):
+        return None, "CNPJ inválido"
+
+    if not 0 <= media_movel <= SERIE_MEDIA_MOVEL_MAX:
+        return None, f"media_movel deve estar entre 0 e {SERIE_MEDIA_MOVEL_MAX}"
+
+    rows = _consultar("obter_serie_trimestral", cnpj_limpo, media_movel)
+    return montar_serie(cnpj_limpo, rows, deltas, media_movel), None
+
+
+def _variacao(atual, referencia):
+    # (absoluta, percentual); sem ponto de referência não há variação
+    if referencia is None:
+        return None, None
+    percentual = round((atual - referencia) / referencia * 100, 2) if referencia else None
+    return round(atual - referencia, 2), percentual
+
+
+def montar_serie(cnpj_limpo, rows, deltas, media_movel):
+    pontos = []
+    for row in rows:
+        ponto = dict(zip(operadoras_service.CAMPOS_SERIE, row))
+        anterior = ponto.pop("total_trimestre_anterior")
+        ano_anterior = ponto.pop("total_ano_anterior")
+        media = ponto.pop("media_movel")
+
+        if deltas:
+            ponto["variacao_trimestre"], ponto["variacao_trimestre_pct"] = _variacao(ponto["total"], anterior)
+            ponto["variacao_ano"], ponto["variacao_ano_pct"] = _variacao(ponto["total"], ano_anterior)
+        if media_movel:
+            ponto["media_movel"] = round(media, 2)
+
+        pontos.append(ponto)
+
+    return {
+        "cnpj": cnpj_limpo,
+        "data": pontos,
+        "meta": {
+            "pontos": len(pontos),
+            "deltas": deltas,
+            "media_movel": media_movel or None
+        }
+    }
+
+
+def operadoras_em_lote(cnpjs, incluir_indicadores=False):
+    erro = validar_lote(cnpjs, incluir_indicadores)
+    if erro:
+        return None, erro
+
+    limpos, validos = limpar_lote(cnpjs)
+
+    rows = []
+    if validos:
+        rows = _consultar("buscar_operadoras_por_cnpjs", validos, incluir_indicadores)
+
+    return montar_lote(cnpjs, limpos, validos, rows, incluir_indicadores), None
+
+
+def validar_lote(cnpjs, incluir_indicadores=False):
+    if not isinstance(cnpjs, list) or not cnpjs:
+        return "Informe 'cnpjs' como uma lista não vazia"
+    if len(cnpjs) > BATCH_MAX_CNPJS:
+        return f"Máximo de {BATCH_MAX_CNPJS} CNPJs por requisição"
+    # Só booleano JSON: a string "false" seria verdadeira num bool()
+    if not isinstance(incluir_indicadores, bool):
+        return "Informe 'incluir_indicadores' como true ou false"
+    return None
+
+
+def limpar_lote(cnpjs):
+    # Normaliza cada item; inválidos são reportados sem ir ao banco
+    limpos = [
+        validar_cnpj.limpar_cnpj(c) if isinstance(c, str) else ""
+        for c in cnpjs
+    ]
+    validos = {c for c in limpos if validar_cnpj.cnpj_valido(c)}
+    return limpos, validos
+
+
+def montar_lote(cnpjs, limpos, validos, rows, incluir_indicadores):
+    encontrados = {r[0]: r for r in rows}
+
+    itens = []
+    for original, cnpj_limpo in zip(cnpjs, limpos):
+        item = {"cnpj": original}
+
+        if cnpj_limpo not in validos:
+            item.update({"status": "invalido", "erro": "CNPJ inválido"})
+        elif cnpj_limpo not in encontrados:
+            item.update({"status": "nao_encontrada", "erro": "Operadora não encontrada"})
+        else:
+            row = encontrados[cnpj_limpo]
+            item.update({"status": "ok", "operadora": operadora_para_dict(row)})
+            if incluir_indicadores:
+                item["indicadores"] = indicadores_para_dict(row[20:])
+
+        itens.append(item)
+
+    return {
+        "data": itens,
+        "meta": {
+            "total": len(itens),
+            "encontradas": sum(1 for i in itens if i["status"] == "ok"),
+            "nao_encontradas": sum(1 for i in itens if i["status"] == "nao_encontrada"),
+            "invalidas": sum(1 for i in itens if i["status"] == "invalido")
+        }
+    }
@@ -0,0 +1,161 @@
+import asyncio
+
+from cache import contagem_cache
+from controllers.operadoras_controller import (
+    limpar_lote,
+    montar_despesas,
+    montar_despesas_cursor,
+    montar_lista,
+    montar_lista_cursor,
+    montar_lote,
+    montar_serie,
+    operadora_para_dict,
+    operadoras_cache,
+    SERIE_MEDIA_MOVEL_MAX,
+    validar_lote,
+)
+from services import operadoras_service_async
+from utils import validar_cnpj
+from utils.cursor_paginacao import CURSOR_DESPESAS, CURSOR_OPERADORAS, decodificar_cursor
+
+# Mesmas regras e respostas de operadoras_controller, com consultas não bloqueantes.
+# O cache é consultado sem single-flight: esperar outra requisição bloquearia o event loop.
+
+
+async def _total_paginacao(tabela, termo, contar, estimar=None, estrategia=None):
+    if estrategia not in contagem_cache.ESTRATEGIAS:
+        estrategia = contagem_cache.COUNT_STRATEGY
+
+    if estrategia == "exact":
+        return await contar(), False
+
+    if estrategia == "estimate" and estimar is not None:
+        total = await estimar()
+        if total is not None:
+            return total, True
+
+    total = contagem_cache.contagem_cache.obter((tabela, termo))
+    if total is None:
+        total = await contar()
+        contagem_cache.contagem_cache.definir((tabela, termo), total)
+    return total, False
+
+
+async def lista_operadoras(page, limit, search=None, count=None):
+    offset = (page - 1) * limit
+    termo = search.strip() if search and search.strip() else None
+
+    # Contagem e página são independentes: rodam ao mesmo tempo em conexões distintas
+    (total, total_estimado), rows = await asyncio.gather(
+        _total_paginacao(
+            "dados_cadastrais",
+            termo,
+            lambda: operadoras_service_async.contar_operadoras(search),
+            None if termo else operadoras_service_async.estimar_operadoras,
+            count
+        ),
+        operadoras_service_async.listar_operadoras(limit, offset, search)
+    )
+
+    return montar_lista(rows, page, limit, total, total_estimado)
+
+
+async def lista_operadoras_cursor(limit, cursor=None, search=None):
+    try:
+        apos = decodificar_cursor(cursor, CURSOR_OPERADORAS)
+    except ValueError as e:
+        return None, str(e)
+
+    limit = max(limit, 1)
+    rows = await operadoras_service_async.listar_operadoras_keyset(limit + 1, apos, search)
+    return montar_lista_cursor(rows, limit), None
+
+
+async def detalhe_operadora(cnpj):
+    cnpj_limpo = validar_cnpj.limpar_cnpj(cnpj)
+
+    if not validar_cnpj.cnpj_valido(cnpj_limpo):
+        return None, "CNPJ inválido"
+
+    chave = ("detalhe_operadora_async", cnpj_limpo)
+    resultado = operadoras_cache.obter(chave)
+    if resultado is not None:
+        return resultado
+
+    row = await operadoras_service_async.buscar_operadora_por_cnpj(cnpj_limpo)
+    if not row:
+        return None, "Operadora não encontrada"
+
+    resultado = (operadora_para_dict(row), None)
+    operadoras_cache.definir(chave, resultado)
+    return resultado
+
+
+async def despesas_operadora(cnpj, page, limit):
+    cnpj_limpo = validar_cnpj.limpar_cnpj(cnpj)
+    if not validar_cnpj.cnpj_valido(cnpj_limpo):
+        return None, "CNPJ inválido"
+
+    chave = ("despesas_operadora_async", cnpj_limpo, page, limit)
+    resultado = operadoras_cache.obter(chave)
+    if resultado is not None:
+        return resultado
+
+    # Página, total e indicadores já saem de uma única consulta (um round trip)
+    offset = (page - 1) * limit
+    indicadores, rows = await operadoras_service_async.listar_despesas_com_indicadores(cnpj_limpo, limit, offset)
+
+    resultado = (montar_despesas(cnpj_limpo, indicadores, rows, page, limit), None)
+    operadoras_cache.definir(chave, resultado)
+    return resultado
+
+
+async def despesas_operadora_cursor(cnpj, limit, cursor=None):
+    cnpj_limpo = validar_cnpj.limpar_cnpj(cnpj)
+    if not validar_cnpj.cnpj_valido(cnpj_limpo):
+        return None, "CNPJ inválido"
+
+    try:
+        apos = decodificar_cursor(cursor, CURSOR_DESPESAS)
+    except ValueError as e:
+        return None, str(e)
+
+    limit = max(limit, 1)
+    indicadores, rows = await operadoras_service_async.listar_despesas_com_indicadores(
+        cnpj_limpo, limit + 1, apos=apos
+    )
+    return montar_despesas_cursor(cnpj_limpo, indicadores, rows, limit), None
+
+
+async def operadoras_em_lote(cnpjs, incluir_indicadores=False):
+    erro = validar_lote(cnpjs, incluir_indicadores)
+    if erro:
+        return None, erro
+
+    limpos, validos = limpar_lote(cnpjs)
+
+    rows = []
+    if validos:
+        rows = await operadoras_service_async.buscar_operadoras_por_cnpjs(validos, incluir_indicadores)
+
+    return montar_lote(cnpjs, limpos, validos, rows, incluir_indicadores), None
+
+
+async def serie_operadora(cnpj, deltas=False, media_movel=0):
+    cnpj_limpo = validar_cnpj.limpar_cnpj(cnpj)
+    if not validar_cnpj.cnpj_valido(cnpj_limpo):
+        return None, "CNPJ inválido"
+
+    if not 0 <= media_movel <= SERIE_MEDIA_MOVEL_MAX:
+        return None, f"media_movel deve estar entre 0 e {SERIE_MEDIA_MOVEL_MAX}"
+
+    chave = ("serie_operadora_async", cnpj_limpo, deltas, media_movel)
+    resultado = operadoras_cache.obter(chave)
+    if resultado is not None:
+        return resultado
+
+    rows = await operadoras_service_async.obter_serie_trimestral(cnpj_limpo, media_movel)
+
+    resultado = (montar_serie(cnpj_limpo, rows, deltas, media_movel), None)
+    operadoras_cache.definir(chave, resultado)
+    return resultado
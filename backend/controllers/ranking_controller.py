@@ -0,0 +1,108 @@
+import os
+import re
+
+from cache.cache_lru import cacheado, criar_cache
+from db import get_db_connection
+from services import ranking_service, snapshot_service
+
+CACHE_RANKING_TTL = int(os.getenv("CACHE_RANKING_TTL", 300))
+RANKING_TOP_MAX = int(os.getenv("RANKING_TOP_MAX", 100))
+
+ranking_cache = criar_cache("ranking", ttl=CACHE_RANKING_TTL)
+
+
+def _lista(valor):
+    # "SP,RJ" -> ["SP", "RJ"]
+    return [v.strip() for v in (valor or "").split(",") if v.strip()]
+
+
+def validar_parametros(args):
+    """Valida os parâmetros do ranking. Retorna (parametros, erro).
+
+    group_by: dimensões separadas por vírgula (padrão uf; vazio agrega tudo numa linha);
+    filtros uf, modalidade, ano, trimestre aceitam vários valores separados por vírgula.
+    """
+    agrupar_por = _lista(args.get("group_by", "uf"))
+    invalidas = [d for d in agrupar_por if d not in ranking_service.DIMENSOES]
+    if invalidas:
+        return None, f"group_by inválido: {', '.join(invalidas)} (use {', '.join(ranking_service.DIMENSOES)})"
+    if len(set(agrupar_por)) != len(agrupar_por):
+        return None, "group_by com dimensão repetida"
+
+    filtros = {}
+
+    ufs = [uf.upper() for uf in _lista(args.get("uf"))]
+    if any(not re.fullmatch(r"[A-Z]{2}|NAO_INFORMADO", uf) for uf in ufs):
+        return None, "UF inválida"
+    filtros["uf"] = ufs
+
+    filtros["modalidade"] = _lista(args.get("modalidade"))
+
+    try:
+        filtros["ano"] = [int(a) for a in _lista(args.get("ano"))]
+        filtros["trimestre"] = [int(t) for t in _lista(args.get("trimestre"))]
+        top = int(args.get("top", 10))
+    except ValueError:
+        return None, "ano, trimestre e top devem ser numéricos"
+
+    if any(t not in (1, 2, 3, 4) for t in filtros["trimestre"]):
+        return None, "trimestre deve estar entre 1 e 4"
+
+    if not 1 <= top <= RANKING_TOP_MAX:
+        return None, f"top deve estar entre 1 e {RANKING_TOP_MAX}"
+
+    ordenar_por = args.get("ordenar_por", "total")
+    if ordenar_por not in ranking_service.CAMPOS_METRICAS:
+        return None, f"ordenar_por deve ser um de: {', '.join(ranking_service.CAMPOS_METRICAS)}"
+
+    ordem = args.get("ordem", "desc").lower()
+    if ordem not in ("asc", "desc"):
+        return None, "ordem deve ser asc ou desc"
+
+    return {
+        "agrupar_por": tuple(agrupar_por),
+        # Tupla ordenada para servir de chave do cache
+        "filtros": tuple((d, tuple(v)) for d, v in filtros.items() if v),
+        "ordenar_por": ordenar_por,
+        "ordem": ordem,
+        "top": top,
+    }, None
+
+
+def ranking(args):
+    parametros, erro = validar_parametros(args)
+    if erro:
+        return None, erro
+    return calcular_ranking(**parametros), None
+
+
+@cacheado(ranking_cache)
+def calcular_ranking(agrupar_por, filtros, ordenar_por, ordem, top):
+    filtros_dict = dict(filtros)
+
+    if snapshot_service.ativo():
+        rows = snapshot_service.atual().obter_ranking(agrupar_por, filtros_dict, ordenar_por, ordem, top)
+    else:
+        with get_db_connection() as conn, conn.cursor() as cur:
+            rows = ranking_service.obter_ranking(cur, agrupar_por, filtros_dict, ordenar_por, ordem, top)
+
+    return montar_ranking(rows, agrupar_por, filtros_dict, ordenar_por, ordem, top)
+
+
+def montar_ranking(rows, agrupar_por, filtros, ordenar_por, ordem, top):
+    # Última coluna de cada linha: número de grupos antes do LIMIT
+    campos = agrupar_por + ranking_service.CAMPOS_METRICAS
+
+    return {
+        "data": [
+            {"posicao": posicao, **dict(zip(campos, row))} for posicao, row in enumerate(rows, start=1)
+        ],
+        "meta": {
+            "group_by": list(agrupar_por),
+            "filtros": {d: list(v) for d, v in filtros.items()},
+            "ordenar_por": ordenar_por,
+            "ordem": ordem,
+            "top": top,
+            "grupos": rows[0][-1] if rows else 0
+        }
+    }
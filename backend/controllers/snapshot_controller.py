@@ -0,0 +1,49 @@
+import logging
+import signal
+import threading
+
+from cache.estatisticas_cache import set_cache
+from controllers.operadoras_controller import operadoras_cache
+from controllers.ranking_controller import ranking_cache
+from services import snapshot_service
+from services.estatisticas_service import calcular_estatisticas
+
+
+def recarregar_snapshot(diretorio=None):
+    if not snapshot_service.ativo():
+        return None, "Modo snapshot desligado (SNAPSHOT_MODE=1)"
+
+    try:
+        snapshot = snapshot_service.recarregar(diretorio)
+    except (OSError, ValueError, KeyError) as e:
+        # O snapshot anterior continua servindo
+        logging.exception("Falha ao recarregar o snapshot")
+        return None, f"Falha ao recarregar o snapshot: {e}"
+
+    # As respostas guardadas vieram do snapshot anterior
+    operadoras_cache.limpar()
+    ranking_cache.limpar()
+    set_cache(calcular_estatisticas())
+
+    return snapshot.resumo(), None
+
+
+def resumo_snapshot():
+    if not snapshot_service.ativo():
+        return {"ativo": False}
+    return {"ativo": True, **snapshot_service.atual().resumo()}
+
+
+def registrar_recarga_por_sinal():
+    # kill -HUP <pid> recarrega o snapshot; a carga roda em outra thread para não travar o handler
+    if not hasattr(signal, "SIGHUP"):
+        return
+
+    def ao_receber(signum, frame):
+        threading.Thread(target=recarregar_snapshot, name="recarga-snapshot", daemon=True).start()
+
+    try:
+        signal.signal(signal.SIGHUP, ao_receber)
+    except ValueError:
+        # Só a thread principal registra sinais (ex: app importado dentro de um worker)
+        logging.warning("Recarga do snapshot por SIGHUP indisponível fora da thread principal")
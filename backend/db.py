@@ -1,11 +1,298 @@
-import psycopg2
+import hashlib
 import os
+import re
+import threading
+import time
+
+import psycopg2
+from psycopg2 import errors, extensions
+
+from utils.metricas import CursorMedido, nomear_consulta, pool_espera
+
+# Configuração do pool (todas as opções podem ser sobrescritas por variáveis de ambiente)
+POOL_MIN = int(os.getenv("DB_POOL_MIN", 1))  # conexões abertas já na criação do pool
+POOL_MAX = int(os.getenv("DB_POOL_MAX", 10))
+POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 5))  # segundos esperando uma conexão livre
+POOL_HEALTHCHECK = float(os.getenv("DB_POOL_HEALTHCHECK", 30))  # ociosidade (s) antes de testar a conexão
+# Desligar (0) atrás de pgbouncer em modo transaction, que não mantém PREPARE entre transações
+PREPARED_STATEMENTS = os.getenv("DB_PREPARED_STATEMENTS", "1") == "1"
+
+# NUMERIC chega como float em vez de Decimal: as respostas já saem prontas para o JSON.
+# Registrado só nas conexões do pool (PoolConexoes._conectar); o export volta a Decimal no
+# próprio cursor para gravar o dinheiro com duas casas.
+DEC2FLOAT = extensions.new_type(
+    extensions.DECIMAL.values,
+    "DEC2FLOAT",
+    lambda valor, cur: float(valor) if valor is not None else None
+)
+
+
+class PoolEsgotadoError(Exception):
+    pass
+
+
+class ConexaoPool(extensions.connection):
+    # Estado do pool guardado na própria conexão: nada indexado por id(), que o CPython reaproveita
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.ultimo_uso = None
+        self.preparadas = set()  # nomes dos prepared statements já criados nesta sessão
+
+
+class PoolConexoes:
+    """Pool de conexões com espera limitada por timeout.
+
+    As conexões devolvidas ficam ociosas até o máximo do pool (o ThreadedConnectionPool
+    do psycopg2 fecha toda conexão devolvida acima de minconn, reabrindo conexões sob
+    concorrência); minconn é só quantas conexões já abrem na criação.
+    """
+
+    def __init__(self, minconn, maxconn, timeout, healthcheck, **parametros):
+        self.timeout = timeout
+        self.healthcheck = healthcheck
+        self.minconn = min(minconn, maxconn)
+        self.maxconn = maxconn
+        self._parametros = parametros
+        # O semáforo limita o total de conexões (ociosas + em uso) e faz a espera com timeout
+        self._vagas = threading.BoundedSemaphore(maxconn)
+        self._lock = threading.Lock()
+        self._ociosas = []  # pilha: a conexão usada mais recentemente sai primeiro
+        self._em_uso = 0
+        self._stats = {
+            "checkouts": 0,
+            "timeouts": 0,
+            "conexoes_abertas": 0,
+            "conexoes_fechadas": 0,
+            "conexoes_descartadas": 0,
+            "espera_total_s": 0.0,
+            "espera_max_s": 0.0,
+        }
+        for _ in range(self.minconn):
+            self._ociosas.append(self._conectar())
+
+    def _conectar(self):
+        conn = psycopg2.connect(connection_factory=ConexaoPool, **self._parametros)
+        extensions.register_type(DEC2FLOAT, conn)
+        with self._lock:
+            self._stats["conexoes_abertas"] += 1
+        return conn
+
+    def _fechar(self, conn, descartada=False):
+        try:
+            conn.close()
+        finally:
+            with self._lock:
+                self._stats["conexoes_fechadas"] += 1
+                if descartada:
+                    self._stats["conexoes_descartadas"] += 1
+
+    def _retirar_ociosa(self):
+        with self._lock:
+            return self._ociosas.pop() if self._ociosas else None
+
+    def _conexao_saudavel(self, conn):
+        if conn.closed:
+            return False
+
+        if conn.ultimo_uso is None or time.monotonic() - conn.ultimo_uso < self.healthcheck:
+            return True
+
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def obter(self):
+        inicio = time.monotonic()
+        if not self._vagas.acquire(timeout=self.timeout):
+            with self._lock:
+                self._stats["timeouts"] += 1
+            raise PoolEsgotadoError(
+                f"Nenhuma conexão livre em {self.timeout}s (máximo de {self.maxconn} conexões)"
+            )
+
+        try:
+            conn = self._retirar_ociosa()
+            while conn is not None and not self._conexao_saudavel(conn):
+                # Conexão quebrada (ex: derrubada pelo servidor): descarta e tenta a próxima
+                self._fechar(conn, descartada=True)
+                conn = self._retirar_ociosa()
+            if conn is None:
+                conn = self._conectar()
+        except Exception:
+            self._vagas.release()
+            raise
+
+        espera = time.monotonic() - inicio
+        pool_espera.observar(espera)
+        with self._lock:
+            self._em_uso += 1
+            self._stats["checkouts"] += 1
+            self._stats["espera_total_s"] += espera
+            self._stats["espera_max_s"] = max(self._stats["espera_max_s"], espera)
+
+        return ConexaoPooled(self, conn)
+
+    def devolver(self, conn):
+        descartar = conn.closed != 0
+        if not descartar and conn.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE:
+            try:
+                conn.rollback()
+            except psycopg2.Error:
+                descartar = True
+
+        try:
+            if descartar:
+                self._fechar(conn, descartada=True)
+            else:
+                conn.ultimo_uso = time.monotonic()
+                with self._lock:
+                    self._ociosas.append(conn)
+        finally:
+            with self._lock:
+                self._em_uso -= 1
+            self._vagas.release()
+
+    def estatisticas(self):
+        with self._lock:
+            stats = dict(self._stats)
+            em_uso = self._em_uso
+            ociosas = len(self._ociosas)
+
+        checkouts = stats["checkouts"]
+        return {
+            "min": self.minconn,
+            "max": self.maxconn,
+            "em_uso": em_uso,
+            "ociosas": ociosas,
+            "checkouts": checkouts,
+            "timeouts": stats["timeouts"],
+            "conexoes_abertas": stats["conexoes_abertas"],
+            "conexoes_fechadas": stats["conexoes_fechadas"],
+            "conexoes_descartadas": stats["conexoes_descartadas"],
+            "espera_media_ms": round(stats["espera_total_s"] / checkouts * 1000, 3) if checkouts else 0,
+            "espera_max_ms": round(stats["espera_max_s"] * 1000, 3),
+        }
+
+    def fechar(self):
+        with self._lock:
+            ociosas, self._ociosas = self._ociosas, []
+        for conn in ociosas:
+            self._fechar(conn)
+
+
+class ConexaoPooled:
+    # Envolve a conexão do psycopg2: close() e o bloco "with" devolvem a conexão ao pool
+    def __init__(self, pool_conexoes, conn):
+        self._pool_conexoes = pool_conexoes
+        self._conn = conn
+
+    def __getattr__(self, nome):
+        return getattr(self._conn, nome)
+
+    def close(self):
+        if self._conn is not None:
+            conn, self._conn = self._conn, None
+            self._pool_conexoes.devolver(conn)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = PoolConexoes(
+                    POOL_MIN,
+                    POOL_MAX,
+                    POOL_TIMEOUT,
+                    POOL_HEALTHCHECK,
+                    host=os.getenv("DB_HOST"),
+                    database=os.getenv("DB_NAME"),
+                    user=os.getenv("DB_USER"),
+                    password=os.getenv("DB_PASSWORD"),
+                    port=os.getenv("DB_PORT", 5432),
+                    cursor_factory=CursorMedido
+                )
+    return _pool
+
 
 def get_db_connection():
-    return psycopg2.connect(
-        host=os.getenv("DB_HOST"),
-        database=os.getenv("DB_NAME"),
-        user=os.getenv("DB_USER"),
-        password=os.getenv("DB_PASSWORD"),
-        port=os.getenv("DB_PORT", 5432)
-    )
\ No newline at end of file
+    return get_pool().obter()
+
+
+def estatisticas_pool():
+    # Não força a criação do pool só para consultar as estatísticas
+    if _pool is None:
+        return {
+            "min": POOL_MIN,
+            "max": POOL_MAX,
+            "em_uso": 0,
+            "ociosas": 0,
+            "checkouts": 0,
+            "timeouts": 0,
+            "conexoes_abertas": 0,
+            "conexoes_fechadas": 0,
+            "conexoes_descartadas": 0,
+            "espera_media_ms": 0,
+            "espera_max_ms": 0,
+        }
+    return _pool.estatisticas()
+
+
+def _para_prepare(query):
+    # Placeholders do psycopg2 (%s) viram parâmetros posicionais do PREPARE ($1, $2, ...)
+    contador = iter(range(1, 10_000))
+    return re.sub(r"%%|%s", lambda m: "%" if m.group() == "%%" else f"${next(contador)}", query)
+
+
+def executar_preparada(cur, nome, query, params=()):
+    """Executa ``query`` como prepared statement da conexão do cursor.
+
+    Na primeira vez em cada conexão do pool o SQL é enviado com PREPARE (parse e plano
+    uma vez só); depois só vai EXECUTE com os parâmetros. O nome do statement vem do hash
+    do SQL, então cada variante de consulta (com/sem busca, com/sem cursor) tem o seu.
+    ``nome`` é o rótulo da consulta nas métricas (db_consulta_*) e no slow-query log.
+    """
+    params = tuple(params)
+    if not PREPARED_STATEMENTS or _pool is None:
+        with nomear_consulta(nome):
+            cur.execute(query, params)
+        return
+
+    statement = "ps_" + hashlib.sha1(query.encode("utf-8")).hexdigest()[:16]
+    execute = f"EXECUTE {statement}" + (f" ({', '.join(['%s'] * len(params))})" if params else "")
+    preparadas = cur.connection.preparadas
+
+    for tentativa in range(2):
+        if statement not in preparadas:
+            try:
+                # Medido à parte: o PREPARE não conta como mais uma execução da consulta
+                with nomear_consulta(f"{nome}:prepare"):
+                    cur.execute(f"PREPARE {statement} AS {_para_prepare(query).strip().rstrip(';')}")
+            except errors.DuplicatePreparedStatement:
+                # Já existe na sessão, só não estava registrado: usa o que está lá
+                cur.connection.rollback()
+            preparadas.add(statement)
+        try:
+            with nomear_consulta(nome):
+                cur.execute(execute, params)
+            return
+        except errors.InvalidSqlStatementName:
+            # O servidor perdeu este statement; os demais da sessão continuam valendo
+            if tentativa:
+                raise
+            cur.connection.rollback()
+            preparadas.discard(statement)
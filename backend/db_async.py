@@ -0,0 +1,67 @@
+import os
+from contextlib import asynccontextmanager
+
+from psycopg.conninfo import make_conninfo
+from psycopg.types.numeric import FloatLoader
+from psycopg_pool import AsyncConnectionPool
+
+from db import POOL_HEALTHCHECK, POOL_MAX, POOL_MIN, POOL_TIMEOUT
+
+# Pool assíncrono usado pelo app ASGI (app_async.py); mesma configuração do pool síncrono
+_pool = None
+
+
+async def _configurar(conn):
+    # NUMERIC como float, como o DEC2FLOAT do pool síncrono (as funções montar_* não convertem).
+    # Prepared statements: o psycopg 3 já prepara sozinho consultas repetidas (prepare_threshold)
+    conn.adapters.register_loader("numeric", FloatLoader)
+
+
+async def abrir_pool():
+    global _pool
+    if _pool is not None:
+        return
+
+    conninfo = make_conninfo(
+        host=os.getenv("DB_HOST"),
+        dbname=os.getenv("DB_NAME"),
+        user=os.getenv("DB_USER"),
+        password=os.getenv("DB_PASSWORD"),
+        port=os.getenv("DB_PORT", 5432)
+    )
+    _pool = AsyncConnectionPool(
+        conninfo,
+        min_size=POOL_MIN,
+        max_size=POOL_MAX,
+        timeout=POOL_TIMEOUT,
+        max_idle=max(POOL_HEALTHCHECK, 60),
+        check=AsyncConnectionPool.check_connection,
+        configure=_configurar,
+        open=False
+    )
+    await _pool.open()
+
+
+async def fechar_pool():
+    global _pool
+    if _pool is not None:
+        await _pool.close()
+        _pool = None
+
+
+@asynccontextmanager
+async def conexao():
+    async with _pool.connection() as conn:
+        yield conn
+
+
+async def consultar(query, params=None, um=False):
+    # Cada chamada usa a sua própria conexão do pool, então várias consultas
+    # independentes podem rodar em paralelo com asyncio.gather
+    async with conexao() as conn, conn.cursor() as cur:
+        await cur.execute(query, params)
+        return await cur.fetchone() if um else await cur.fetchall()
+
+
+def estatisticas_pool():
+    return _pool.get_stats() if _pool is not None else {}
@@ -0,0 +1,31 @@
+import hmac
+import os
+
+from flask import Blueprint, jsonify, request
+from controllers import snapshot_controller
+
+admin_bp = Blueprint("admin", __name__)
+
+# Sem ADMIN_TOKEN definido, as rotas administrativas ficam desligadas
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+
+
+def _autorizado():
+    # Compara bytes: com str, compare_digest levanta TypeError para cabeçalhos não ASCII
+    token = request.headers.get("X-Admin-Token", "")
+    return bool(ADMIN_TOKEN) and hmac.compare_digest(token.encode("utf-8"), ADMIN_TOKEN.encode("utf-8"))
+
+
+@admin_bp.route("/api/admin/snapshot/recarregar", methods=["POST"])
+def recarregar_snapshot():
+    if not _autorizado():
+        return jsonify({"erro": "Não autorizado"}), 403
+
+    # Corpo opcional: {"diretorio": "..."}; padrão SNAPSHOT_DIR
+    body = request.get_json(silent=True) or {}
+    data, erro = snapshot_controller.recarregar_snapshot(body.get("diretorio"))
+
+    if erro:
+        return jsonify({"erro": erro}), 400
+
+    return jsonify(data)
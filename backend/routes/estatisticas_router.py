@@ -1,23 +1,19 @@
 from flask import Blueprint, jsonify
 from services.estatisticas_service import calcular_estatisticas
-from cache.estatisticas_cache import cache_valido, get_cache, set_cache
+from cache.estatisticas_cache import idade_snapshot, obter_estatisticas, timestamp_snapshot
+from utils.http_cache import condicional
 
 estatisticas_bp = Blueprint("estatisticas", __name__)
 
 @estatisticas_bp.route("/api/estatisticas", methods=["GET"])
+@condicional("estatisticas", "public, max-age=60", chave_extra=timestamp_snapshot)
 def estatisticas():
-
-    if cache_valido():
-        return jsonify({
-            "cache": True,
-            **get_cache()
-        })
-
-    resultado = calcular_estatisticas()
-    set_cache(resultado)
+    # Serve o último snapshot; o recálculo acontece em segundo plano
+    resultado, calculado_agora = obter_estatisticas(calcular_estatisticas)
 
     return jsonify({
-        "cache": False,
+        "cache": not calculado_agora,
+        "idade_snapshot_s": round(idade_snapshot(), 1),
         **resultado
     })
 
@@ -0,0 +1,15 @@
+from quart import Blueprint, jsonify
+from services.estatisticas_service_async import calcular_estatisticas
+from cache.estatisticas_cache import idade_snapshot, obter_estatisticas_async
+
+estatisticas_async_bp = Blueprint("estatisticas_async", __name__)
+
+@estatisticas_async_bp.route("/api/estatisticas", methods=["GET"])
+async def estatisticas():
+    resultado, calculado_agora = await obter_estatisticas_async(calcular_estatisticas)
+
+    return jsonify({
+        "cache": not calculado_agora,
+        "idade_snapshot_s": round(idade_snapshot(), 1),
+        **resultado
+    })
@@ -0,0 +1,29 @@
+from flask import Blueprint, Response, jsonify, request, stream_with_context
+from controllers import export_controller
+
+export_bp = Blueprint("export", __name__)
+
+
+def _resposta_export(tipo):
+    # Filtros opcionais: ano, trimestre, uf, cnpj; formato=csv (padrão) ou ndjson
+    formato = request.args.get("formato", "csv").lower()
+    gerador, mimetype, erro = export_controller.exportar(tipo, formato, request.args)
+
+    if erro:
+        return jsonify({"erro": erro}), 400
+
+    return Response(
+        stream_with_context(gerador),
+        mimetype=mimetype,
+        headers={"Content-Disposition": f"attachment; filename={tipo}.{formato}"}
+    )
+
+
+@export_bp.route("/api/export/despesas", methods=["GET"])
+def exportar_despesas():
+    return _resposta_export("despesas")
+
+
+@export_bp.route("/api/export/operadoras", methods=["GET"])
+def exportar_operadoras():
+    return _resposta_export("operadoras")
@@ -0,0 +1,51 @@
+from flask import Blueprint, Response
+from cache.cache_lru import estatisticas_caches
+from db import estatisticas_pool
+from utils import metricas
+
+metricas_bp = Blueprint("metricas", __name__)
+
+
+def _coletar_pool():
+    stats = estatisticas_pool()
+    linhas = metricas.gauge("db_pool_conexoes_em_uso", "Conexões emprestadas do pool", [((), stats["em_uso"])])
+    linhas += metricas.gauge("db_pool_conexoes_ociosas", "Conexões livres no pool", [((), stats["ociosas"])])
+    linhas += metricas.gauge("db_pool_conexoes_max", "Tamanho máximo do pool", [((), stats["max"])])
+    linhas += metricas.contador_externo("db_pool_timeouts_total", "Checkouts que esgotaram DB_POOL_TIMEOUT", [((), stats["timeouts"])])
+    linhas += metricas.contador_externo(
+        "db_pool_conexoes_abertas_total", "Conexões físicas abertas pelo pool", [((), stats["conexoes_abertas"])]
+    )
+    linhas += metricas.contador_externo(
+        "db_pool_conexoes_fechadas_total", "Conexões físicas fechadas pelo pool", [((), stats["conexoes_fechadas"])]
+    )
+    linhas += metricas.contador_externo(
+        "db_pool_conexoes_descartadas_total", "Conexões quebradas descartadas", [((), stats["conexoes_descartadas"])]
+    )
+    return linhas
+
+
+def _coletar_caches():
+    caches = estatisticas_caches()
+    linhas = []
+    for campo, ajuda in (
+        ("hits", "Acertos do cache"),
+        ("misses", "Faltas do cache"),
+        ("evictions", "Itens removidos pelo limite do LRU"),
+        ("expirados", "Itens removidos pelo TTL"),
+        ("esperas_single_flight", "Requisições que aguardaram o cálculo de outra thread"),
+    ):
+        linhas += metricas.contador_externo(
+            f"cache_{campo}_total", ajuda, [((("cache", c["nome"]),), c[campo]) for c in caches]
+        )
+    linhas += metricas.gauge("cache_itens", "Itens guardados no cache", [((("cache", c["nome"]),), c["itens"]) for c in caches])
+    return linhas
+
+
+metricas.registrar_coletor(_coletar_pool)
+metricas.registrar_coletor(_coletar_caches)
+
+
+@metricas_bp.route("/metrics", methods=["GET"])
+def exportar_metricas():
+    # Formato texto do Prometheus (consultas, requisições, pool e caches)
+    return Response(metricas.renderizar(), mimetype="text/plain; version=0.0.4")
@@ -1,22 +1,51 @@
 from flask import Blueprint, request, jsonify
 from controllers import operadoras_controller
+from utils.http_cache import condicional
 
 operadoras_bp = Blueprint("operadoras", __name__)
 
 
 @operadoras_bp.route("/api/operadoras", methods=["GET"])
+@condicional("operadoras", "public, max-age=60")
 def listar_operadoras():
     page = request.args.get("page", 1, type=int)
     limit = request.args.get("limit", 10, type=int)
     # Captura o parâmetro 'search' ou 'q' da URL
     search = request.args.get("search", type=str)
 
+    # Modo cursor (opcional): basta enviar ?cursor= (vazio na primeira página)
+    if "cursor" in request.args:
+        data, erro = operadoras_controller.lista_operadoras_cursor(limit, request.args["cursor"], search)
+        if erro:
+            return jsonify({"erro": erro}), 400
+        return jsonify(data)
+
     # Passa o search para o controller
-    response = operadoras_controller.lista_operadoras(page, limit, search)
+    # Estratégia de contagem opcional: exact, cached ou estimate
+    response = operadoras_controller.lista_operadoras(page, limit, search, request.args.get("count"))
     return jsonify(response)
 
 
+@operadoras_bp.route("/api/operadoras/batch", methods=["POST"])
+def operadoras_em_lote():
+    # Corpo: {"cnpjs": [...], "incluir_indicadores": true|false}
+    body = request.get_json(silent=True) or {}
+    if not isinstance(body, dict):
+        return jsonify({"erro": "O corpo deve ser um objeto JSON"}), 400
+
+    data, erro = operadoras_controller.operadoras_em_lote(
+        body.get("cnpjs"),
+        body.get("incluir_indicadores", False)
+    )
+
+    if erro:
+        return jsonify({"erro": erro}), 400
+
+    return jsonify(data)
+
+
 @operadoras_bp.route("/api/operadoras/<cnpj>", methods=["GET"])
+@condicional("operadora_detalhe", "public, max-age=60")
 def detalhe_operadora(cnpj):
     data, erro = operadoras_controller.detalhe_operadora(cnpj)
 
@@ -27,13 +56,32 @@ def detalhe_operadora(cnpj):
 
 
 @operadoras_bp.route("/api/operadoras/<cnpj>/despesas", methods=["GET"])
+@condicional("operadora_despesas", "public, max-age=60")
 def despesas_operadora(cnpj):
     page = int(request.args.get("page", 1))
     limit = int(request.args.get("limit", 10))
 
-    data, erro = operadoras_controller.despesas_operadora(cnpj, page, limit)
+    if "cursor" in request.args:
+        data, erro = operadoras_controller.despesas_operadora_cursor(cnpj, limit, request.args["cursor"])
+    else:
+        data, erro = operadoras_controller.despesas_operadora(cnpj, page, limit)
 
     if erro:
         return jsonify({"erro": erro}), 400
 
-    return jsonify(data)
\ No newline at end of file
+    return jsonify(data)
+
+
+@operadoras_bp.route("/api/operadoras/<cnpj>/serie", methods=["GET"])
+@condicional("operadora_serie", "public, max-age=60")
+def serie_operadora(cnpj):
+    # Um ponto por trimestre; opcionais: ?deltas=1 (variação trimestral/anual) e ?media_movel=N
+    deltas = request.args.get("deltas", "0").lower() in ("1", "true")
+    media_movel = request.args.get("media_movel", 0, type=int)
+
+    data, erro = operadoras_controller.serie_operadora(cnpj, deltas, media_movel)
+
+    if erro:
+        return jsonify({"erro": erro}), 400
+
+    return jsonify(data)
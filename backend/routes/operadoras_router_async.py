@@ -0,0 +1,77 @@
+from quart import Blueprint, request, jsonify
+from controllers import operadoras_controller_async
+
+# Mesmas rotas de operadoras_router.py, servidas pelo app assíncrono (app_async.py)
+operadoras_async_bp = Blueprint("operadoras_async", __name__)
+
+
+@operadoras_async_bp.route("/api/operadoras", methods=["GET"])
+async def listar_operadoras():
+    page = request.args.get("page", 1, type=int)
+    limit = request.args.get("limit", 10, type=int)
+    search = request.args.get("search", type=str)
+
+    if "cursor" in request.args:
+        data, erro = await operadoras_controller_async.lista_operadoras_cursor(limit, request.args["cursor"], search)
+        if erro:
+            return jsonify({"erro": erro}), 400
+        return jsonify(data)
+
+    response = await operadoras_controller_async.lista_operadoras(page, limit, search, request.args.get("count"))
+    return jsonify(response)
+
+
+@operadoras_async_bp.route("/api/operadoras/batch", methods=["POST"])
+async def operadoras_em_lote():
+    body = await request.get_json(silent=True) or {}
+    if not isinstance(body, dict):
+        return jsonify({"erro": "O corpo deve ser um objeto JSON"}), 400
+
+    data, erro = await operadoras_controller_async.operadoras_em_lote(
+        body.get("cnpjs"),
+        body.get("incluir_indicadores", False)
+    )
+
+    if erro:
+        return jsonify({"erro": erro}), 400
+
+    return jsonify(data)
+
+
+@operadoras_async_bp.route("/api/operadoras/<cnpj>", methods=["GET"])
+async def detalhe_operadora(cnpj):
+    data, erro = await operadoras_controller_async.detalhe_operadora(cnpj)
+
+    if erro:
+        return jsonify({"erro": erro}), 400 if "inválido" in erro else 404
+
+    return jsonify(data)
+
+
+@operadoras_async_bp.route("/api/operadoras/<cnpj>/despesas", methods=["GET"])
+async def despesas_operadora(cnpj):
+    page = int(request.args.get("page", 1))
+    limit = int(request.args.get("limit", 10))
+
+    if "cursor" in request.args:
+        data, erro = await operadoras_controller_async.despesas_operadora_cursor(cnpj, limit, request.args["cursor"])
+    else:
+        data, erro = await operadoras_controller_async.despesas_operadora(cnpj, page, limit)
+
+    if erro:
+        return jsonify({"erro": erro}), 400
+
+    return jsonify(data)
+
+
+@operadoras_async_bp.route("/api/operadoras/<cnpj>/serie", methods=["GET"])
+async def serie_operadora(cnpj):
+    deltas = request.args.get("deltas", "0").lower() in ("1", "true")
+    media_movel = request.args.get("media_movel", 0, type=int)
+
+    data, erro = await operadoras_controller_async.serie_operadora(cnpj, deltas, media_movel)
+
+    if erro:
+        return jsonify({"erro": erro}), 400
+
+    return jsonify(data)
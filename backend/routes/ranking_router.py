@@ -0,0 +1,17 @@
+from flask import Blueprint, jsonify, request
+from controllers import ranking_controller
+from utils.http_cache import condicional
+
+ranking_bp = Blueprint("ranking", __name__)
+
+
+@ranking_bp.route("/api/ranking", methods=["GET"])
+@condicional("ranking", "public, max-age=60")
+def ranking():
+    # Ex: /api/ranking?group_by=uf,modalidade&ano=2025&trimestre=1,2&top=10&ordenar_por=total&ordem=desc
+    data, erro = ranking_controller.ranking(request.args)
+
+    if erro:
+        return jsonify({"erro": erro}), 400
+
+    return jsonify(data)
@@ -0,0 +1,24 @@
+from flask import Blueprint, jsonify
+from cache.cache_lru import estatisticas_caches
+from controllers import snapshot_controller
+from db import estatisticas_pool
+
+saude_bp = Blueprint("saude", __name__)
+
+
+@saude_bp.route("/api/saude/pool", methods=["GET"])
+def saude_pool():
+    # Ocupação e tempo de espera do pool, usados para dimensionar DB_POOL_MIN/DB_POOL_MAX
+    return jsonify(estatisticas_pool())
+
+
+@saude_bp.route("/api/saude/cache", methods=["GET"])
+def saude_cache():
+    # Hits, misses e evictions de cada cache registrado
+    return jsonify(estatisticas_caches())
+
+
+@saude_bp.route("/api/saude/snapshot", methods=["GET"])
+def saude_snapshot():
+    # Origem, horário e tamanho do snapshot em memória (SNAPSHOT_MODE=1)
+    return jsonify(snapshot_controller.resumo_snapshot())
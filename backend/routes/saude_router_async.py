@@ -0,0 +1,16 @@
+from quart import Blueprint, jsonify
+from cache.cache_lru import estatisticas_caches
+from db_async import estatisticas_pool
+
+saude_async_bp = Blueprint("saude_async", __name__)
+
+
+@saude_async_bp.route("/api/saude/pool", methods=["GET"])
+async def saude_pool():
+    # Estatísticas do pool assíncrono (psycopg_pool), usadas também como readiness do benchmark
+    return jsonify(estatisticas_pool())
+
+
+@saude_async_bp.route("/api/saude/cache", methods=["GET"])
+async def saude_cache():
+    return jsonify(estatisticas_caches())
@@ -1,48 +1,64 @@
 from db import get_db_connection
+from services import snapshot_service
+from utils.metricas import nomear_consulta
 
-def calcular_estatisticas():
-    conn = get_db_connection()
-    cur = conn.cursor()
-
-    # 1. Total e Média Geral
-    cur.execute("""
-        SELECT SUM(valor_despesas), AVG(valor_despesas)
-        FROM consolidado_despesas;
-    """)
-    total, media = cur.fetchone()
-
-    # 2. Top 5 Operadoras (Maior despesa)
-    cur.execute("""
-        SELECT razao_social, SUM(valor_despesas) AS total
-        FROM consolidado_despesas
-        GROUP BY razao_social
-        ORDER BY total DESC
-        LIMIT 5;
-    """)
-    top_operadoras = cur.fetchall()
-
-    # 3. Distribuição por UF (Para o Gráfico)
-    # Precisamos fazer um JOIN porque a UF está em 'dados_cadastrais' 
-    # e o valor em 'consolidado_despesas'
-    cur.execute("""
-    SELECT d.uf, SUM(c.valor_despesas) as total
-    FROM dados_cadastrais d
-    JOIN consolidado_despesas c ON d.CNPJ = c.CNPJ
-    GROUP BY d.uf
+# Os agregados vêm das tabelas de rollup (supabase/05_rollups.sql),
+# recalculadas a cada carga em vez de varrer consolidado_despesas aqui
+
+# 1. Total e Média Geral
+SQL_TOTAIS = """
+    SELECT total_despesas, media_despesas
+    FROM rollup_estatisticas_globais
+    WHERE id = 1;
+"""
+
+# 2. Top 5 Operadoras (Maior despesa)
+SQL_TOP_OPERADORAS = """
+    SELECT razao_social, total_despesas
+    FROM rollup_top_operadoras
+    ORDER BY posicao
+    LIMIT 5;
+"""
+
+# 3. Distribuição por UF (Para o Gráfico)
+SQL_DESPESAS_POR_UF = """
+    SELECT uf, total
+    FROM rollup_despesas_uf
     ORDER BY total DESC;
-    """)
-    despesas_por_uf = cur.fetchall()
+"""
+
+
+def calcular_estatisticas():
+    if snapshot_service.ativo():
+        # Os mesmos agregados do 05_rollups.sql, pré-calculados na carga do snapshot
+        return montar_estatisticas(*snapshot_service.atual().consultas_estatisticas())
+
+    with get_db_connection() as conn, conn.cursor() as cur:
+        with nomear_consulta("estatisticas_totais"):
+            cur.execute(SQL_TOTAIS)
+            totais = cur.fetchone()
+
+        with nomear_consulta("estatisticas_top_operadoras"):
+            cur.execute(SQL_TOP_OPERADORAS)
+            top_operadoras = cur.fetchall()
+
+        with nomear_consulta("estatisticas_despesas_por_uf"):
+            cur.execute(SQL_DESPESAS_POR_UF)
+            despesas_por_uf = cur.fetchall()
+
+    return montar_estatisticas(totais, top_operadoras, despesas_por_uf)
+
 
-    cur.close()
-    conn.close()
+def montar_estatisticas(totais, top_operadoras, despesas_por_uf):
+    total, media = totais or (None, None)
 
     return {
-        "total_despesas": float(total) if total else 0,
-        "media_despesas": float(media) if media else 0,
+        "total_despesas": total or 0,
+        "media_despesas": media or 0,
         "top_5_operadoras": [
-            {"razao_social": row[0], "total_despesas": float(row[1])} for row in top_operadoras
+            {"razao_social": row[0], "total_despesas": row[1] or 0} for row in top_operadoras
         ],
         "despesas_por_uf": [
-            {"uf": row[0], "total": float(row[1])} for row in despesas_por_uf
+            {"uf": row[0], "total": row[1] or 0} for row in despesas_por_uf
         ]
     }
\ No newline at end of file
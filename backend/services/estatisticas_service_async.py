@@ -0,0 +1,19 @@
+import asyncio
+
+from db_async import consultar
+from services.estatisticas_service import (
+    SQL_DESPESAS_POR_UF,
+    SQL_TOP_OPERADORAS,
+    SQL_TOTAIS,
+    montar_estatisticas,
+)
+
+
+async def calcular_estatisticas():
+    # As três consultas são independentes: rodam em paralelo, cada uma na sua conexão
+    totais, top_operadoras, despesas_por_uf = await asyncio.gather(
+        consultar(SQL_TOTAIS, um=True),
+        consultar(SQL_TOP_OPERADORAS),
+        consultar(SQL_DESPESAS_POR_UF)
+    )
+    return montar_estatisticas(totais, top_operadoras, despesas_por_uf)
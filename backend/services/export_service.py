@@ -0,0 +1,91 @@
+import os
+import uuid
+
+from psycopg2 import extensions
+
+from db import get_db_connection
+from services.operadoras_service import CAMPOS_OPERADORA, COLUNAS_OPERADORA
+
+# Linhas trazidas do servidor por vez; a memória do export não depende do total exportado
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", 5000))
+
+COLUNAS_EXPORT_DESPESAS = ["id_despesa", "cnpj", "razao_social", "uf", "ano", "trimestre", "valor_despesas"]
+COLUNAS_EXPORT_OPERADORAS = list(CAMPOS_OPERADORA)
+
+
+def _filtros_despesas(filtros):
+    condicoes = []
+    params = []
+
+    for coluna, chave in (("c.cnpj", "cnpj"), ("d.uf", "uf"), ("c.ano", "ano"), ("c.trimestre", "trimestre")):
+        if filtros.get(chave) is not None:
+            condicoes.append(f"{coluna} = %s")
+            params.append(filtros[chave])
+
+    return condicoes, params
+
+
+def sql_exportar_despesas(filtros):
+    condicoes, params = _filtros_despesas(filtros)
+    where = f"WHERE {' AND '.join(condicoes)}" if condicoes else ""
+    return f"""
+        SELECT c.id_despesa, c.cnpj, c.razao_social, d.uf, c.ano, c.trimestre, c.valor_despesas
+        FROM consolidado_despesas c
+        LEFT JOIN dados_cadastrais d ON d.cnpj = c.cnpj
+        {where}
+        ORDER BY c.id_despesa
+    """, params
+
+
+def sql_exportar_operadoras(filtros):
+    condicoes = []
+    params = []
+
+    if filtros.get("cnpj"):
+        condicoes.append("d.cnpj = %s")
+        params.append(filtros["cnpj"])
+    if filtros.get("uf"):
+        condicoes.append("d.uf = %s")
+        params.append(filtros["uf"])
+
+    # Ano/trimestre: operadoras com despesas registradas no período
+    periodo, params_periodo = [], []
+    if filtros.get("ano") is not None:
+        periodo.append("x.ano = %s")
+        params_periodo.append(filtros["ano"])
+    if filtros.get("trimestre") is not None:
+        periodo.append("x.trimestre = %s")
+        params_periodo.append(filtros["trimestre"])
+    if periodo:
+        condicoes.append(
+            f"EXISTS (SELECT 1 FROM consolidado_despesas x WHERE x.cnpj = d.cnpj AND {' AND '.join(periodo)})"
+        )
+        params += params_periodo
+
+    where = f"WHERE {' AND '.join(condicoes)}" if condicoes else ""
+    return f"""
+        SELECT{COLUNAS_OPERADORA}
+        FROM dados_cadastrais d
+        {where}
+        ORDER BY d.cnpj
+    """, params
+
+
+def iterar_lotes(query, params, tamanho=EXPORT_BATCH_SIZE):
+    """Gera lotes de linhas a partir de um cursor nomeado (server-side).
+
+    O resultado fica no servidor e só ``tamanho`` linhas por vez trafegam e ficam em
+    memória. A conexão é devolvida ao pool quando o gerador termina ou é fechado
+    (ex: cliente desconectou no meio do download).
+    """
+    with get_db_connection() as conn:
+        with conn.cursor(name=f"export_{uuid.uuid4().hex}") as cur:
+            # Decimal neste cursor (a conexão do pool converte NUMERIC em float): o CSV sai com 1500.00
+            extensions.register_type(extensions.DECIMAL, cur)
+            cur.itersize = tamanho
+            cur.execute(query, params)
+            while True:
+                rows = cur.fetchmany(tamanho)
+                if not rows:
+                    break
+                yield rows
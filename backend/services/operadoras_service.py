@@ -1,107 +1,261 @@
-def contar_operadoras(cur, search_term=None):
+import re
+
+from db import executar_preparada
+
+
+def _filtro_busca(search_term):
+    """Monta o filtro de busca por razão social ou CNPJ.
+
+    Retorna (where, params, ordem, params_ordem). Termos só com dígitos (CNPJ, com ou sem
+    pontuação) usam busca por prefixo no índice idx_cadastrais_cnpj_prefixo; os demais
+    buscam substring sem acento/caixa no índice trigram e ordenam por relevância.
+    """
+    if not search_term or not search_term.strip():
+        return "", [], "", []
+
+    termo = search_term.strip()
+
+    if re.fullmatch(r"[\d./\-\s]+", termo) and re.search(r"\d", termo):
+        digitos = re.sub(r"\D", "", termo)
+        return "WHERE cnpj LIKE %s", [f"{digitos}%"], "", []
+
+    # Escapa os curingas do LIKE para o termo ser tratado literalmente
+    termo_like = termo.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return (
+        "WHERE f_normalizar_busca(razao_social) LIKE '%%' || f_normalizar_busca(%s) || '%%'",
+        [termo_like],
+        "similarity(f_normalizar_busca(razao_social), f_normalizar_busca(%s)) DESC,",
+        [termo],
+    )
+
+
+# As funções sql_* só montam (query, params); assim o mesmo SQL serve às funções
+# síncronas abaixo e ao serviço assíncrono (services/operadoras_service_async.py).
+
+def sql_contar_operadoras(search_term=None):
     # Garante que se search_term for None ou vazio, não entre no filtro
-    if search_term and search_term.strip():
-        query = """
-            SELECT COUNT(*) 
-            FROM dados_cadastrais 
-            WHERE razao_social ILIKE %s 
-               OR CAST(cnpj AS TEXT) ILIKE %s;
-        """
-        term = f"%{search_term.strip()}%"
-        cur.execute(query, (term, term))
-    else:
-        cur.execute("SELECT COUNT(*) FROM dados_cadastrais;")
-    
+    where, params, _, _ = _filtro_busca(search_term)
+    return f"SELECT COUNT(*) FROM dados_cadastrais {where};", params
+
+
+def contar_operadoras(cur, search_term=None):
+    executar_preparada(cur, "contar_operadoras", *sql_contar_operadoras(search_term))
     return cur.fetchone()[0]
 
 
+SQL_ESTIMAR_OPERADORAS = "SELECT reltuples::BIGINT FROM pg_class WHERE oid = 'dados_cadastrais'::regclass;"
+
+
+def estimativa_valida(row):
+    # Estimativa do planner (atualizada pelo ANALYZE); None se a tabela nunca foi analisada
+    return row[0] if row and row[0] > 0 else None
+
+
+def estimar_operadoras(cur):
+    executar_preparada(cur, "estimar_operadoras", SQL_ESTIMAR_OPERADORAS)
+    return estimativa_valida(cur.fetchone())
+
+
+def sql_listar_operadoras(limit, offset, search_term=None):
+    where, params, ordem, params_ordem = _filtro_busca(search_term)
+    return f"""
+        SELECT cnpj, razao_social, uf
+        FROM dados_cadastrais
+        {where}
+        ORDER BY {ordem} razao_social
+        LIMIT %s OFFSET %s
+    """, (*params, *params_ordem, limit, offset)
+
+
 def listar_operadoras(cur, limit, offset, search_term=None):
-    if search_term and search_term.strip():
-        query = """
-            SELECT cnpj, razao_social, uf
-            FROM dados_cadastrais
-            WHERE razao_social ILIKE %s OR cnpj ILIKE %s
-            ORDER BY razao_social
-            LIMIT %s OFFSET %s
-        """
-        term = f"%{search_term.strip()}%"
-        cur.execute(query, (term, term, limit, offset))
-    else:
-        cur.execute("""
-            SELECT cnpj, razao_social, uf
-            FROM dados_cadastrais
-            ORDER BY razao_social
-            LIMIT %s OFFSET %s
-        """, (limit, offset))
-        
+    executar_preparada(cur, "listar_operadoras", *sql_listar_operadoras(limit, offset, search_term))
     return cur.fetchall()
 
 
-def buscar_operadora_por_cnpj(cur, cnpj):
-    cur.execute("""
-        SELECT
-            cnpj,
-            registro_operadora,
-            razao_social,
-            nome_fantasia,
-            modalidade,
-            logradouro,
-            numero,
-            complemento,
-            bairro,
-            cidade,
-            uf,
-            cep,
-            ddd,
-            telefone,
-            fax,
-            endereco_eletronico,
-            representante,
-            cargo_representante,
-            regiao_de_comercializacao,
-            data_registro_ans
+def sql_listar_operadoras_keyset(limit, apos=None, search_term=None):
+    # Paginação por cursor: busca a partir da chave (razao_social, cnpj) da última linha
+    # usando o índice idx_cadastrais_razao_cnpj, sem OFFSET nem COUNT(*).
+    # Com busca, a ordem continua alfabética (e não por relevância) para o cursor ser estável.
+    where, params, _, _ = _filtro_busca(search_term)
+
+    if apos is not None:
+        where += " AND " if where else "WHERE "
+        where += "(COALESCE(razao_social, ''), cnpj) > (%s, %s)"
+        params += list(apos)
+
+    return f"""
+        SELECT cnpj, razao_social, uf, COALESCE(razao_social, '')
         FROM dados_cadastrais
-        WHERE cnpj = %s;
-    """, (cnpj,))
+        {where}
+        ORDER BY COALESCE(razao_social, ''), cnpj
+        LIMIT %s
+    """, (*params, limit)
+
+
+def listar_operadoras_keyset(cur, limit, apos=None, search_term=None):
+    executar_preparada(cur, "listar_operadoras_keyset", *sql_listar_operadoras_keyset(limit, apos, search_term))
+    return cur.fetchall()
+
+
+COLUNAS_OPERADORA = """
+            d.cnpj,
+            d.registro_operadora,
+            d.razao_social,
+            d.nome_fantasia,
+            d.modalidade,
+            d.logradouro,
+            d.numero,
+            d.complemento,
+            d.bairro,
+            d.cidade,
+            d.uf,
+            d.cep,
+            d.ddd,
+            d.telefone,
+            d.fax,
+            d.endereco_eletronico,
+            d.representante,
+            d.cargo_representante,
+            d.regiao_de_comercializacao,
+            d.data_registro_ans"""
+
+# Nomes das colunas acima (os mesmos do cursor.description), usados para montar o JSON
+CAMPOS_OPERADORA = tuple(c.strip().removeprefix("d.") for c in COLUNAS_OPERADORA.split(","))
+CAMPOS_LISTA = ("cnpj", "razao_social", "uf")
+CAMPOS_INDICADORES = ("total_valor", "media_valor", "anos_ativos", "qtd_registros")
+
+
+SQL_BUSCAR_OPERADORA = f"""
+        SELECT{COLUNAS_OPERADORA}
+        FROM dados_cadastrais d
+        WHERE d.cnpj = %s;
+    """
+
+
+def buscar_operadora_por_cnpj(cur, cnpj):
+    executar_preparada(cur, "buscar_operadora_por_cnpj", SQL_BUSCAR_OPERADORA, (cnpj,))
     return cur.fetchone()
 
 
-def contar_despesas(cur, cnpj):
-    cnpj_limpo = "".join(filter(str.isdigit, cnpj)).zfill(14)
-    cur.execute("""
-        SELECT COUNT(*)
-        FROM consolidado_despesas
-        WHERE cnpj = %s;
-    """, (cnpj_limpo,))
-    return cur.fetchone()[0]
+def sql_buscar_operadoras_por_cnpjs(cnpjs, incluir_indicadores=False):
+    # Resolve vários CNPJs de uma vez; com indicadores, as 4 últimas colunas vêm do rollup
+    colunas_indicadores = ""
+    join_indicadores = ""
+    if incluir_indicadores:
+        colunas_indicadores = """,
+            COALESCE(i.total_valor, 0),
+            COALESCE(i.media_valor, 0),
+            COALESCE(i.anos_ativos, 0),
+            COALESCE(i.qtd_registros, 0)"""
+        join_indicadores = "LEFT JOIN rollup_indicadores_operadora i ON i.cnpj = d.cnpj"
 
+    return f"""
+        SELECT{COLUNAS_OPERADORA}{colunas_indicadores}
+        FROM dados_cadastrais d
+        {join_indicadores}
+        WHERE d.cnpj = ANY(%s);
+    """, (list(cnpjs),)
 
-def listar_despesas(cur, cnpj_limpo, limit, offset):
-    cnpj_formatado = cnpj_limpo.zfill(14) 
-    
-    cur.execute("""
-        SELECT ano, trimestre, valor_despesas
-        FROM consolidado_despesas
-        WHERE cnpj = %s
-        ORDER BY ano DESC, trimestre DESC
-        LIMIT %s OFFSET %s;
-    """, (cnpj_formatado, limit, offset))
+
+def buscar_operadoras_por_cnpjs(cur, cnpjs, incluir_indicadores=False):
+    executar_preparada(
+        cur, "buscar_operadoras_por_cnpjs", *sql_buscar_operadoras_por_cnpjs(cnpjs, incluir_indicadores)
+    )
     return cur.fetchall()
 
-def obter_indicadores_financeiros(cur, cnpj_limpo):
-    query = """
-        SELECT 
-            COALESCE(SUM(valor_despesas), 0), 
-            COALESCE(AVG(valor_despesas), 0),
-            COUNT(DISTINCT ano)
-        FROM consolidado_despesas 
-        WHERE cnpj = %s
+
+def sql_listar_despesas_com_indicadores(cnpj_limpo, limit, offset=0, apos=None):
+    """Página de despesas, total de registros e indicadores da operadora em uma só consulta.
+
+    Os indicadores (e o total usado na paginação) vêm do rollup por CNPJ; a página sai do
+    índice idx_despesas_cnpj_periodo, por OFFSET ou a partir do cursor
+    (ano, trimestre, id_despesa) em ``apos``.
     """
-    cur.execute(query, (cnpj_limpo,))
-    res = cur.fetchone()
-    
-    return {
-        "total_valor": float(res[0]),
-        "media_valor": float(res[1]),
-        "anos_ativos": int(res[2])
-    }
\ No newline at end of file
+    cnpj_formatado = cnpj_limpo.zfill(14)
+    filtro_cursor = ""
+    params_cursor = []
+
+    if apos is not None:
+        filtro_cursor = "AND (ano, trimestre, id_despesa) < (%s, %s, %s)"
+        params_cursor = list(apos)
+
+    # O LEFT JOIN a partir de uma linha fixa garante os indicadores mesmo com página vazia
+    return f"""
+        SELECT
+            COALESCE(i.total_valor, 0),
+            COALESCE(i.media_valor, 0),
+            COALESCE(i.anos_ativos, 0),
+            COALESCE(i.qtd_registros, 0),
+            p.ano,
+            p.trimestre,
+            COALESCE(p.valor_despesas, 0),
+            p.id_despesa
+        FROM (SELECT 1) AS base
+        LEFT JOIN rollup_indicadores_operadora i ON i.cnpj = %s
+        LEFT JOIN LATERAL (
+            SELECT ano, trimestre, valor_despesas, id_despesa
+            FROM consolidado_despesas
+            WHERE cnpj = %s {filtro_cursor}
+            ORDER BY ano DESC, trimestre DESC, id_despesa DESC
+            LIMIT %s OFFSET %s
+        ) p ON true
+        ORDER BY p.ano DESC, p.trimestre DESC, p.id_despesa DESC;
+    """, (cnpj_formatado, cnpj_formatado, *params_cursor, limit, offset)
+
+
+def separar_despesas_com_indicadores(rows):
+    # Retorna (indicadores, linhas da página) a partir do resultado da consulta combinada
+    return indicadores_de_linha(rows[0][:4]), [r[4:] for r in rows if r[4] is not None]
+
+
+def listar_despesas_com_indicadores(cur, cnpj_limpo, limit, offset=0, apos=None):
+    executar_preparada(
+        cur, "listar_despesas_com_indicadores", *sql_listar_despesas_com_indicadores(cnpj_limpo, limit, offset, apos)
+    )
+    return separar_despesas_com_indicadores(cur.fetchall())
+
+
+# Colunas da série trimestral; os totais de referência (trimestre anterior e mesmo
+# trimestre do ano anterior) viram variações em montar_serie
+CAMPOS_SERIE = (
+    "ano", "trimestre", "total", "qtd_registros", "total_trimestre_anterior", "total_ano_anterior", "media_movel"
+)
+
+
+def sql_serie_trimestral(cnpj_limpo, janela_media=1):
+    """Um ponto por trimestre do rollup rollup_despesas_trimestrais (supabase/05_rollups.sql).
+
+    O trimestre anterior só conta se for o imediatamente anterior (LAG com checagem de
+    adjacência, sem inventar ponto em lacunas); o ano anterior é lookup pela chave primária.
+    A média móvel usa os últimos ``janela_media`` trimestres com dados.
+    """
+    return """
+        SELECT
+            s.ano,
+            s.trimestre,
+            s.total,
+            s.qtd_registros,
+            CASE
+                WHEN LAG(s.ano * 4 + s.trimestre) OVER w = s.ano * 4 + s.trimestre - 1
+                THEN LAG(s.total) OVER w
+            END,
+            a.total,
+            AVG(s.total) OVER (w ROWS BETWEEN %s PRECEDING AND CURRENT ROW)
+        FROM rollup_despesas_trimestrais s
+        LEFT JOIN rollup_despesas_trimestrais a
+            ON a.cnpj = s.cnpj AND a.ano = s.ano - 1 AND a.trimestre = s.trimestre
+        WHERE s.cnpj = %s
+        WINDOW w AS (ORDER BY s.ano, s.trimestre)
+        ORDER BY s.ano, s.trimestre;
+    """, (max(janela_media, 1) - 1, cnpj_limpo.zfill(14))
+
+
+def obter_serie_trimestral(cur, cnpj_limpo, janela_media=1):
+    executar_preparada(cur, "obter_serie_trimestral", *sql_serie_trimestral(cnpj_limpo, janela_media))
+    return cur.fetchall()
+
+
+def indicadores_de_linha(res):
+    # NUMERIC já chega como float (DEC2FLOAT em db.py / FloatLoader em db_async.py)
+    return dict(zip(CAMPOS_INDICADORES, res or (0, 0, 0, 0)))
+
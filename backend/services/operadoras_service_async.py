@@ -0,0 +1,39 @@
+from db_async import consultar
+from services import operadoras_service
+
+# Versões assíncronas das consultas de operadoras_service; o SQL é o mesmo (funções sql_*)
+
+
+async def contar_operadoras(search_term=None):
+    row = await consultar(*operadoras_service.sql_contar_operadoras(search_term), um=True)
+    return row[0]
+
+
+async def estimar_operadoras():
+    row = await consultar(operadoras_service.SQL_ESTIMAR_OPERADORAS, um=True)
+    return operadoras_service.estimativa_valida(row)
+
+
+async def listar_operadoras(limit, offset, search_term=None):
+    return await consultar(*operadoras_service.sql_listar_operadoras(limit, offset, search_term))
+
+
+async def listar_operadoras_keyset(limit, apos=None, search_term=None):
+    return await consultar(*operadoras_service.sql_listar_operadoras_keyset(limit, apos, search_term))
+
+
+async def buscar_operadora_por_cnpj(cnpj):
+    return await consultar(operadoras_service.SQL_BUSCAR_OPERADORA, (cnpj,), um=True)
+
+
+async def buscar_operadoras_por_cnpjs(cnpjs, incluir_indicadores=False):
+    return await consultar(*operadoras_service.sql_buscar_operadoras_por_cnpjs(cnpjs, incluir_indicadores))
+
+
+async def listar_despesas_com_indicadores(cnpj_limpo, limit, offset=0, apos=None):
+    rows = await consultar(*operadoras_service.sql_listar_despesas_com_indicadores(cnpj_limpo, limit, offset, apos))
+    return operadoras_service.separar_despesas_com_indicadores(rows)
+
+
+async def obter_serie_trimestral(cnpj_limpo, janela_media=1):
+    return await consultar(*operadoras_service.sql_serie_trimestral(cnpj_limpo, janela_media))
@@ -0,0 +1,49 @@
+from utils.metricas import nomear_consulta
+
+# Respondido a partir do rollup_cubo_despesas (supabase/05_rollups.sql): qualquer recorte
+# agrega algumas centenas de linhas em vez de varrer consolidado_despesas
+
+DIMENSOES = ("uf", "modalidade", "ano", "trimestre")
+
+# Colunas de cada linha: dimensões agrupadas, depois as métricas (também os critérios de ordenação)
+CAMPOS_METRICAS = ("total", "qtd_registros", "media")
+
+
+def sql_ranking(agrupar_por, filtros, ordenar_por="total", ordem="desc", top=10):
+    """Monta o SELECT do ranking. Retorna (query, params).
+
+    ``agrupar_por`` e ``ordenar_por`` vêm validados do controller (só nomes de DIMENSOES e
+    CAMPOS_METRICAS entram no texto da consulta); ``filtros`` mapeia dimensão -> lista de valores.
+    A última coluna é o número de grupos antes do LIMIT.
+    """
+    where, params = [], []
+    for dimensao in DIMENSOES:
+        if filtros.get(dimensao):
+            where.append(f"{dimensao} = ANY(%s)")
+            params.append(list(filtros[dimensao]))
+
+    colunas = ", ".join(agrupar_por)
+    direcao = "ASC" if ordem == "asc" else "DESC"
+    desempate = "".join(f", {d}" for d in agrupar_por)
+
+    query = f"""
+        SELECT
+            {colunas + "," if colunas else ""}
+            COALESCE(SUM(total), 0) AS total,
+            COALESCE(SUM(qtd_registros), 0)::BIGINT AS qtd_registros,
+            COALESCE(SUM(total) / NULLIF(SUM(qtd_registros), 0), 0) AS media,
+            COUNT(*) OVER () AS grupos
+        FROM rollup_cubo_despesas
+        {"WHERE " + " AND ".join(where) if where else ""}
+        {"GROUP BY " + colunas if colunas else ""}
+        ORDER BY {ordenar_por} {direcao} NULLS LAST{desempate}
+        LIMIT %s;
+    """
+    return query, params + [top]
+
+
+def obter_ranking(cur, agrupar_por, filtros, ordenar_por="total", ordem="desc", top=10):
+    query, params = sql_ranking(agrupar_por, filtros, ordenar_por, ordem, top)
+    with nomear_consulta("ranking"):
+        cur.execute(query, params)
+        return cur.fetchall()
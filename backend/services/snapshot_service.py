@@ -0,0 +1,506 @@
+import array
+import bisect
+import csv
+import datetime
+import decimal
+import io
+import logging
+import math
+import os
+import re
+import threading
+import time
+import unicodedata
+import zipfile
+
+# Modo snapshot: a API responde a partir dos arquivos do pipeline carregados em memória,
+# sem nenhuma consulta ao Postgres (deploys somente leitura)
+SNAPSHOT_MODE = os.getenv("SNAPSHOT_MODE", "0") == "1"
+
+PROJETO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR", os.path.join(PROJETO_ROOT, "arquivos_csv_zips"))
+
+# Mesma ordem de COLUNAS_OPERADORA (services/operadoras_service.py)
+CAMPOS_OPERADORA = [
+    "cnpj", "registro_operadora", "razao_social", "nome_fantasia", "modalidade", "logradouro", "numero",
+    "complemento", "bairro", "cidade", "uf", "cep", "ddd", "telefone", "fax", "endereco_eletronico",
+    "representante", "cargo_representante", "regiao_de_comercializacao", "data_registro_ans",
+]
+
+_UF = re.compile(r"[A-Z]{2}")
+_ANO = re.compile(r"\d{4}")
+
+_snapshot = None
+_lock_recarga = threading.Lock()
+
+
+def ativo():
+    return SNAPSHOT_MODE
+
+
+def normalizar_busca(texto):
+    # Equivalente ao f_normalizar_busca do banco: sem acentos e em minúsculas
+    decomposto = unicodedata.normalize("NFKD", texto)
+    return "".join(c for c in decomposto if not unicodedata.combining(c)).lower()
+
+
+def _trigramas(texto):
+    # Mesmo recorte do pg_trgm: palavras alfanuméricas com "  " antes e " " depois
+    trigramas = set()
+    for palavra in re.findall(r"\w+", texto):
+        palavra = f"  {palavra} "
+        trigramas.update(palavra[i:i + 3] for i in range(len(palavra) - 2))
+    return trigramas
+
+
+def similaridade(a, b):
+    ta, tb = _trigramas(a), _trigramas(b)
+    if not ta or not tb:
+        return 0.0
+    return len(ta & tb) / len(ta | tb)
+
+
+# ---- Leitura dos arquivos do pipeline ----
+
+def _vazio_para_none(valor):
+    valor = (valor or "").strip()
+    return valor or None
+
+
+def _data(valor):
+    valor = (valor or "").strip()
+    try:
+        if re.fullmatch(r"\d{4}-\d{2}-\d{2}", valor):
+            return datetime.date.fromisoformat(valor)
+        if re.fullmatch(r"\d{2}/\d{2}/\d{4}", valor):
+            return datetime.datetime.strptime(valor, "%d/%m/%Y").date()
+    except ValueError:
+        pass
+    return None
+
+
+def _valor(texto):
+    # Mesma conversão do 03_validacoes.sql (ponto decimal; com vírgula, padrão brasileiro
+    # "1.234,56") e o mesmo arredondamento do DECIMAL(15,2): os números batem com o banco
+    texto = texto or ""
+    if "," in texto:
+        texto = re.sub(r"[^0-9,]", "", texto).replace(",", ".")
+    else:
+        texto = re.sub(r"[^0-9.]", "", texto)
+    if not texto:
+        return None
+    try:
+        return float(decimal.Decimal(texto).quantize(decimal.Decimal("0.01"), rounding=decimal.ROUND_HALF_UP))
+    except decimal.InvalidOperation:
+        return None
+
+
+def _abrir_csv(pasta, nome_csv):
+    # Lê o CSV solto ou, se não existir, o de mesmo nome dentro de um .zip da pasta
+    caminho = os.path.join(pasta, nome_csv)
+    if os.path.exists(caminho):
+        return open(caminho, "r", encoding="utf-8-sig", newline="")
+
+    for nome_zip in sorted(os.listdir(pasta)) if os.path.isdir(pasta) else []:
+        if nome_zip.lower().endswith(".zip"):
+            with zipfile.ZipFile(os.path.join(pasta, nome_zip)) as z:
+                if nome_csv in z.namelist():
+                    return io.TextIOWrapper(io.BytesIO(z.read(nome_csv)), encoding="utf-8-sig", newline="")
+
+    raise FileNotFoundError(f"{nome_csv} não encontrado em {pasta}")
+
+
+def _ler_cadastrais(diretorio):
+    # Mesmas regras do 03_validacoes.sql: CNPJ com 14 dígitos e UF válida
+    operadoras = {}
+    with _abrir_csv(os.path.join(diretorio, "dados_cadastrais"), "Relatorio_cadop.csv") as f:
+        leitor = csv.DictReader(f, delimiter=";")
+        leitor.fieldnames = [c.strip().lower() for c in leitor.fieldnames]
+
+        for linha in leitor:
+            cnpj = re.sub(r"\D", "", linha.get("cnpj") or "").zfill(14)
+            uf = (linha.get("uf") or "").strip()
+            if len(cnpj) != 14 or not _UF.fullmatch(uf) or cnpj in operadoras:
+                continue
+
+            registro = {campo: _vazio_para_none(linha.get(campo)) for campo in CAMPOS_OPERADORA}
+            registro["cnpj"] = cnpj
+            registro["data_registro_ans"] = _data(linha.get("data_registro_ans"))
+            operadoras[cnpj] = registro
+
+    return operadoras
+
+
+def _ler_despesas(diretorio):
+    # Retorna {cnpj: [(ano, trimestre, id_despesa, valor, razao_social), ...]};
+    # o id segue a ordem do arquivo, como o SERIAL da carga no banco
+    por_cnpj = {}
+    razoes = {}  # reaproveita a mesma string para as linhas da mesma operadora
+    id_despesa = 0
+
+    with _abrir_csv(os.path.join(diretorio, "consolidado_despesas"), "consolidado_despesas.csv") as f:
+        leitor = csv.DictReader(f, delimiter=";")
+        for linha in leitor:
+            ano = (linha.get("Ano") or "").strip()
+            trimestre = (linha.get("Trimestre") or "").strip()
+            if not _ANO.fullmatch(ano) or trimestre not in ("1", "2", "3", "4"):
+                continue
+
+            id_despesa += 1
+            cnpj = re.sub(r"\D", "", linha.get("CNPJ") or "")
+            razao = _vazio_para_none(linha.get("RazaoSocial"))
+            razao = razoes.setdefault(razao, razao)
+            por_cnpj.setdefault(cnpj, []).append(
+                (int(ano), int(trimestre), id_despesa, _valor(linha.get("ValorDespesas")), razao)
+            )
+
+    return por_cnpj
+
+
+class Snapshot:
+    """Dados da API em memória, montados uma vez e só lidos depois (sem locks na leitura).
+
+    Operadoras ficam em colunas (uma lista por campo) ordenadas por CNPJ, com índice hash
+    por CNPJ e índices ordenados por razão social; as despesas ficam em arrays agrupados
+    por CNPJ na ordem da API (ano, trimestre, id decrescentes), então cada página é uma fatia.
+    """
+
+    def __init__(self, operadoras, despesas_por_cnpj, origem):
+        inicio = time.perf_counter()
+        self.origem = origem
+        self.carregado_em = datetime.datetime.now(datetime.timezone.utc)
+
+        # Operadoras (colunar)
+        self.cnpjs = sorted(operadoras)
+        self.colunas = {campo: [operadoras[c][campo] for c in self.cnpjs] for campo in CAMPOS_OPERADORA}
+        self.indice_cnpj = {c: i for i, c in enumerate(self.cnpjs)}
+        razoes = self.colunas["razao_social"]
+        self.razao_normalizada = [normalizar_busca(r) if r else "" for r in razoes]
+
+        # ORDER BY razao_social (NULLs por último, como no Postgres) e a chave do cursor
+        self.ordem_razao = sorted(range(len(self.cnpjs)), key=lambda i: (razoes[i] is None, razoes[i] or ""))
+        self.posicao_razao = array.array("L", [0]) * len(self.cnpjs)
+        for posicao, i in enumerate(self.ordem_razao):
+            self.posicao_razao[i] = posicao
+        self.ordem_keyset = sorted(range(len(self.cnpjs)), key=lambda i: (razoes[i] or "", self.cnpjs[i]))
+        self.chaves_keyset = [(razoes[i] or "", self.cnpjs[i]) for i in self.ordem_keyset]
+
+        # Despesas (colunar, agrupadas por CNPJ) e agregados pré-calculados
+        self.ano = array.array("H")
+        self.trimestre = array.array("B")
+        self.id_despesa = array.array("L")
+        self.valor = array.array("d")
+        self.razao_despesa = []
+        self.faixa_despesa = array.array("L")  # linha -> posição do CNPJ em cnpjs_despesas
+        self.cnpjs_despesas = sorted(despesas_por_cnpj)
+        self.faixas = {}  # cnpj -> (início, fim) nos arrays de despesas
+        self.indicadores = {}  # cnpj -> (total, média, anos ativos, qtd registros)
+        self.series = {}  # cnpj -> [(ano, trimestre, total, qtd registros)] em ordem crescente
+        self.cubo = {}  # (uf, modalidade, ano, trimestre) -> [total, qtd registros], como rollup_cubo_despesas
+
+        soma_global, n_valores, n_global = 0.0, 0, 0
+        por_razao = {}
+        por_uf = {}
+
+        for posicao_cnpj, cnpj in enumerate(self.cnpjs_despesas):
+            linhas = despesas_por_cnpj[cnpj]
+            linhas.sort(key=lambda r: (r[0], r[1], r[2]), reverse=True)
+
+            inicio_faixa = len(self.ano)
+            valores = [r[3] for r in linhas if r[3] is not None]
+            i = self.indice_cnpj.get(cnpj)
+            uf = self.colunas["uf"][i] if i is not None else "NAO_INFORMADO"
+            modalidade = (self.colunas["modalidade"][i] if i is not None else None) or "NAO_INFORMADO"
+            for ano, trimestre, id_despesa, valor, razao in linhas:
+                celula = self.cubo.setdefault((uf, modalidade, ano, trimestre), [0.0, 0])
+                celula[0] += valor or 0.0
+                celula[1] += 1
+                self.ano.append(ano)
+                self.trimestre.append(trimestre)
+                self.id_despesa.append(id_despesa)
+                self.valor.append(math.nan if valor is None else valor)
+                self.razao_despesa.append(razao)
+                self.faixa_despesa.append(posicao_cnpj)
+                if valor is not None:
+                    por_razao[razao] = por_razao.get(razao, 0.0) + valor
+            self.faixas[cnpj] = (inicio_faixa, len(self.ano))
+
+            total = math.fsum(valores)
+            soma_global += total
+            n_valores += len(valores)
+            n_global += len(linhas)
+
+            if cnpj:
+                self.indicadores[cnpj] = (
+                    total,
+                    total / len(valores) if valores else 0.0,
+                    len({r[0] for r in linhas}),
+                    len(linhas),
+                )
+                por_trimestre = {}
+                for ano, trimestre, _, valor, _ in linhas:
+                    total_trimestre, qtd = por_trimestre.get((ano, trimestre), (0.0, 0))
+                    por_trimestre[(ano, trimestre)] = (total_trimestre + (valor or 0.0), qtd + 1)
+                self.series[cnpj] = [(a, t, total_t, qtd) for (a, t), (total_t, qtd) in sorted(por_trimestre.items())]
+
+                if i is not None and valores:
+                    por_uf[uf] = por_uf.get(uf, 0.0) + total
+
+        # Mesmas consultas do 05_rollups.sql
+        self.totais = (soma_global if n_valores else None, soma_global / n_valores if n_valores else None)
+        self.top_operadoras = sorted(por_razao.items(), key=lambda kv: (-kv[1], kv[0] or ""))[:5]
+        self.despesas_por_uf = sorted(por_uf.items(), key=lambda kv: -kv[1])
+        self.qtd_despesas = n_global
+
+        # Linhas em ORDER BY id_despesa (export): os ids são 1..n na ordem do arquivo
+        self.ordem_id = array.array("L", [0]) * len(self.id_despesa)
+        for j, id_despesa in enumerate(self.id_despesa):
+            self.ordem_id[id_despesa - 1] = j
+
+        self.duracao_indexacao_s = time.perf_counter() - inicio
+
+    # ---- Operadoras ----
+
+    def _linha_operadora(self, i):
+        return tuple(self.colunas[campo][i] for campo in CAMPOS_OPERADORA)
+
+    def _filtrar(self, search_term):
+        """Índices das operadoras que casam com a busca, na ordem do ORDER BY da listagem.
+
+        Mesmas regras de _filtro_busca (services/operadoras_service.py): só dígitos busca
+        prefixo de CNPJ (bisect no array ordenado); o resto busca substring normalizada e
+        ordena por similaridade de trigramas e depois razão social.
+        """
+        termo = (search_term or "").strip()
+        if not termo:
+            return self.ordem_razao
+
+        if re.fullmatch(r"[\d./\-\s]+", termo) and re.search(r"\d", termo):
+            digitos = re.sub(r"\D", "", termo)
+            inicio = bisect.bisect_left(self.cnpjs, digitos)
+            fim = bisect.bisect_left(self.cnpjs, digitos + "\uffff")
+            return sorted(range(inicio, fim), key=lambda i: self.posicao_razao[i])
+
+        normalizado = normalizar_busca(termo)
+        encontrados = [i for i, r in enumerate(self.razao_normalizada) if normalizado in r]
+        return sorted(
+            encontrados,
+            key=lambda i: (-similaridade(self.razao_normalizada[i], normalizado), self.posicao_razao[i])
+        )
+
+    def contar_operadoras(self, search_term=None):
+        return len(self._filtrar(search_term))
+
+    def listar_operadoras(self, limit, offset, search_term=None):
+        razoes, ufs = self.colunas["razao_social"], self.colunas["uf"]
+        return [(self.cnpjs[i], razoes[i], ufs[i]) for i in self._filtrar(search_term)[offset:offset + limit]]
+
+    def listar_operadoras_keyset(self, limit, apos=None, search_term=None):
+        razoes, ufs = self.colunas["razao_social"], self.colunas["uf"]
+
+        if (search_term or "").strip():
+            chaves = sorted((razoes[i] or "", self.cnpjs[i], i) for i in self._filtrar(search_term))
+            if apos is not None:
+                chaves = chaves[bisect.bisect_right(chaves, (apos[0], apos[1], math.inf)):]
+            indices = [i for _, _, i in chaves[:limit]]
+        else:
+            inicio = bisect.bisect_right(self.chaves_keyset, tuple(apos)) if apos is not None else 0
+            indices = self.ordem_keyset[inicio:inicio + limit]
+
+        return [(self.cnpjs[i], razoes[i], ufs[i], razoes[i] or "") for i in indices]
+
+    def buscar_operadora_por_cnpj(self, cnpj):
+        i = self.indice_cnpj.get(cnpj)
+        return None if i is None else self._linha_operadora(i)
+
+    def buscar_operadoras_por_cnpjs(self, cnpjs, incluir_indicadores=False):
+        rows = []
+        for cnpj in cnpjs:
+            i = self.indice_cnpj.get(cnpj)
+            if i is None:
+                continue
+            row = self._linha_operadora(i)
+            if incluir_indicadores:
+                row += self.indicadores.get(cnpj, (0, 0, 0, 0))
+            rows.append(row)
+        return rows
+
+    # ---- Despesas ----
+
+    def _linha_despesa(self, j):
+        valor = self.valor[j]
+        return (self.ano[j], self.trimestre[j], None if math.isnan(valor) else valor, self.id_despesa[j])
+
+    def listar_despesas_com_indicadores(self, cnpj_limpo, limit, offset=0, apos=None):
+        # Mesmo retorno de operadoras_service.listar_despesas_com_indicadores
+        cnpj = cnpj_limpo.zfill(14)
+        inicio, fim = self.faixas.get(cnpj, (0, 0))
+
+        if apos is not None:
+            # Faixa em ordem decrescente: avança até a primeira chave menor que o cursor
+            apos = tuple(apos)
+            while inicio < fim and (self.ano[inicio], self.trimestre[inicio], self.id_despesa[inicio]) >= apos:
+                inicio += 1
+
+        inicio = min(inicio + offset, fim)
+        # Valor ausente sai como 0, como o COALESCE da consulta no banco
+        rows = [
+            (ano, trimestre, valor or 0.0, id_despesa)
+            for ano, trimestre, valor, id_despesa in map(self._linha_despesa, range(inicio, min(inicio + limit, fim)))
+        ]
+
+        total, media, anos_ativos, qtd = self.indicadores.get(cnpj, (0, 0, 0, 0))
+        indicadores = {"total_valor": total, "media_valor": media, "anos_ativos": anos_ativos, "qtd_registros": qtd}
+        return indicadores, rows
+
+    def obter_serie_trimestral(self, cnpj_limpo, janela_media=1):
+        # Mesmas colunas de operadoras_service.sql_serie_trimestral
+        pontos = self.series.get(cnpj_limpo.zfill(14), [])
+        totais = {(ano, trimestre): total for ano, trimestre, total, _ in pontos}
+        janela = max(janela_media, 1)
+
+        rows = []
+        for k, (ano, trimestre, total, qtd) in enumerate(pontos):
+            anterior = None
+            if k and pontos[k - 1][0] * 4 + pontos[k - 1][1] == ano * 4 + trimestre - 1:
+                anterior = pontos[k - 1][2]
+            ultimos = [p[2] for p in pontos[max(k - janela + 1, 0):k + 1]]
+            rows.append(
+                (ano, trimestre, total, qtd, anterior, totais.get((ano - 1, trimestre)), sum(ultimos) / len(ultimos))
+            )
+        return rows
+
+    # ---- Estatísticas ----
+
+    def consultas_estatisticas(self):
+        # (totais, top 5, por UF) no formato esperado por montar_estatisticas
+        return self.totais, self.top_operadoras, self.despesas_por_uf
+
+    # ---- Ranking ----
+
+    def obter_ranking(self, agrupar_por, filtros, ordenar_por="total", ordem="desc", top=10):
+        # Mesmas colunas de ranking_service.sql_ranking, agregando self.cubo
+        dimensoes = ("uf", "modalidade", "ano", "trimestre")
+        posicoes = [dimensoes.index(d) for d in agrupar_por]
+
+        grupos = {}
+        for chave, (total, qtd) in self.cubo.items():
+            if any(filtros.get(d) and chave[k] not in filtros[d] for k, d in enumerate(dimensoes)):
+                continue
+            grupo = grupos.setdefault(tuple(chave[k] for k in posicoes), [0.0, 0])
+            grupo[0] += total
+            grupo[1] += qtd
+
+        if not agrupar_por and not grupos:
+            grupos[()] = [0.0, 0]
+
+        rows = [(*grupo, total, qtd, total / qtd if qtd else 0.0) for grupo, (total, qtd) in grupos.items()]
+        metrica = len(agrupar_por) + ("total", "qtd_registros", "media").index(ordenar_por)
+        rows.sort(key=lambda r: r[:len(agrupar_por)])
+        rows.sort(key=lambda r: r[metrica], reverse=ordem != "asc")
+        return [(*r, len(rows)) for r in rows[:top]]
+
+    # ---- Export ----
+
+    def exportar_despesas(self, filtros, tamanho):
+        # Linhas na ordem de COLUNAS_EXPORT_DESPESAS, em ORDER BY id_despesa como no banco
+        if filtros.get("cnpj"):
+            inicio, fim = self.faixas.get(filtros["cnpj"], (0, 0))
+            linhas = sorted(range(inicio, fim), key=self.id_despesa.__getitem__)
+        else:
+            linhas = self.ordem_id
+        lote = []
+
+        for j in linhas:
+            if filtros.get("ano") is not None and self.ano[j] != filtros["ano"]:
+                continue
+            if filtros.get("trimestre") is not None and self.trimestre[j] != filtros["trimestre"]:
+                continue
+            cnpj = self.cnpjs_despesas[self.faixa_despesa[j]]
+            i = self.indice_cnpj.get(cnpj)
+            uf = self.colunas["uf"][i] if i is not None else None
+            if filtros.get("uf") and uf != filtros["uf"]:
+                continue
+
+            ano, trimestre, valor, id_despesa = self._linha_despesa(j)
+            # Decimal com duas casas, como o DECIMAL(15,2) que o export do banco entrega
+            valor = None if valor is None else decimal.Decimal(f"{valor:.2f}")
+            lote.append((id_despesa, cnpj, self.razao_despesa[j], uf, ano, trimestre, valor))
+            if len(lote) >= tamanho:
+                yield lote
+                lote = []
+
+        if lote:
+            yield lote
+
+    def exportar_operadoras(self, filtros, tamanho):
+        lote = []
+        for i, cnpj in enumerate(self.cnpjs):
+            if filtros.get("cnpj") and cnpj != filtros["cnpj"]:
+                continue
+            if filtros.get("uf") and self.colunas["uf"][i] != filtros["uf"]:
+                continue
+            if filtros.get("ano") is not None or filtros.get("trimestre") is not None:
+                inicio, fim = self.faixas.get(cnpj, (0, 0))
+                if not any(
+                    (filtros.get("ano") is None or self.ano[j] == filtros["ano"])
+                    and (filtros.get("trimestre") is None or self.trimestre[j] == filtros["trimestre"])
+                    for j in range(inicio, fim)
+                ):
+                    continue
+
+            lote.append(self._linha_operadora(i))
+            if len(lote) >= tamanho:
+                yield lote
+                lote = []
+
+        if lote:
+            yield lote
+
+    def resumo(self):
+        return {
+            "origem": self.origem,
+            "carregado_em": self.carregado_em.isoformat(),
+            "operadoras": len(self.cnpjs),
+            "despesas": self.qtd_despesas,
+            "indexacao_s": round(self.duracao_indexacao_s, 3),
+        }
+
+
+def carregar_snapshot(diretorio=None):
+    diretorio = diretorio or SNAPSHOT_DIR
+    inicio = time.perf_counter()
+    snapshot = Snapshot(_ler_cadastrais(diretorio), _ler_despesas(diretorio), diretorio)
+    logging.info(
+        "Snapshot carregado de %s em %.1fs (%d operadoras, %d despesas)",
+        diretorio, time.perf_counter() - inicio, len(snapshot.cnpjs), snapshot.qtd_despesas
+    )
+    return snapshot
+
+
+def atual():
+    # Carrega na primeira chamada; depois só lê a referência (troca atômica em recarregar)
+    snapshot = _snapshot
+    if snapshot is None:
+        with _lock_recarga:
+            if _snapshot is None:
+                _trocar(carregar_snapshot())
+        snapshot = _snapshot
+    return snapshot
+
+
+def _trocar(novo):
+    global _snapshot
+    _snapshot = novo
+
+
+def recarregar(diretorio=None):
+    """Monta um snapshot novo por completo e só então troca a referência.
+
+    Requisições em andamento terminam no snapshot antigo; se a carga falhar, o atual
+    continua servindo. Recargas simultâneas são serializadas.
+    """
+    with _lock_recarga:
+        novo = carregar_snapshot(diretorio)
+        _trocar(novo)
+    return novo
@@ -0,0 +1,43 @@
+import gzip
+import os
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # br é opcional; sem o pacote, só gzip
+    brotli = None
+
+# Respostas menores que isso não compensam o custo de comprimir
+COMPRESSAO_MIN_BYTES = int(os.getenv("COMPRESSAO_MIN_BYTES", 1024))
+TIPOS_COMPRIMIVEIS = ("application/json", "text/csv", "text/plain")
+
+
+def _comprimir_resposta(resposta):
+    if (
+        resposta.status_code != 200
+        or resposta.direct_passthrough
+        or resposta.is_streamed
+        or "Content-Encoding" in resposta.headers
+        or resposta.mimetype not in TIPOS_COMPRIMIVEIS
+    ):
+        return resposta
+
+    resposta.vary.add("Accept-Encoding")
+    corpo = resposta.get_data()
+    if len(corpo) < COMPRESSAO_MIN_BYTES:
+        return resposta
+
+    aceitas = request.accept_encodings
+    if brotli is not None and aceitas["br"]:
+        resposta.set_data(brotli.compress(corpo, quality=5))
+        resposta.headers["Content-Encoding"] = "br"
+    elif aceitas["gzip"]:
+        resposta.set_data(gzip.compress(corpo, compresslevel=6))
+        resposta.headers["Content-Encoding"] = "gzip"
+
+    return resposta
+
+
+def registrar_compressao(app):
+    app.after_request(_comprimir_resposta)
@@ -0,0 +1,41 @@
+import base64
+import json
+
+# Tipos de cada posição do cursor, na ordem da chave do keyset
+CURSOR_OPERADORAS = (str, str)  # (razao_social, cnpj)
+CURSOR_DESPESAS = (int, int, int)  # (ano, trimestre, id_despesa)
+
+# Colunas INT do Postgres: fora da faixa o banco recusaria o parâmetro
+_INT_MIN, _INT_MAX = -2**31, 2**31 - 1
+
+
+def codificar_cursor(valores):
+    # Cursor opaco para o cliente: JSON da chave da última linha em base64 url-safe
+    bruto = json.dumps(list(valores), separators=(",", ":"), default=str)
+    return base64.urlsafe_b64encode(bruto.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _valor_valido(valor, tipo):
+    if tipo is int:
+        # bool é subclasse de int no Python, mas não é uma chave válida
+        return type(valor) is int and _INT_MIN <= valor <= _INT_MAX
+    return isinstance(valor, tipo)
+
+
+def decodificar_cursor(cursor, tipos):
+    # Retorna None para cursor vazio (primeira página); ValueError se o cursor for inválido
+    if not cursor:
+        return None
+
+    try:
+        preenchimento = "=" * (-len(cursor) % 4)
+        valores = json.loads(base64.urlsafe_b64decode(cursor + preenchimento).decode("utf-8"))
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("Cursor inválido")
+
+    if not isinstance(valores, list) or len(valores) != len(tipos):
+        raise ValueError("Cursor inválido")
+    if not all(_valor_valido(v, t) for v, t in zip(valores, tipos)):
+        raise ValueError("Cursor inválido")
+
+    return valores
@@ -0,0 +1,83 @@
+import functools
+import hashlib
+import os
+
+import psycopg2
+from flask import make_response, request
+
+from cache.cache_lru import criar_cache
+from db import get_db_connection
+from services import snapshot_service
+
+# Por quanto tempo (s) a versão dos dados lida do banco é reaproveitada
+VERSAO_DADOS_TTL = int(os.getenv("VERSAO_DADOS_TTL", 30))
+
+versao_cache = criar_cache("versao_dados", max_itens=1, ttl=VERSAO_DADOS_TTL)
+
+
+def _consultar_versao():
+    # Sem a tabela (banco carregado antes dela existir) as rotas seguem sem ETag
+    try:
+        with get_db_connection() as conn, conn.cursor() as cur:
+            cur.execute("SELECT carregado_em FROM versao_dados WHERE id = 1;")
+            row = cur.fetchone()
+    except psycopg2.Error:
+        return None
+    return row[0] if row else None
+
+
+def versao_dados():
+    # Momento da última carga do processar_sql.py (supabase/06_versao_dados.sql)
+    if snapshot_service.ativo():
+        return snapshot_service.atual().carregado_em
+    return versao_cache.obter_ou_calcular("versao", _consultar_versao)
+
+
+def condicional(nome, cache_control="no-cache", chave_extra=None):
+    """Requisições condicionais (ETag/Last-Modified) atreladas à versão dos dados.
+
+    Se o cliente já tem a versão atual, responde 304 sem chamar a view (sem banco e sem
+    serializar JSON). O Cache-Control de cada rota pode ser trocado pela variável de
+    ambiente CACHE_CONTROL_<NOME>. ``chave_extra`` entra no ETag para rotas cujo conteúdo
+    muda entre cargas (ex: snapshot de estatísticas).
+    """
+    def decorador(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            politica = os.getenv(f"CACHE_CONTROL_{nome.upper()}", cache_control)
+            versao = versao_dados()
+
+            if versao is None:
+                resposta = make_response(view(*args, **kwargs))
+                resposta.headers["Cache-Control"] = politica
+                return resposta
+
+            extra = chave_extra() if chave_extra else ""
+            etag = hashlib.sha1(f"{versao.isoformat()}|{extra}|{request.full_path}".encode("utf-8")).hexdigest()
+            ultima_modificacao = versao.replace(microsecond=0)
+
+            if request.if_none_match:
+                nao_modificado = request.if_none_match.contains_weak(etag)
+            else:
+                # Sem ETag do cliente, usa a data; não vale quando há chave_extra
+                nao_modificado = (
+                    chave_extra is None
+                    and request.if_modified_since is not None
+                    and ultima_modificacao <= request.if_modified_since
+                )
+
+            if nao_modificado:
+                resposta = make_response("", 304)
+            else:
+                resposta = make_response(view(*args, **kwargs))
+                if resposta.status_code != 200:
+                    resposta.headers["Cache-Control"] = "no-store"
+                    return resposta
+
+            # ETag fraco: o corpo pode ser enviado comprimido ou não
+            resposta.set_etag(etag, weak=True)
+            resposta.last_modified = ultima_modificacao
+            resposta.headers["Cache-Control"] = politica
+            return resposta
+        return wrapper
+    return decorador
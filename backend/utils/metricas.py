@@ -0,0 +1,220 @@
+import contextlib
+import logging
+import os
+import sys
+import threading
+import time
+
+from flask import g, request
+from psycopg2 import extensions
+
+# Consultas acima deste tempo (ms) vão para o log; 0 desliga o slow-query log
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", 0))
+
+BUCKETS_PADRAO = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+logger = logging.getLogger("metricas")
+
+_metricas = []
+_coletores = []
+_nome_consulta = threading.local()
+
+
+def _escapar(valor):
+    return str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _formatar_labels(labels):
+    labels = list(labels)
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escapar(v)}"' for k, v in labels) + "}"
+
+
+def _formatar_valor(valor):
+    if valor == float("inf"):
+        return "+Inf"
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+
+class Contador:
+    def __init__(self, nome, ajuda, labels=()):
+        self.nome = nome
+        self.ajuda = ajuda
+        self.labels = tuple(labels)
+        self._valores = {}
+        self._lock = threading.Lock()
+        _metricas.append(self)
+
+    def incrementar(self, valor=1, **labels):
+        chave = tuple(labels[l] for l in self.labels)
+        with self._lock:
+            self._valores[chave] = self._valores.get(chave, 0) + valor
+
+    def renderizar(self):
+        linhas = [f"# HELP {self.nome} {self.ajuda}", f"# TYPE {self.nome} counter"]
+        with self._lock:
+            itens = sorted(self._valores.items())
+        for chave, valor in itens:
+            linhas.append(f"{self.nome}{_formatar_labels(zip(self.labels, chave))} {_formatar_valor(valor)}")
+        return linhas
+
+
+class Histograma:
+    def __init__(self, nome, ajuda, labels=(), buckets=BUCKETS_PADRAO):
+        self.nome = nome
+        self.ajuda = ajuda
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        self._series = {}  # labels -> [contagens por bucket, soma, total]
+        self._lock = threading.Lock()
+        _metricas.append(self)
+
+    def observar(self, valor, **labels):
+        chave = tuple(labels[l] for l in self.labels)
+        with self._lock:
+            serie = self._series.get(chave)
+            if serie is None:
+                serie = self._series[chave] = [[0] * len(self.buckets), 0.0, 0]
+            for i, limite in enumerate(self.buckets):
+                if valor <= limite:
+                    serie[0][i] += 1
+                    break
+            serie[1] += valor
+            serie[2] += 1
+
+    def renderizar(self):
+        linhas = [f"# HELP {self.nome} {self.ajuda}", f"# TYPE {self.nome} histogram"]
+        with self._lock:
+            itens = sorted((k, (list(s[0]), s[1], s[2])) for k, s in self._series.items())
+
+        for chave, (contagens, soma, total) in itens:
+            labels = list(zip(self.labels, chave))
+            acumulado = 0
+            for limite, contagem in zip(self.buckets, contagens):
+                acumulado += contagem
+                le = _formatar_labels(labels + [("le", _formatar_valor(limite))])
+                linhas.append(f"{self.nome}_bucket{le} {acumulado}")
+            linhas.append(f"{self.nome}_sum{_formatar_labels(labels)} {_formatar_valor(soma)}")
+            linhas.append(f"{self.nome}_count{_formatar_labels(labels)} {total}")
+        return linhas
+
+
+def registrar_coletor(coletor):
+    """Registra uma função chamada a cada scrape que devolve linhas no formato Prometheus.
+
+    Usado para valores que já existem em outro lugar (estatísticas do pool e dos caches)
+    e só precisam ser lidos na hora da exportação.
+    """
+    _coletores.append(coletor)
+
+
+def gauge(nome, ajuda, valores):
+    # valores: lista de (labels, valor)
+    linhas = [f"# HELP {nome} {ajuda}", f"# TYPE {nome} gauge"]
+    for labels, valor in valores:
+        linhas.append(f"{nome}{_formatar_labels(labels)} {_formatar_valor(valor)}")
+    return linhas
+
+
+def contador_externo(nome, ajuda, valores):
+    linhas = gauge(nome, ajuda, valores)
+    linhas[1] = f"# TYPE {nome} counter"
+    return linhas
+
+
+def renderizar():
+    linhas = []
+    for metrica in _metricas:
+        linhas += metrica.renderizar()
+    for coletor in _coletores:
+        try:
+            linhas += coletor()
+        except Exception:
+            logger.exception("Falha ao coletar métricas")
+    return "\n".join(linhas) + "\n"
+
+
+# ---- Consultas ----
+
+consulta_duracao = Histograma(
+    "db_consulta_duracao_segundos", "Duração de cur.execute por consulta nomeada", ("consulta",)
+)
+consulta_linhas = Contador("db_consulta_linhas_total", "Linhas retornadas/afetadas por consulta nomeada", ("consulta",))
+consulta_erros = Contador("db_consulta_erros_total", "Consultas que terminaram em erro", ("consulta",))
+consulta_lentas = Contador("db_consulta_lentas_total", "Consultas acima de SLOW_QUERY_MS", ("consulta",))
+
+
+@contextlib.contextmanager
+def nomear_consulta(nome):
+    # Dá nome às consultas executadas dentro do bloco (ex: várias consultas na mesma função)
+    anterior = getattr(_nome_consulta, "nome", None)
+    _nome_consulta.nome = nome
+    try:
+        yield
+    finally:
+        _nome_consulta.nome = anterior
+
+
+def _nome_atual():
+    nome = getattr(_nome_consulta, "nome", None)
+    if nome:
+        return nome
+    # Sem nome explícito, usa a função que chamou cur.execute (ex: contar_operadoras)
+    return sys._getframe(2).f_code.co_name
+
+
+class CursorMedido(extensions.cursor):
+    """Cursor do psycopg2 que mede cada execute (duração e linhas) por consulta nomeada.
+
+    Instalado como cursor_factory das conexões do pool (db.py), então todos os serviços
+    são medidos sem mudar o código que chama cur.execute.
+    """
+
+    def execute(self, query, vars=None):
+        nome = _nome_atual()
+        inicio = time.perf_counter()
+        try:
+            return super().execute(query, vars)
+        except Exception:
+            consulta_erros.incrementar(consulta=nome)
+            raise
+        finally:
+            duracao = time.perf_counter() - inicio
+            consulta_duracao.observar(duracao, consulta=nome)
+            if self.rowcount > 0:
+                consulta_linhas.incrementar(self.rowcount, consulta=nome)
+            if SLOW_QUERY_MS and duracao * 1000 >= SLOW_QUERY_MS:
+                consulta_lentas.incrementar(consulta=nome)
+                logger.warning(
+                    "Consulta lenta (%s): %.1f ms, %s linhas\n%s",
+                    nome, duracao * 1000, self.rowcount, self.query.decode(errors="replace") if self.query else query
+                )
+
+
+pool_espera = Histograma("db_pool_espera_segundos", "Tempo esperando uma conexão livre do pool")
+
+
+# ---- Requisições HTTP ----
+
+requisicao_duracao = Histograma(
+    "http_requisicao_duracao_segundos", "Latência das requisições por rota", ("endpoint", "metodo", "status")
+)
+
+
+def registrar_metricas(app):
+    @app.before_request
+    def _iniciar_cronometro():
+        g.inicio_requisicao = time.perf_counter()
+
+    @app.after_request
+    def _medir_requisicao(resposta):
+        inicio = g.pop("inicio_requisicao", None)
+        if inicio is not None:
+            requisicao_duracao.observar(
+                time.perf_counter() - inicio,
+                endpoint=request.endpoint or "nao_encontrado",
+                metodo=request.method,
+                status=resposta.status_code,
+            )
+        return resposta
@@ -0,0 +1,389 @@
+"""Benchmark de carga da API (só biblioteca padrão).
+
+Dispara um mix de tráfego parecido com o do frontend contra a API e mede, por endpoint,
+throughput e latências p50/p95/p99. O resultado vai para um JSON em benchmark/resultados/
+e pode ser comparado com um resultado anterior (--comparar) para barrar regressões.
+
+Cenários do mix:
+    busca               digitação na caixa de busca (um request por tecla, sem debounce)
+    paginacao_profunda  páginas aleatórias por offset e sequência de páginas por cursor
+    detalhe_despesas    detalhe + despesas em paralelo, como a tela da operadora
+    estatisticas        dashboard
+
+Uso:
+    python benchmark/executar_benchmark.py --iniciar-servidor --duracao 60 --concorrencia 16
+    python benchmark/executar_benchmark.py --url http://localhost:5000 --comparar resultados/base.json
+"""
+import argparse
+import datetime
+import gzip
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJETO_ROOT = os.path.dirname(BENCH_DIR)
+PASTA_BACKEND = os.path.join(PROJETO_ROOT, "backend")
+PASTA_RESULTADOS = os.path.join(BENCH_DIR, "resultados")
+
+# Pesos de cada cenário por perfil de tráfego
+MIXES = {
+    "padrao": {"busca": 40, "paginacao_profunda": 20, "detalhe_despesas": 30, "estatisticas": 10},
+    "busca": {"busca": 80, "paginacao_profunda": 10, "detalhe_despesas": 10, "estatisticas": 0},
+    "paginacao": {"busca": 10, "paginacao_profunda": 70, "detalhe_despesas": 20, "estatisticas": 0},
+    "detalhe": {"busca": 10, "paginacao_profunda": 0, "detalhe_despesas": 80, "estatisticas": 10},
+}
+
+TIMEOUT_REQUISICAO = 30
+PERCENTIS = (50, 95, 99)
+
+
+class Coletor:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.ativo = True
+        self.amostras = {}  # rótulo -> lista de (latência em s, ok)
+
+    def registrar(self, rotulo, latencia, ok):
+        if not self.ativo:
+            return
+        with self._lock:
+            self.amostras.setdefault(rotulo, []).append((latencia, ok))
+
+    def reiniciar(self):
+        with self._lock:
+            self.amostras = {}
+
+
+class Cliente:
+    def __init__(self, url_base, coletor):
+        self.url_base = url_base.rstrip("/")
+        self.coletor = coletor
+
+    def get(self, caminho, rotulo, params=None):
+        url = self.url_base + caminho
+        if params:
+            url += "?" + urllib.parse.urlencode(params)
+        req = urllib.request.Request(url, headers={"Accept-Encoding": "gzip", "Accept": "application/json"})
+
+        inicio = time.perf_counter()
+        corpo, ok = None, False
+        try:
+            with urllib.request.urlopen(req, timeout=TIMEOUT_REQUISICAO) as resp:
+                dados = resp.read()
+                if resp.headers.get("Content-Encoding") == "gzip":
+                    dados = gzip.decompress(dados)
+                corpo, ok = dados, True
+        except urllib.error.HTTPError as e:
+            # 404 de operadora sem cadastro é resposta válida da API, não erro de carga
+            ok = e.code < 500
+        except (urllib.error.URLError, OSError):
+            ok = False
+        self.coletor.registrar(rotulo, time.perf_counter() - inicio, ok)
+
+        if corpo is None:
+            return None
+        try:
+            return json.loads(corpo)
+        except ValueError:
+            return None
+
+
+# ---- Cenários ----
+
+def cenario_busca(cliente, dados, rng):
+    nome = rng.choice(dados["nomes"])
+    palavra = rng.choice([p for p in nome.split() if len(p) >= 3] or [nome])
+    for tamanho in range(1, min(len(palavra), 8) + 1):
+        cliente.get("/api/operadoras", "GET /api/operadoras?search", {"search": palavra[:tamanho], "page": 1, "limit": 10})
+
+
+def cenario_paginacao_profunda(cliente, dados, rng):
+    pagina = rng.randint(1, max(dados["paginas"], 1))
+    cliente.get("/api/operadoras", "GET /api/operadoras?page", {"page": pagina, "limit": 10})
+
+    cursor = ""
+    for _ in range(5):
+        resposta = cliente.get("/api/operadoras", "GET /api/operadoras?cursor", {"cursor": cursor, "limit": 10})
+        cursor = ((resposta or {}).get("meta") or {}).get("next_cursor")
+        if not cursor:
+            break
+
+
+def cenario_detalhe_despesas(cliente, dados, rng):
+    cnpj = rng.choice(dados["cnpjs"])
+    threads = [
+        threading.Thread(target=cliente.get, args=(f"/api/operadoras/{cnpj}", "GET /api/operadoras/<cnpj>")),
+        threading.Thread(
+            target=cliente.get,
+            args=(f"/api/operadoras/{cnpj}/despesas", "GET /api/operadoras/<cnpj>/despesas", {"page": 1, "limit": 10}),
+        ),
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+
+def cenario_estatisticas(cliente, dados, rng):
+    cliente.get("/api/estatisticas", "GET /api/estatisticas")
+
+
+CENARIOS = {
+    "busca": cenario_busca,
+    "paginacao_profunda": cenario_paginacao_profunda,
+    "detalhe_despesas": cenario_detalhe_despesas,
+    "estatisticas": cenario_estatisticas,
+}
+
+
+def descobrir_dados(url_base, semente):
+    # CNPJs e nomes reais da base carregada, para os cenários não baterem só em 404
+    cliente = Cliente(url_base, Coletor())
+    primeira = cliente.get("/api/operadoras", "", {"page": 1, "limit": 100})
+    if not primeira or not primeira.get("data"):
+        raise SystemExit("A API não retornou operadoras; o banco está carregado?")
+
+    total = primeira["meta"]["total"]
+    paginas = max(math.ceil(total / 100), 1)
+    operadoras = list(primeira["data"])
+
+    rng = random.Random(semente)
+    for pagina in rng.sample(range(2, paginas + 1), min(4, paginas - 1)):
+        resposta = cliente.get("/api/operadoras", "", {"page": pagina, "limit": 100})
+        operadoras += (resposta or {}).get("data", [])
+
+    return {
+        "cnpjs": [o["cnpj"] for o in operadoras],
+        "nomes": [o["razao_social"] for o in operadoras if o.get("razao_social")],
+        "paginas": math.ceil(total / 10),
+    }
+
+
+def executar_carga(url_base, coletor, dados, mix, concorrencia, duracao, aquecimento, semente):
+    nomes = [n for n, peso in mix.items() if peso > 0]
+    pesos = [mix[n] for n in nomes]
+    fim_aquecimento = time.monotonic() + aquecimento
+    fim = fim_aquecimento + duracao
+    contagem = {n: 0 for n in nomes}
+    lock = threading.Lock()
+
+    def trabalhador(indice):
+        # Uma semente por trabalhador: a sequência de cenários se repete entre execuções
+        rng = random.Random(f"{semente}-{indice}")
+        cliente = Cliente(url_base, coletor)
+        while time.monotonic() < fim:
+            nome = rng.choices(nomes, pesos)[0]
+            CENARIOS[nome](cliente, dados, rng)
+            with lock:
+                contagem[nome] += 1
+
+    with ThreadPoolExecutor(max_workers=concorrencia) as executor:
+        futuros = [executor.submit(trabalhador, i) for i in range(concorrencia)]
+        if aquecimento > 0:
+            time.sleep(aquecimento)
+            coletor.reiniciar()
+            with lock:
+                contagem.update({n: 0 for n in nomes})
+        inicio_medicao = time.monotonic()
+        for f in futuros:
+            f.result()
+
+    return time.monotonic() - inicio_medicao, contagem
+
+
+def percentil(ordenadas, p):
+    # Nearest-rank
+    if not ordenadas:
+        return 0.0
+    return ordenadas[max(math.ceil(p / 100 * len(ordenadas)) - 1, 0)]
+
+
+def resumir(amostras, duracao):
+    endpoints = {}
+    todas = []
+    for rotulo, valores in sorted(amostras.items()):
+        latencias = sorted(v[0] for v in valores)
+        erros = sum(1 for v in valores if not v[1])
+        todas += latencias
+        endpoints[rotulo] = {
+            "requisicoes": len(valores),
+            "erros": erros,
+            "rps": round(len(valores) / duracao, 2),
+            "media_ms": round(sum(latencias) / len(latencias) * 1000, 2),
+            **{f"p{p}_ms": round(percentil(latencias, p) * 1000, 2) for p in PERCENTIS},
+            "max_ms": round(latencias[-1] * 1000, 2),
+        }
+
+    todas.sort()
+    total = len(todas)
+    return {
+        "requisicoes": total,
+        "erros": sum(e["erros"] for e in endpoints.values()),
+        "rps": round(total / duracao, 2) if duracao else 0,
+        **{f"p{p}_ms": round(percentil(todas, p) * 1000, 2) for p in PERCENTIS},
+    }, endpoints
+
+
+def comparar(resultado, base, tolerancia):
+    """Lista as regressões de p95/p99 (ou de throughput) acima da tolerância em relação à base."""
+    regressoes = []
+    for rotulo, atual in resultado["endpoints"].items():
+        anterior = base.get("endpoints", {}).get(rotulo)
+        if not anterior:
+            continue
+        for metrica in ("p95_ms", "p99_ms"):
+            if anterior[metrica] and atual[metrica] > anterior[metrica] * (1 + tolerancia):
+                regressoes.append(f"{rotulo} {metrica}: {anterior[metrica]} -> {atual[metrica]}")
+
+    rps_base = base.get("global", {}).get("rps")
+    if rps_base and resultado["global"]["rps"] < rps_base * (1 - tolerancia):
+        regressoes.append(f"throughput global: {rps_base} -> {resultado['global']['rps']} req/s")
+    return regressoes
+
+
+def iniciar_servidor(tipo, porta):
+    if tipo == "asgi":
+        comando = [sys.executable, "-m", "hypercorn", "app_async:app", "--bind", f"127.0.0.1:{porta}"]
+    else:
+        comando = [sys.executable, "-m", "flask", "--app", "app", "run", "--port", str(porta), "--no-reload", "--with-threads"]
+
+    processo = subprocess.Popen(comando, cwd=PASTA_BACKEND)
+    url = f"http://127.0.0.1:{porta}"
+    limite = time.monotonic() + 30
+    while time.monotonic() < limite:
+        if processo.poll() is not None:
+            raise SystemExit(f"O servidor terminou ao iniciar (código {processo.returncode})")
+        try:
+            urllib.request.urlopen(url + "/api/saude/pool", timeout=2).close()
+            return processo, url
+        except urllib.error.HTTPError:
+            # Qualquer resposta HTTP (mesmo 404/500) já mostra que o servidor está ouvindo
+            return processo, url
+        except (urllib.error.URLError, OSError):
+            time.sleep(0.5)
+
+    processo.terminate()
+    raise SystemExit("O servidor não respondeu em 30s")
+
+
+def _commit_atual():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=PROJETO_ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _json_opcional(url):
+    try:
+        with urllib.request.urlopen(url, timeout=5) as resp:
+            return json.loads(resp.read())
+    except (urllib.error.URLError, OSError, ValueError):
+        return None
+
+
+def imprimir(resultado):
+    print(f"\n{'endpoint':<42}{'req':>8}{'erros':>7}{'req/s':>9}{'p50':>9}{'p95':>9}{'p99':>9}")
+    for rotulo, e in resultado["endpoints"].items():
+        print(f"{rotulo:<42}{e['requisicoes']:>8}{e['erros']:>7}{e['rps']:>9}"
+              f"{e['p50_ms']:>9}{e['p95_ms']:>9}{e['p99_ms']:>9}")
+    g = resultado["global"]
+    print(f"{'TOTAL':<42}{g['requisicoes']:>8}{g['erros']:>7}{g['rps']:>9}{g['p50_ms']:>9}{g['p95_ms']:>9}{g['p99_ms']:>9}")
+    print("(latências em ms)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de carga da API de operadoras")
+    parser.add_argument("--url", default="http://127.0.0.1:5000")
+    parser.add_argument("--iniciar-servidor", action="store_true", help="sobe o backend em um subprocesso")
+    parser.add_argument("--servidor", choices=("flask", "asgi"), default="flask")
+    parser.add_argument("--porta", type=int, default=5055)
+    parser.add_argument("--mix", choices=sorted(MIXES), default="padrao")
+    parser.add_argument("--concorrencia", type=int, default=8)
+    parser.add_argument("--duracao", type=float, default=30, help="segundos medidos")
+    parser.add_argument("--aquecimento", type=float, default=5, help="segundos descartados no início")
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--saida", help="arquivo JSON do resultado (padrão: benchmark/resultados/<data>.json)")
+    parser.add_argument("--comparar", help="JSON de uma execução anterior para detectar regressões")
+    parser.add_argument("--tolerancia", type=float, default=0.15, help="piora aceita em relação à base (0.15 = 15%%)")
+    args = parser.parse_args()
+
+    # Lida antes de rodar: --saida pode apontar para o mesmo arquivo da base
+    base = None
+    if args.comparar:
+        with open(args.comparar, "r", encoding="utf-8") as f:
+            base = json.load(f)
+
+    processo = None
+    url = args.url
+    if args.iniciar_servidor:
+        processo, url = iniciar_servidor(args.servidor, args.porta)
+
+    try:
+        dados = descobrir_dados(url, args.semente)
+        coletor = Coletor()
+        duracao, cenarios = executar_carga(
+            url, coletor, dados, MIXES[args.mix], args.concorrencia, args.duracao, args.aquecimento, args.semente
+        )
+        coletor.ativo = False
+        total, endpoints = resumir(coletor.amostras, duracao)
+
+        resultado = {
+            "gerado_em": datetime.datetime.now().isoformat(timespec="seconds"),
+            "commit": _commit_atual(),
+            "parametros": {
+                "url": url,
+                "servidor": args.servidor if args.iniciar_servidor else None,
+                "mix": args.mix,
+                "pesos": MIXES[args.mix],
+                "concorrencia": args.concorrencia,
+                "duracao_s": round(duracao, 2),
+                "aquecimento_s": args.aquecimento,
+                "semente": args.semente,
+                "operadoras_amostradas": len(dados["cnpjs"]),
+            },
+            "cenarios_executados": cenarios,
+            "global": total,
+            "endpoints": endpoints,
+            # Estado do servidor ao final (espera por conexão, hit rate dos caches)
+            "pool": _json_opcional(url + "/api/saude/pool"),
+            "caches": _json_opcional(url + "/api/saude/cache"),
+        }
+    finally:
+        if processo is not None:
+            processo.terminate()
+            processo.wait(timeout=10)
+
+    imprimir(resultado)
+
+    saida = args.saida or os.path.join(
+        PASTA_RESULTADOS, f"benchmark_{datetime.datetime.now():%Y%m%d_%H%M%S}_{args.mix}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(saida)), exist_ok=True)
+    with open(saida, "w", encoding="utf-8") as f:
+        json.dump(resultado, f, ensure_ascii=False, indent=2)
+    print(f"\nResultado salvo em {saida}")
+
+    if base is not None:
+        regressoes = comparar(resultado, base, args.tolerancia)
+        if regressoes:
+            print("\nRegressões em relação a", args.comparar)
+            for r in regressoes:
+                print(" -", r)
+            sys.exit(1)
+        print("\nSem regressões em relação a", args.comparar)
+
+
+if __name__ == "__main__":
+    main()
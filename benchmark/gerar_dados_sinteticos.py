@@ -0,0 +1,140 @@
+"""Carrega no Postgres um conjunto de dados sintético para o benchmark da API.
+
+Recria o esquema com os mesmos arquivos do supabase_script/processar_sql.py e preenche
+as tabelas de staging direto no banco (generate_series), no mesmo formato texto dos
+CSVs da ANS; a partir daí as validações, rollups e versão dos dados são os de produção.
+
+ATENÇÃO: apaga todas as tabelas do banco configurado em DB_HOST/DB_NAME (exige --sim).
+
+Uso:
+    python benchmark/gerar_dados_sinteticos.py --sim --operadoras 2000 --linhas 5000000
+"""
+import argparse
+import logging
+import os
+import time
+
+import psycopg2
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJETO_ROOT = os.path.dirname(BENCH_DIR)
+PASTA_SQL = os.path.join(PROJETO_ROOT, "supabase")
+
+# Palavras com acento e termos comuns, para a busca (trigram/unaccent) ter o que encontrar
+PREFIXOS = ["UNIMED", "AMIL", "BRADESCO", "SULAMÉRICA", "HAPVIDA", "NOTRE", "PORTO", "GOLDEN", "PREVENT", "ODONTO"]
+MEIOS = ["ASSISTÊNCIA MÉDICA", "SAÚDE", "COOPERATIVA DE TRABALHO MÉDICO", "ADMINISTRADORA DE BENEFÍCIOS", "PLANOS ODONTOLÓGICOS"]
+MODALIDADES = ["Cooperativa Médica", "Medicina de Grupo", "Odontologia de Grupo", "Seguradora Especializada em Saúde",
+               "Administradora de Benefícios", "Autogestão", "Filantropia"]
+UFS = ["SP", "RJ", "MG", "RS", "PR", "SC", "BA", "PE", "CE", "GO", "DF", "ES", "PA", "AM", "MT", "MS", "MA", "PB",
+       "RN", "AL", "PI", "SE", "RO", "TO", "AC", "AP", "RR"]
+
+
+def _array(valores):
+    return "ARRAY[" + ", ".join("'" + v.replace("'", "''") + "'" for v in valores) + "]"
+
+
+def _cnpj(expr):
+    # 14 dígitos únicos por operadora (não precisa ter dígito verificador válido para o banco)
+    return f"LPAD(({expr})::TEXT, 8, '0') || '0001' || LPAD((({expr}) % 100)::TEXT, 2, '0')"
+
+
+def _razao_social(expr):
+    return (
+        f"({_array(PREFIXOS)})[1 + ({expr}) % {len(PREFIXOS)}] || ' ' || "
+        f"({_array(MEIOS)})[1 + (({expr}) / {len(PREFIXOS)}) % {len(MEIOS)}] || ' ' || ({expr})::TEXT || ' LTDA'"
+    )
+
+
+def sql_staging_cadastrais(operadoras):
+    return f"""
+        INSERT INTO staging_dados_cadastrais
+        SELECT
+            LPAD(i::TEXT, 6, '0'),
+            {_cnpj("i")},
+            {_razao_social("i")},
+            NULL,
+            ({_array(MODALIDADES)})[1 + i % {len(MODALIDADES)}],
+            'RUA SINTÉTICA', (i % 2000)::TEXT, NULL, 'CENTRO', 'CIDADE ' || (i % 300)::TEXT,
+            ({_array(UFS)})[1 + (i * 7) % {len(UFS)}],
+            LPAD((i * 37 % 99999999)::TEXT, 8, '0'), '11', '40000000', NULL,
+            'contato' || i || '@exemplo.com.br', 'REPRESENTANTE ' || i, 'DIRETOR', (1 + i % 6)::TEXT,
+            TO_CHAR(DATE '2000-01-01' + (i % 8000), 'YYYY-MM-DD')
+        FROM generate_series(1, {int(operadoras)}) AS i;
+    """
+
+
+def sql_staging_despesas(operadoras, linhas):
+    # power(random(), 2) concentra as linhas nas primeiras operadoras, como nos dados reais
+    # (poucas operadoras grandes com muitos lançamentos e uma cauda longa de pequenas)
+    return f"""
+        INSERT INTO staging_consolidado_despesas
+        SELECT
+            {_cnpj("op")},
+            {_razao_social("op")},
+            (2019 + FLOOR(random() * 6))::INT::TEXT,
+            (1 + FLOOR(random() * 4))::INT::TEXT,
+            REPLACE(ROUND((random() * 5000000)::NUMERIC, 2)::TEXT, '.', ',')
+        FROM (
+            SELECT 1 + FLOOR({int(operadoras)} * power(random(), 2))::INT AS op
+            FROM generate_series(1, {int(linhas)})
+        ) AS g;
+    """
+
+
+def run_sql(cur, filename):
+    with open(os.path.join(PASTA_SQL, filename), "r", encoding="utf-8") as f:
+        sql = f.read().strip()
+    if sql:
+        cur.execute(sql)
+
+
+def etapa(conn, descricao, executar):
+    inicio = time.perf_counter()
+    with conn.cursor() as cur:
+        executar(cur)
+    conn.commit()
+    logging.info("%s: %.1fs", descricao, time.perf_counter() - inicio)
+
+
+def gerar(operadoras, linhas, semente):
+    conn = psycopg2.connect(
+        host=os.getenv("DB_HOST"),
+        database=os.getenv("DB_NAME"),
+        user=os.getenv("DB_USER"),
+        password=os.getenv("DB_PASSWORD"),
+        port=os.getenv("DB_PORT")
+    )
+    try:
+        etapa(conn, "Esquema", lambda cur: [run_sql(cur, f) for f in ("00_drop_all.sql", "01_ddl.sql", "02_indices.sql")])
+        etapa(conn, f"Staging cadastrais ({operadoras} operadoras)", lambda cur: cur.execute(sql_staging_cadastrais(operadoras)))
+
+        def despesas(cur):
+            # setseed vale para a sessão: a mesma semente gera sempre os mesmos dados
+            cur.execute("SELECT setseed(%s);", (semente,))
+            cur.execute(sql_staging_despesas(operadoras, linhas))
+        etapa(conn, f"Staging despesas ({linhas} linhas)", despesas)
+
+        etapa(conn, "Validações (03)", lambda cur: run_sql(cur, "03_validacoes.sql"))
+        etapa(conn, "Rollups (05)", lambda cur: run_sql(cur, "05_rollups.sql"))
+        etapa(conn, "Versão dos dados (06)", lambda cur: run_sql(cur, "06_versao_dados.sql"))
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gera dados sintéticos para o benchmark da API")
+    parser.add_argument("--operadoras", type=int, default=2000)
+    parser.add_argument("--linhas", type=int, default=1_000_000, help="linhas de consolidado_despesas")
+    parser.add_argument("--semente", type=float, default=0.42, help="entre -1 e 1 (setseed do Postgres)")
+    parser.add_argument("--sim", action="store_true", help="confirma que o banco configurado pode ser apagado")
+    args = parser.parse_args()
+
+    if not args.sim:
+        parser.error("isto apaga todas as tabelas do banco configurado; rode de novo com --sim")
+
+    gerar(args.operadoras, args.linhas, args.semente)
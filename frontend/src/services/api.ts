@@ -20,6 +20,11 @@ export const operadorasService = {
       params: { page, limit: 12 }
     });
   },
+  getSerie(cnpj: string, mediaMovel: number = 4) {
+    return api.get(`/operadoras/${cnpj}/serie`, {
+      params: { deltas: 1, media_movel: mediaMovel }
+    });
+  },
   getEstatisticas() {
     return api.get('/estatisticas');
   }
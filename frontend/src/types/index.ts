@@ -19,6 +19,18 @@ export interface Despesa {
   valor_despesas: number;
 }
 
+export interface PontoSerie {
+  ano: number;
+  trimestre: number;
+  total: number;
+  qtd_registros: number;
+  variacao_trimestre?: number | null;
+  variacao_trimestre_pct?: number | null;
+  variacao_ano?: number | null;
+  variacao_ano_pct?: number | null;
+  media_movel?: number;
+}
+
 export interface EstatisticaUF {
   uf: string;
   total: number;
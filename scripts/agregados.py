@@ -4,6 +4,8 @@ import logging
 import pandas as pd
 import zipfile
 
+from intermediarios import existe, ler
+
 # Configuração de logging
 logger = logging.getLogger("agregacao")
 logger.setLevel(logging.INFO)
@@ -25,20 +27,21 @@ def executar_agregacao():
     PASTA_ENRIQUECIDA = os.path.join(PASTA_DADOS_RAIZ, "dados_enriquecidos")
     caminho_enriquecido = os.path.join(PASTA_ENRIQUECIDA, "dados_enriquecidos.csv")
 
-    if not os.path.exists(caminho_enriquecido):
+    if not existe(caminho_enriquecido):
         logger.error("Arquivo enriquecido não encontrado: %s", caminho_enriquecido)
         return
 
     logger.info("Lendo arquivo enriquecido: %s", caminho_enriquecido)
-    df = pd.read_csv(caminho_enriquecido, sep=';', dtype=str, encoding='utf-8-sig')
+    df = ler(caminho_enriquecido, sep=';', dtype=str, encoding='utf-8-sig')
 
     # garantir colunas necessárias (criar com NaN se ausente)
     for col in ['RazaoSocial', 'UF', 'ValorDespesas', 'Ano', 'Trimestre']:
         if col not in df.columns:
             df[col] = pd.NA
 
-    # converter ValorDespesas para numérico (coerce para NaN)
-    df['ValorDespesas'] = pd.to_numeric(df['ValorDespesas'].astype(str).str.replace(",", "."), errors='coerce')
+    # converter ValorDespesas para numérico (coerce para NaN); do Parquet/Arrow já vem tipado
+    if not pd.api.types.is_numeric_dtype(df['ValorDespesas']):
+        df['ValorDespesas'] = pd.to_numeric(df['ValorDespesas'].astype(str).str.replace(",", "."), errors='coerce')
 
     # checar existência de dados válidos para RazaoSocial e UF
     n_valid_razao = df['RazaoSocial'].notna().sum()
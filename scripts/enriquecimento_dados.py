@@ -4,6 +4,8 @@ import re
 import logging
 import pandas as pd
 
+from intermediarios import gravar, ler_tipado
+
 # Configuração de logging (simples e legível)
 logger_enriquecimento = logging.getLogger("enriquecimento_dados")
 logger_enriquecimento.setLevel(logging.INFO)
@@ -109,7 +111,10 @@ def enriquecer_por_cadastro(diretorio_consolidado, diretorio_cadastro):
 
     logger_enriquecimento.info("Lendo consolidado: %s", caminho_consolidado)
 
-    df_consolidado = ler_csv_com_delimitadores_possiveis(caminho_consolidado)
+    # versão Parquet/Arrow do consolidado, quando houver (FORMATO_INTERMEDIARIO)
+    df_consolidado = ler_tipado(caminho_consolidado)
+    if df_consolidado is None:
+        df_consolidado = ler_csv_com_delimitadores_possiveis(caminho_consolidado)
 
     logger_enriquecimento.info("Lendo cadastro: %s", caminho_cadastro)
 
@@ -323,7 +328,7 @@ def enriquecer_por_cadastro(diretorio_consolidado, diretorio_cadastro):
 
     caminho_saida_principal = os.path.join(pasta_saida, "dados_enriquecidos.csv")
     
-    df_final.to_csv(caminho_saida_principal, index=False, sep=';', encoding='utf-8-sig')
+    gravar(df_final, caminho_saida_principal, index=False, sep=';', encoding='utf-8-sig')
 
     logger_enriquecimento.info("Arquivo de enriquecimento salvo em: %s", caminho_saida_principal)
 
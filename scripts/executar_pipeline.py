@@ -0,0 +1,96 @@
+"""Executa o pipeline inteiro, na ordem das etapas do README.
+
+extrair_zips (só com --origem extraidos) → processar_arquivos → validar_dados →
+enriquecimento_dados → agregados → carga no banco.
+
+Com --incremental, só arquivos novos ou alterados são lidos de novo (partes guardadas em
+arquivos_csv_zips/partes_consolidado/) e o banco recebe apenas as chaves
+(cnpj, ano, trimestre) alteradas pelo supabase_script/carga_incremental.py, em vez do
+drop-and-reload do processar_sql.py. As chaves ficam pendentes em alteracoes.json até a
+carga no banco dar certo; sem nada pendente, as etapas seguintes nem rodam.
+
+Uso:
+    python scripts/executar_pipeline.py                    # tudo do zero
+    python scripts/executar_pipeline.py --incremental      # só o que mudou
+"""
+import argparse
+import logging
+import os
+import subprocess
+import sys
+import time
+
+import agregados
+import enriquecimento_dados
+import validar_dados
+from extrair_zips import extrair_arquivos_zip
+from processar_arquivos import executar_processamento
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJETO_ROOT = os.path.dirname(SCRIPT_DIR)
+PASTA_DADOS_RAIZ = os.path.join(PROJETO_ROOT, 'arquivos_csv_zips')
+PASTA_SQL_SCRIPTS = os.path.join(PROJETO_ROOT, 'supabase_script')
+
+
+def etapa(nome, executar):
+    inicio = time.perf_counter()
+    logging.info(f"== {nome} ==")
+    resultado = executar()
+    logging.info(f"== {nome}: {time.perf_counter() - inicio:.1f}s ==")
+    return resultado
+
+
+def executar_pipeline(origem="auto", workers=1, incremental=False, banco=True):
+    consolidado = os.path.join(PASTA_DADOS_RAIZ, "consolidado_despesas")
+    cadastro = os.path.join(PASTA_DADOS_RAIZ, "dados_cadastrais")
+
+    if origem == "extraidos":
+        etapa("Extração dos ZIPs", lambda: extrair_arquivos_zip(workers))
+
+    # O modo incremental grava as partes por arquivo, então usa sempre o consolidado em streaming
+    alteracoes = etapa(
+        "Processamento dos arquivos",
+        lambda: executar_processamento(origem, workers, streaming=True, incremental=incremental)
+    )
+    if alteracoes is None:
+        logging.error("Processamento não gerou o consolidado; pipeline interrompido.")
+        return False
+
+    # alteracoes: o que ainda falta carregar no banco, desta execução e de anteriores
+    if not alteracoes["completo"] and not alteracoes["chaves"]:
+        logging.info("Nenhuma alteração pendente: consolidado, agregados e banco já estão atualizados.")
+        return True
+
+    etapa(
+        "Validação",
+        lambda: validar_dados.ValidadorDados(logger=validar_dados.logger).validar_arquivo_consolidado(
+            consolidado, output_dir=os.path.join(PASTA_DADOS_RAIZ, "consolidado_validado")
+        )
+    )
+    etapa("Enriquecimento", lambda: enriquecimento_dados.enriquecer_por_cadastro(consolidado, cadastro))
+    etapa("Agregação", agregados.executar_agregacao)
+
+    if banco:
+        # O carga_incremental.py decide pelo alteracoes.json (sem --incremental ele é sempre
+        # completo e cai no processar_sql.py) e só baixa as pendentes depois do commit
+        etapa(
+            "Carga no banco (carga_incremental.py)",
+            lambda: subprocess.run([sys.executable, os.path.join(PASTA_SQL_SCRIPTS, "carga_incremental.py")], check=True)
+        )
+    return True
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description="Executa o pipeline completo de dados da ANS")
+    parser.add_argument("--origem", choices=["auto", "zip", "extraidos"], default="auto",
+                        help="ler direto dos ZIPs ou extrair antes para arquivos_extraidos")
+    parser.add_argument("--workers", type=int, default=1, help="processos em paralelo (0 = núcleos da máquina)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="processa só arquivos novos/alterados e atualiza no banco só as chaves afetadas")
+    parser.add_argument("--sem-banco", action="store_true", help="para antes da carga no banco")
+    args = parser.parse_args()
+
+    ok = executar_pipeline(args.origem, args.workers or os.cpu_count(), args.incremental, not args.sem_banco)
+    sys.exit(0 if ok else 1)
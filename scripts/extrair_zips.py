@@ -1,26 +1,97 @@
-import zipfile
+import argparse
+import json
 import os
 import logging
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Só o que o processar_arquivos.py sabe ler; o resto do ZIP nem é descomprimido
+EXTENSOES_SUPORTADAS = ('.csv', '.txt', '.xlsx', '.xls')
+
+# Guarda, por pasta de destino, o tamanho do ZIP e o CRC de cada membro já extraído
+ARQUIVO_CONTROLE = '.extracao.json'
+
+
+def _ler_controle(pasta_destino):
+    try:
+        with open(os.path.join(pasta_destino, ARQUIVO_CONTROLE), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _ja_extraido(controle, info, pasta_destino):
+    # Mesmo CRC registrado na última extração e arquivo ainda presente com o tamanho certo
+    caminho = os.path.join(pasta_destino, info.filename)
+    return (
+        controle.get(info.filename) == info.CRC
+        and os.path.isfile(caminho)
+        and os.path.getsize(caminho) == info.file_size
+    )
+
+
+def extrair_zip(caminho_zip, pasta_extraidos):
+    """Extrai um ZIP para a sua própria subpasta (nome do ZIP sem extensão).
+
+    Assim membros com o mesmo nome em trimestres diferentes não se sobrescrevem.
+    Retorna um resumo com a contagem de membros extraídos/pulados e o tempo gasto.
+    """
+    inicio = time.perf_counter()
+    nome_zip = os.path.splitext(os.path.basename(caminho_zip))[0]
+    pasta_destino = os.path.join(pasta_extraidos, nome_zip)
+    resumo = {"arquivo": os.path.basename(caminho_zip), "extraidos": 0, "pulados": 0, "bytes": 0, "erro": None}
 
-def extrair_arquivos_zip():
+    try:
+        with zipfile.ZipFile(caminho_zip, 'r') as zip_ref:
+            membros = [
+                info for info in zip_ref.infolist()
+                if not info.is_dir() and info.filename.lower().endswith(EXTENSOES_SUPORTADAS)
+            ]
+            os.makedirs(pasta_destino, exist_ok=True)
+            controle = _ler_controle(pasta_destino)
+
+            for info in membros:
+                if _ja_extraido(controle, info, pasta_destino):
+                    resumo["pulados"] += 1
+                    continue
+                # extract() normaliza o caminho: membros com ../ não saem da pasta de destino
+                zip_ref.extract(info, pasta_destino)
+                controle[info.filename] = info.CRC
+                resumo["extraidos"] += 1
+                resumo["bytes"] += info.file_size
+
+            with open(os.path.join(pasta_destino, ARQUIVO_CONTROLE), 'w', encoding='utf-8') as f:
+                json.dump(controle, f)
+    except zipfile.BadZipFile:
+        logging.error(f"Arquivo Zip corrompido: {caminho_zip}")
+        resumo["erro"] = "zip corrompido"
+
+    resumo["duracao_s"] = time.perf_counter() - inicio
+    return resumo
+
+
+def extrair_arquivos_zip(workers=None):
     # 1. Localiza a pasta onde o script está (scripts_python)
     SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
-    
+
     # 2. Sobe UM nível para a raiz do projeto
     PROJETO_ROOT = os.path.dirname(SCRIPT_DIR)
-    
+
     # 3. Define a pasta principal de dados
     PASTA_DADOS = os.path.join(PROJETO_ROOT, 'arquivos_csv_zips')
-    
+
     # --- SOLUÇÃO 1: Garantir que TODAS as pastas do fluxo existam ---
     pastas_necessarias = [         # Onde ficam os ZIPs da ANS
-        'arquivos_extraidos',    # Onde os CSVs crus serão jogados
+        'arquivos_extraidos',    # Onde os CSVs crus serão jogados (uma subpasta por ZIP)
         'consolidado_despesas',  # Resultado do processamento
         'consolidado_validado',  # Resultado da validação
         'dados_enriquecidos',    # Resultado do enriquecimento
         'despesas_agregadas'     # Resultado final (Agregação + ZIP final)
     ]
-    
+
     for subpasta in pastas_necessarias:
         caminho_completo_pasta = os.path.join(PASTA_DADOS, subpasta)
         if not os.path.exists(caminho_completo_pasta):
@@ -30,33 +101,35 @@ def extrair_arquivos_zip():
     # 4. Caminho específico dos zips para extração
     CAMINHO_ZIP = os.path.join(PASTA_DADOS, 'arquivoszip')
     PASTA_EXTRAIDOS = os.path.join(PASTA_DADOS, 'arquivos_extraidos')
-    
+
     # Verifica se há algo para extrair
     if not os.path.exists(CAMINHO_ZIP) or not os.listdir(CAMINHO_ZIP):
         print(f"Atenção: Coloque os arquivos .zip em {CAMINHO_ZIP} para continuar.")
         return
 
-    arquivos = os.listdir(CAMINHO_ZIP)
+    arquivos = sorted(os.path.join(CAMINHO_ZIP, a) for a in os.listdir(CAMINHO_ZIP) if a.lower().endswith(".zip"))
 
-    for arquivo in arquivos:
-        if arquivo.endswith(".zip"):
-            caminho_completo = os.path.join(CAMINHO_ZIP, arquivo)
-            
-            try:
-                with zipfile.ZipFile(caminho_completo, 'r') as zip_ref:
-                    print(f"Extraindo {arquivo} para {PASTA_EXTRAIDOS}...")
-                    zip_ref.extractall(PASTA_EXTRAIDOS)
-            except zipfile.BadZipFile:
-                logging.error(f"Arquivo Zip corrompido: {caminho_completo}")
+    # A descompressão (zlib) libera o GIL: threads bastam para usar vários núcleos
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+        resumos = list(executor.map(lambda caminho: extrair_zip(caminho, PASTA_EXTRAIDOS), arquivos))
 
-if __name__ == "__main__":
-    extrair_arquivos_zip()
+    for r in resumos:
+        if r["erro"] is None:
+            logging.info(
+                f"{r['arquivo']}: {r['extraidos']} extraídos, {r['pulados']} sem mudança, "
+                f"{r['bytes'] / 1e6:.1f} MB em {r['duracao_s']:.2f}s"
+            )
+    logging.info(
+        f"Extração concluída: {len(arquivos)} ZIPs, "
+        f"{sum(r['extraidos'] for r in resumos)} arquivos extraídos em {time.perf_counter() - inicio:.2f}s"
+    )
+    return resumos
 
 
-"""
-        # todo esse comando serve para criar pastas com o mesmo nome do zip para evitar duplicações em uma situação de grande volume de arquivos por zip
-        nome_zip = os.path.splitext(arquivo)[0] # obtém o nome do arquivo sem a extensão .zip
-        caminho_extraido = os.path.join("arquivos_extraidos/", nome_zip) # cria o caminho para a pasta onde os arquivos serão extraídos
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Extrai os ZIPs trimestrais da ANS")
+    parser.add_argument("--workers", type=int, default=None, help="extrações em paralelo (padrão: núcleos da máquina)")
+    args = parser.parse_args()
 
-        os.makedirs(caminho_extraido, exist_ok=True) # cria pasta recursivamente e o exist_ok evita erro se ja existir 
-        """
\ No newline at end of file
+    extrair_arquivos_zip(args.workers)
@@ -0,0 +1,126 @@
+import logging
+import os
+
+import pandas as pd
+
+# Formato dos arquivos passados de uma etapa do pipeline para a outra.
+# FORMATO_INTERMEDIARIO=parquet (ou arrow) grava as saídas das etapas já tipadas e a
+# etapa seguinte lê sem parse de texto nem pd.to_numeric; os CSVs ficam só para as
+# entregas finais (consolidado, agregados) e a carga no banco. Exige pyarrow, que é
+# opcional: sem ele tudo continua em CSV.
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+FORMATOS = ("csv", "parquet", "arrow")
+EXTENSOES = {"parquet": ".parquet", "arrow": ".arrow"}
+
+_avisos = set()
+
+
+def _avisar_uma_vez(mensagem):
+    if mensagem not in _avisos:
+        _avisos.add(mensagem)
+        logging.warning(mensagem)
+
+
+def formato_intermediario():
+    formato = os.getenv("FORMATO_INTERMEDIARIO", "csv").strip().lower()
+    if formato not in FORMATOS:
+        _avisar_uma_vez(f"FORMATO_INTERMEDIARIO={formato} desconhecido; usando csv")
+        return "csv"
+    if formato != "csv" and pa is None:
+        _avisar_uma_vez(f"FORMATO_INTERMEDIARIO={formato} requer pyarrow (pip install pyarrow); usando csv")
+        return "csv"
+    return formato
+
+
+def caminho_tipado(caminho_csv, formato):
+    return os.path.splitext(caminho_csv)[0] + EXTENSOES[formato]
+
+
+def _escritor(destino, schema, formato):
+    if formato == "parquet":
+        return pq.ParquetWriter(destino, schema)
+    return pa.ipc.new_file(destino, schema)
+
+
+def gravar(df, caminho_csv, manter_csv=False, **opcoes_csv):
+    """Grava a saída de uma etapa no formato intermediário ativo.
+
+    Em CSV (padrão) é um df.to_csv(caminho_csv, **opcoes_csv). No formato tipado grava o
+    .parquet/.arrow ao lado e só escreve o CSV se manter_csv (entregas finais).
+    """
+    formato = formato_intermediario()
+    if formato == "csv" or manter_csv:
+        df.to_csv(caminho_csv, **opcoes_csv)
+    if formato == "csv":
+        return
+
+    tabela = pa.Table.from_pandas(df, preserve_index=False)
+    with _escritor(caminho_tipado(caminho_csv, formato), tabela.schema, formato) as escritor:
+        escritor.write_table(tabela)
+
+
+def converter_csv(caminho_csv, tipos, delimitador=';'):
+    """Gera a versão tipada de um CSV já gravado (ex: consolidado montado em streaming).
+
+    tipos: coluna -> alias de tipo do Arrow ("string", "int64", "double"). O CSV é lido
+    em blocos pelo leitor do Arrow, então a memória não cresce com o tamanho do arquivo.
+    """
+    formato = formato_intermediario()
+    if formato == "csv":
+        return
+
+    leitor = pacsv.open_csv(
+        caminho_csv,
+        parse_options=pacsv.ParseOptions(delimiter=delimitador),
+        convert_options=pacsv.ConvertOptions(
+            column_types={coluna: pa.type_for_alias(tipo) for coluna, tipo in tipos.items()},
+            strings_can_be_null=True,
+        ),
+    )
+    with _escritor(caminho_tipado(caminho_csv, formato), leitor.schema, formato) as escritor:
+        for lote in leitor:
+            escritor.write_table(pa.Table.from_batches([lote]))
+
+
+def ler_tipado(caminho_csv, colunas=None):
+    # None quando não há versão tipada atual (formato csv, arquivo ausente ou mais velho que o CSV)
+    formato = formato_intermediario()
+    if formato == "csv":
+        return None
+
+    tipado = caminho_tipado(caminho_csv, formato)
+    if not os.path.exists(tipado):
+        return None
+    if os.path.exists(caminho_csv) and os.path.getmtime(tipado) < os.path.getmtime(caminho_csv):
+        return None
+
+    # Leitura mapeada em memória: sem cópia do arquivo para o processo antes do to_pandas.
+    # Inteiros com nulos (Ano/Trimestre) ficam Int64 em vez de virar float
+    inteiros = {pa.int64(): pd.Int64Dtype()}.get
+    if formato == "parquet":
+        return pq.read_table(tipado, columns=colunas, memory_map=True).to_pandas(types_mapper=inteiros)
+
+    with pa.memory_map(tipado) as origem:
+        tabela = pa.ipc.open_file(origem).read_all()
+        if colunas is not None:
+            tabela = tabela.select(colunas)
+        return tabela.to_pandas(types_mapper=inteiros)
+
+
+def ler(caminho_csv, colunas=None, **opcoes_csv):
+    """Lê a saída de uma etapa: a versão tipada se houver, senão o CSV com opcoes_csv."""
+    df = ler_tipado(caminho_csv, colunas)
+    if df is not None:
+        return df
+    return pd.read_csv(caminho_csv, usecols=colunas, **opcoes_csv)
+
+
+def existe(caminho_csv):
+    formato = formato_intermediario()
+    return os.path.exists(caminho_csv) or (formato != "csv" and os.path.exists(caminho_tipado(caminho_csv, formato)))
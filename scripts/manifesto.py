@@ -0,0 +1,150 @@
+import contextlib
+import hashlib
+import json
+import logging
+import os
+import zipfile
+
+# Manifesto da ingestão: formato detectado de cada arquivo de despesas (delimitador,
+# encoding, cabeçalho), guardado junto da impressão digital do arquivo para ser
+# reaproveitado nas próximas execuções sem abrir o arquivo de novo.
+
+BLOCO_SNIFF = 64 * 1024
+DELIMITADORES = [';', ',', '\t']
+EXTENSOES_TEXTO = ('.csv', '.txt')
+
+
+def carregar_manifesto(caminho):
+    try:
+        with open(caminho, encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except ValueError as e:
+        logging.warning(f"Manifesto inválido em {caminho}, será refeito: {e}")
+        return {}
+
+
+def salvar_manifesto(caminho, manifesto):
+    # Grava num temporário e troca: uma execução interrompida não deixa o manifesto pela metade
+    temporario = caminho + '.tmp'
+    with open(temporario, 'w', encoding='utf-8') as f:
+        json.dump(manifesto, f, ensure_ascii=False, indent=2, sort_keys=True)
+    os.replace(temporario, caminho)
+
+
+@contextlib.contextmanager
+def abrir_fonte(caminho, membro=None):
+    # Arquivo binário do disco ou, com membro, de dentro do ZIP (descomprimido em fluxo)
+    if membro is None:
+        with open(caminho, 'rb') as f:
+            yield f
+    else:
+        with zipfile.ZipFile(caminho, 'r') as zf, zf.open(membro) as f:
+            yield f
+
+
+def impressao_digital(caminho, membro=None):
+    """Tamanho, mtime e hash do arquivo, sem ler o conteúdo quando possível.
+
+    Membros de ZIP usam o CRC32 já gravado no ZIP; arquivos soltos ficam sem hash aqui
+    (calcular_hash lê o arquivo inteiro e só roda quando o formato é detectado de novo).
+    """
+    if membro is None:
+        stat = os.stat(caminho)
+        return {"tamanho": stat.st_size, "mtime": stat.st_mtime, "hash": None}
+
+    with zipfile.ZipFile(caminho, 'r') as zf:
+        info = zf.getinfo(membro)
+    return {"tamanho": info.file_size, "mtime": os.stat(caminho).st_mtime, "hash": f"crc32:{info.CRC:08x}"}
+
+
+def calcular_hash(caminho):
+    sha1 = hashlib.sha1()
+    with open(caminho, 'rb') as f:
+        for bloco in iter(lambda: f.read(1024 * 1024), b''):
+            sha1.update(bloco)
+    return f"sha1:{sha1.hexdigest()}"
+
+
+def sniffar(bloco, colunas):
+    """Detecta encoding, delimitador e cabeçalho a partir só do primeiro bloco do arquivo.
+
+    mapa_colunas leva cada coluna esperada ao nome exato no arquivo (caixa/aspas podem
+    variar entre trimestres); sem cabeçalho reconhecível as colunas são lidas na ordem.
+    """
+    # Corta na última quebra de linha: o bloco pode terminar no meio de um caractere
+    if len(bloco) == BLOCO_SNIFF and b'\n' in bloco:
+        bloco = bloco[:bloco.rindex(b'\n')]
+
+    if bloco.startswith(b'\xef\xbb\xbf'):
+        encoding = 'utf-8-sig'
+    else:
+        try:
+            bloco.decode('utf-8')
+            # Só ASCII no início não garante UTF-8 no resto: mantém o latin1 de sempre
+            encoding = 'latin1' if bloco.isascii() else 'utf-8'
+        except UnicodeDecodeError:
+            encoding = 'latin1'
+
+    texto = bloco.decode(encoding, errors='replace')
+    primeira_linha = texto.splitlines()[0] if texto else ''
+    desejadas = {c.upper().strip(): c for c in colunas}
+
+    for sep in DELIMITADORES:
+        nomes = {n.strip('"').strip().upper(): n.strip('"') for n in primeira_linha.split(sep)}
+        if all(d in nomes for d in desejadas):
+            return {
+                "encoding": encoding,
+                "delimitador": sep,
+                "cabecalho": True,
+                "mapa_colunas": {coluna: nomes[d] for d, coluna in desejadas.items()},
+            }
+
+    return {
+        "encoding": encoding,
+        "delimitador": max(DELIMITADORES, key=primeira_linha.count),
+        "cabecalho": False,
+        "mapa_colunas": None,
+    }
+
+
+def detectar_formato(caminho, membro, colunas):
+    if os.path.splitext(membro or caminho)[1].lower() not in EXTENSOES_TEXTO:
+        # Excel: o próprio leitor resolve o formato
+        return {"encoding": None, "delimitador": None, "cabecalho": True, "mapa_colunas": None}
+
+    with abrir_fonte(caminho, membro) as f:
+        return sniffar(f.read(BLOCO_SNIFF), colunas)
+
+
+def resolver_fontes(manifesto, fontes, colunas):
+    """Devolve (entradas, reaproveitadas): uma entrada do manifesto por fonte, na mesma ordem.
+
+    Fontes com o mesmo tamanho/mtime/hash da execução anterior reaproveitam a detecção;
+    as demais são sniffadas de novo. Entradas de arquivos que sumiram são descartadas.
+    """
+    entradas, reaproveitadas = [], 0
+
+    for rotulo, caminho, membro in fontes:
+        digital = impressao_digital(caminho, membro)
+        anterior = manifesto.get(rotulo)
+
+        if anterior and all(anterior.get(k) == v for k, v in digital.items() if v is not None):
+            entradas.append(anterior)
+            reaproveitadas += 1
+            continue
+
+        if digital["hash"] is None:
+            digital["hash"] = calcular_hash(caminho)
+        entradas.append({
+            "caminho": caminho,
+            "membro": membro,
+            **digital,
+            **detectar_formato(caminho, membro, colunas),
+            "linhas": None,
+        })
+
+    manifesto.clear()
+    manifesto.update({rotulo: entrada for (rotulo, _, _), entrada in zip(fontes, entradas)})
+    return entradas, reaproveitadas
@@ -1,33 +1,312 @@
 import pandas as pd
+import argparse
+import csv
+import hashlib
+import io
 import os
 import logging
+import shutil
+import tempfile
+import time
 import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+from intermediarios import converter_csv, gravar
+from manifesto import (
+    abrir_fonte,
+    calcular_hash,
+    carregar_manifesto,
+    detectar_formato,
+    resolver_fontes,
+    salvar_manifesto,
+)
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-def processar_formatos_diferentes(caminho, colunas, chunk_size):
-    extensao = os.path.splitext(caminho)[1].lower()
+EXTENSOES_SUPORTADAS = ('.csv', '.txt', '.xlsx', '.xls')
+COLUNAS_DESPESAS = ['DATA', 'REG_ANS', 'CD_CONTA_CONTABIL', 'DESCRICAO', 'VL_SALDO_INICIAL', 'VL_SALDO_FINAL']
+CHUNK_SIZE = 30000
+
+def ler_csv(caminho, membro, colunas, chunk_size, formato):
+    # Um único read_csv com o formato já detectado (manifesto), sem tentar separador por separador
+    try:
+        with abrir_fonte(caminho, membro) as f:
+            if formato["cabecalho"]:
+                # Lê pelos nomes exatos do arquivo e devolve com os nomes esperados
+                nomes_esperados = {real: coluna for coluna, real in formato["mapa_colunas"].items()}
+                leitor = pd.read_csv(f, sep=formato["delimitador"], usecols=list(nomes_esperados),
+                                     chunksize=chunk_size, encoding=formato["encoding"])
+                for chunk in leitor:
+                    yield chunk.rename(columns=nomes_esperados)
+            else:
+                yield from pd.read_csv(f, sep=formato["delimitador"], names=colunas, chunksize=chunk_size,
+                                       encoding=formato["encoding"], header=None)
+    except Exception as e:
+        logging.error(f"Erro ao processar o arquivo {membro or caminho}: {e}")
+
+def processar_formatos_diferentes(caminho, colunas, chunk_size, membro=None, formato=None):
+    # Com membro, caminho é um ZIP e o arquivo é lido de dentro dele sem extração;
+    # formato vem do manifesto (sem ele, o arquivo é sniffado agora)
+    extensao = os.path.splitext(membro or caminho)[1].lower()
     try:
         if extensao in ['.csv', '.txt']:
-            for sep in [';', ',', '\t']:
-                try:   
-                    df = pd.read_csv(caminho, sep=sep, nrows=0, encoding='latin1')
-                    cols_no_arquivo = [c.upper().strip() for c in df.columns]
-                    cols_desejadas = [c.upper().strip() for c in colunas]
-
-                    if all(c in cols_no_arquivo for c in cols_desejadas):
-                        return pd.read_csv(caminho, sep=sep, usecols=colunas, chunksize=chunk_size, encoding='latin1')
-                except:
-                    continue
-            
-            return pd.read_csv(caminho, sep=';', names=colunas, chunksize=chunk_size, encoding='latin1', header=None)
+            return ler_csv(caminho, membro, colunas, chunk_size, formato or detectar_formato(caminho, membro, colunas))
         elif extensao in ['.xlsx', '.xls']:
-            df_full = pd.read_excel(caminho, usecols=colunas)
-            return [df_full]
+            if membro is None:
+                return [pd.read_excel(caminho, usecols=colunas)]
+            # O leitor de Excel precisa de acesso aleatório: o membro do ZIP vai para memória
+            with abrir_fonte(caminho, membro) as f:
+                return [pd.read_excel(io.BytesIO(f.read()), usecols=colunas)]
     except Exception as e:
-        logging.error(f"Erro ao processar o arquivo {caminho}: {e}")
+        logging.error(f"Erro ao processar o arquivo {membro or caminho}: {e}")
+
+def listar_arquivos(pasta, extensoes=EXTENSOES_SUPORTADAS):
+    # Percorre as subpastas (o extrair_zips.py cria uma por ZIP) em ordem estável
+    encontrados = []
+    for raiz, _, nomes in os.walk(pasta):
+        for nome in nomes:
+            if nome.lower().endswith(extensoes):
+                encontrados.append(os.path.relpath(os.path.join(raiz, nome), pasta))
+    return sorted(encontrados)
+
+def listar_membros_zip(pasta_zips, extensoes=EXTENSOES_SUPORTADAS):
+    # (caminho do ZIP, membro) de todos os ZIPs da pasta, na mesma ordem estável
+    fontes = []
+    for nome_zip in sorted(os.listdir(pasta_zips)):
+        if not nome_zip.lower().endswith('.zip'):
+            continue
+        caminho_zip = os.path.join(pasta_zips, nome_zip)
+        try:
+            with zipfile.ZipFile(caminho_zip, 'r') as zf:
+                membros = [i.filename for i in zf.infolist() if not i.is_dir() and i.filename.lower().endswith(extensoes)]
+        except zipfile.BadZipFile:
+            logging.error(f"Arquivo Zip corrompido: {caminho_zip}")
+            continue
+        fontes += [(caminho_zip, membro) for membro in sorted(membros)]
+    return fontes
+
+def listar_fontes(origem, df_dir, zip_dir):
+    """Lista os arquivos de despesas como (rótulo, caminho, membro).
+
+    origem "zip" lê direto dos ZIPs da ANS (membro = arquivo dentro do ZIP), "extraidos"
+    lê o que o extrair_zips.py gravou; "auto" usa os ZIPs quando existem.
+    """
+    tem_zips = os.path.isdir(zip_dir) and any(n.lower().endswith('.zip') for n in os.listdir(zip_dir))
+    if origem == "zip" or (origem == "auto" and tem_zips):
+        if not tem_zips:
+            logging.error(f"Nenhum ZIP encontrado em {zip_dir}.")
+            return []
+        return [(f"{os.path.basename(z)}/{m}", z, m) for z, m in listar_membros_zip(zip_dir)]
+
+    if not os.path.exists(df_dir):
+        logging.error(f"O diretório {df_dir} não existe.")
+        return []
+    return [(nome, os.path.join(df_dir, nome), None) for nome in listar_arquivos(df_dir)]
+
+def filtrar_chunk(chunk):
+    chunk.columns = chunk.columns.str.lower()
+    chunk['descricao'] = chunk['descricao'].astype(str).str.strip()
+    filtro = chunk['descricao'].str.contains(r"despesas?\s+com\s+(?:eventos?|sinistros?)", case=False, na=False)
+    return chunk[filtro]
+
+def processar_fonte(fonte):
+    """Lê e filtra um arquivo inteiro; roda no processo worker no modo --workers.
+
+    Retorna (rótulo, parcial filtrado ou None, linhas lidas, segundos).
+    """
+    rotulo, caminho, membro, formato = fonte
+    inicio = time.perf_counter()
+    parciais, linhas = [], 0
+
+    dataframe = processar_formatos_diferentes(caminho, COLUNAS_DESPESAS, chunk_size=CHUNK_SIZE, membro=membro, formato=formato)
+    if dataframe is not None:
+        for chunk in dataframe:
+            linhas += len(chunk)
+            parciais.append(filtrar_chunk(chunk))
+
+    parcial = pd.concat(parciais, ignore_index=True) if parciais else None
+    return rotulo, parcial, linhas, time.perf_counter() - inicio
+
+def filtrar_fontes(fontes, workers=1):
+    # map() devolve na ordem das fontes, então o consolidado não depende de qual worker termina antes
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            yield from executor.map(processar_fonte, fontes)
+    else:
+        yield from map(processar_fonte, fontes)
+
+COLUNAS_CONSOLIDADO = ["CNPJ", "RazaoSocial", "Ano", "Trimestre", "ValorDespesas"]
+# Tipos da versão Parquet/Arrow do consolidado (FORMATO_INTERMEDIARIO)
+TIPOS_CONSOLIDADO = {"CNPJ": "string", "RazaoSocial": "string", "Ano": "int64", "Trimestre": "int64", "ValorDespesas": "double"}
+
+def carregar_cadastro(cadastro_dir):
+    # Ponte REG_ANS -> CNPJ / razão social
+    caminho_cad = os.path.join(cadastro_dir, "Relatorio_cadop.csv")
+    df_cadastral = pd.read_csv(caminho_cad, sep=';', encoding='latin1', dtype=str)
+    df_cadastral.columns = [c.strip().upper() for c in df_cadastral.columns]
+
+    mapa_cnpj = df_cadastral.set_index('REGISTRO_OPERADORA')['CNPJ'].to_dict()
+    mapa_razao = df_cadastral.set_index('REGISTRO_OPERADORA')['RAZAO_SOCIAL'].to_dict()
+    return mapa_cnpj, mapa_razao
+
+def transformar(df_final, mapa_cnpj, mapa_razao):
+    # Data -> ano/trimestre, valor da despesa e mapeamento do cadastro; serve para um chunk ou para tudo
+    df_final["data"] = pd.to_datetime(df_final["data"], errors="coerce")
+    # Int64: datas inválidas viram vazio em vez de transformar a coluna em float ("2025.0")
+    df_final["ano"] = df_final["data"].dt.year.astype("Int64")
+    df_final["trimestre"] = df_final["data"].dt.quarter.astype("Int64")
+
+    saldo_ini = pd.to_numeric(df_final["vl_saldo_inicial"].astype(str).str.replace(",", "."), errors="coerce")
+    saldo_fim = pd.to_numeric(df_final["vl_saldo_final"].astype(str).str.replace(",", "."), errors="coerce")
+    df_final["valor_despesas"] = abs(saldo_fim - saldo_ini).round(2)
+
+    df_final['reg_ans_str'] = df_final['reg_ans'].astype(str).str.replace('.0', '', regex=False).str.strip()
+    df_final["cnpj"] = df_final["reg_ans_str"].map(mapa_cnpj)
+    df_final["razao_social"] = df_final["reg_ans_str"].map(mapa_razao)
+
+    return pd.DataFrame({
+        "CNPJ": df_final["cnpj"],
+        "RazaoSocial": df_final["razao_social"],
+        "Ano": df_final["ano"],
+        "Trimestre": df_final["trimestre"],
+        "ValorDespesas": df_final["valor_despesas"]
+    })
+
+def transformar_fonte_streaming(tarefa):
+    """Modo --streaming: cada chunk é filtrado, transformado e gravado na hora.
+
+    Grava a parte do arquivo (sem cabeçalho) em caminho_parte; a memória fica limitada ao
+    tamanho do chunk. Retorna (rótulo, linhas lidas, linhas gravadas, segundos).
+    """
+    (rotulo, caminho, membro, formato), mapa_cnpj, mapa_razao, caminho_parte = tarefa
+    inicio = time.perf_counter()
+    linhas, gravadas = 0, 0
+
+    dataframe = processar_formatos_diferentes(caminho, COLUNAS_DESPESAS, chunk_size=CHUNK_SIZE, membro=membro, formato=formato)
+    with open(caminho_parte, 'w', encoding='utf-8', newline='') as f:
+        for chunk in dataframe if dataframe is not None else []:
+            linhas += len(chunk)
+            filtrado = filtrar_chunk(chunk)
+            if len(filtrado):
+                # copy(): o filtro devolve uma fatia do chunk, que transformar() altera
+                transformar(filtrado.copy(), mapa_cnpj, mapa_razao).to_csv(f, index=False, header=False, sep=";")
+                gravadas += len(filtrado)
+
+    return rotulo, linhas, gravadas, time.perf_counter() - inicio
+
+def consolidar_streaming(fontes, mapa_cnpj, mapa_razao, caminho_csv, workers=1, manifesto=None):
+    # Uma parte por arquivo (em paralelo com --workers), depois concatenadas na ordem das fontes
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(caminho_csv)) as pasta_partes:
+        tarefas = [
+            (fonte, mapa_cnpj, mapa_razao, os.path.join(pasta_partes, f"parte_{i:05d}.csv"))
+            for i, fonte in enumerate(fontes)
+        ]
+
+        total = executar_tarefas_streaming(tarefas, workers, manifesto)
+        concatenar_partes([t[-1] for t in tarefas], caminho_csv)
+
+    return total
+
+def executar_tarefas_streaming(tarefas, workers=1, manifesto=None):
+    total = 0
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            resultados = list(executor.map(transformar_fonte_streaming, tarefas))
+    else:
+        resultados = map(transformar_fonte_streaming, tarefas)
+    for rotulo, linhas, gravadas, duracao in resultados:
+        logging.info(f"{rotulo}: {linhas} linhas lidas, {gravadas} gravadas em {duracao:.2f}s")
+        if manifesto is not None:
+            manifesto[rotulo]["linhas"] = linhas
+        total += gravadas
+    return total
 
-def executar_processamento():
+def concatenar_partes(caminhos_partes, caminho_csv):
+    with open(caminho_csv, 'w', encoding='utf-8-sig', newline='') as saida:
+        pd.DataFrame(columns=COLUNAS_CONSOLIDADO).to_csv(saida, index=False, sep=";")
+        for caminho_parte in caminhos_partes:
+            with open(caminho_parte, 'r', encoding='utf-8', newline='') as parte:
+                shutil.copyfileobj(parte, saida)
+
+# ---- Modo incremental ----
+
+def chave_despesa(cnpj, ano, trimestre):
+    # Mesma normalização do 03_validacoes.sql para o CNPJ (só dígitos)
+    return ("".join(c for c in cnpj if c.isdigit()), ano, trimestre)
+
+def chaves_da_parte(caminho_parte):
+    # (cnpj, ano, trimestre) presentes numa parte já transformada (CSV sem cabeçalho)
+    chaves = set()
+    if os.path.exists(caminho_parte):
+        with open(caminho_parte, 'r', encoding='utf-8', newline='') as f:
+            for cnpj, _, ano, trimestre, _ in csv.reader(f, delimiter=';'):
+                chaves.add(chave_despesa(cnpj, ano, trimestre))
+    return chaves
+
+def consolidar_incremental(fontes, mapa_cnpj, mapa_razao, caminho_csv, pasta_partes, hash_cadastro,
+                           workers=1, manifesto=None):
+    """Modo --incremental: guarda a parte transformada de cada arquivo entre execuções.
+
+    Só arquivos novos ou alterados (impressão digital do manifesto diferente da usada na
+    parte guardada) são lidos de novo; o consolidado é remontado a partir das partes.
+    Retorna (alterações, arquivos relidos); alterações["completo"] indica que tudo foi
+    refeito (primeira execução ou cadastro alterado), senão alterações["chaves"] lista os
+    (cnpj, ano, trimestre) cujas linhas mudaram.
+    """
+    os.makedirs(pasta_partes, exist_ok=True)
+    caminho_estado = os.path.join(pasta_partes, "estado.json")
+    estado = carregar_manifesto(caminho_estado)
+    # A ponte REG_ANS -> CNPJ entra em todas as partes: cadastro novo refaz tudo
+    completo = estado.get("cadastro") != hash_cadastro
+    anteriores = {} if completo else estado.get("partes", {})
+
+    atuais, tarefas, chaves = {}, [], set()
+    for fonte in fontes:
+        rotulo, formato = fonte[0], fonte[3]
+        digital = {k: formato[k] for k in ("tamanho", "mtime", "hash")}
+        nome_parte = hashlib.sha1(rotulo.encode("utf-8")).hexdigest()[:16] + ".csv"
+        caminho_parte = os.path.join(pasta_partes, nome_parte)
+        atuais[rotulo] = {"parte": nome_parte, **digital}
+
+        anterior = anteriores.get(rotulo)
+        if anterior == atuais[rotulo] and os.path.exists(caminho_parte):
+            continue
+
+        # Grava ao lado e só troca no fim: uma execução interrompida mantém as partes antigas
+        chaves |= chaves_da_parte(caminho_parte)
+        tarefas.append((fonte, mapa_cnpj, mapa_razao, caminho_parte + ".novo"))
+
+    removidas = [info["parte"] for rotulo, info in anteriores.items() if rotulo not in atuais]
+    for nome_parte in removidas:
+        chaves |= chaves_da_parte(os.path.join(pasta_partes, nome_parte))
+
+    executar_tarefas_streaming(tarefas, workers, manifesto)
+    for *_, caminho_novo in tarefas:
+        chaves |= chaves_da_parte(caminho_novo)
+        os.replace(caminho_novo, caminho_novo[:-len(".novo")])
+    for nome_parte in removidas:
+        os.remove(os.path.join(pasta_partes, nome_parte))
+
+    if tarefas or removidas:
+        concatenar_partes([os.path.join(pasta_partes, info["parte"]) for info in atuais.values()], caminho_csv)
+    salvar_manifesto(caminho_estado, {"cadastro": hash_cadastro, "partes": atuais})
+
+    alteracoes = {"completo": completo, "chaves": [] if completo else sorted(chaves)}
+    return alteracoes, len(tarefas) + len(removidas)
+
+def compactar(caminho_csv):
+    caminho_zip = os.path.splitext(caminho_csv)[0] + ".zip"
+    with zipfile.ZipFile(caminho_zip, 'w', zipfile.ZIP_DEFLATED) as zipf:
+        # zipf.write lê o CSV do disco em blocos
+        zipf.write(caminho_csv, os.path.basename(caminho_csv))
+
+def executar_processamento(origem="auto", workers=1, streaming=False, incremental=False):
+    """Gera consolidado_despesas.csv/.zip e alteracoes.json ao lado.
+
+    Retorna as alterações ainda pendentes de carga no banco, somadas às desta execução
+    ({"completo": bool, "chaves": [(cnpj, ano, trimestre), ...]}), ou None em caso de erro;
+    fora do modo incremental a carga é sempre completa.
+    """
     # --- MAPEAMENTO DE DIRETÓRIOS ---
     # 1. Localiza a pasta onde este script está (scripts_python)
     BASE_SCRIPTS = os.path.dirname(os.path.abspath(__file__))
@@ -42,77 +321,116 @@ def executar_processamento():
     DF_DIR = os.path.join(RAIZ_DADOS, "arquivos_extraidos")
     CADASTRO_DIR = os.path.join(RAIZ_DADOS, "dados_cadastrais")
     CONSOLIDADO_DIR = os.path.join(RAIZ_DADOS, "consolidado_despesas")
+    ZIP_DIR = os.path.join(RAIZ_DADOS, "arquivoszip")
 
-    if not os.path.exists(DF_DIR):
-        logging.error(f"O diretório {DF_DIR} não existe.")
+    fontes = listar_fontes(origem, DF_DIR, ZIP_DIR)
+    if not fontes:
         return
 
+    # Formato de cada arquivo: reaproveitado do manifesto quando o arquivo não mudou
+    caminho_manifesto = os.path.join(RAIZ_DADOS, "manifesto_ingestao.json")
+    manifesto = carregar_manifesto(caminho_manifesto)
+    formatos, reaproveitados = resolver_fontes(manifesto, fontes, COLUNAS_DESPESAS)
+    salvar_manifesto(caminho_manifesto, manifesto)
+    logging.info(f"Manifesto: formato reaproveitado em {reaproveitados} de {len(fontes)} arquivos")
+    fontes = [(*fonte, formato) for fonte, formato in zip(fontes, formatos)]
+
     os.makedirs(CONSOLIDADO_DIR, exist_ok=True)
-    
-    colunas = ['DATA', 'REG_ANS', 'CD_CONTA_CONTABIL', 'DESCRICAO', 'VL_SALDO_INICIAL', 'VL_SALDO_FINAL']
-    df_list = []
-
-    # 1. Processamento dos arquivos de despesas
-    for nome_arquivo in sorted(os.listdir(DF_DIR)):
-        if nome_arquivo.endswith(('.csv', '.txt', '.xlsx', '.xls')):
-            caminho = os.path.join(DF_DIR, nome_arquivo)
-            dataframe = processar_formatos_diferentes(caminho, colunas, chunk_size=30000)
-
-            if dataframe is not None:
-                for chunk in dataframe:
-                    chunk.columns = chunk.columns.str.lower()
-                    chunk['descricao'] = chunk['descricao'].astype(str).str.strip()
-                    filtro = chunk['descricao'].str.contains(r"despesas?\s+com\s+(?:eventos?|sinistros?)", case=False, na=False)
-                    df_list.append(chunk[filtro])
-
-    if df_list:
-        df_final = pd.concat(df_list, ignore_index=True)
-
-        # 2. Carregamento do Cadastro (Ponte)
-        try:
-            caminho_cad = os.path.join(CADASTRO_DIR, "Relatorio_cadop.csv")
-            df_cadastral = pd.read_csv(caminho_cad, sep=';', encoding='latin1', dtype=str)
-            df_cadastral.columns = [c.strip().upper() for c in df_cadastral.columns]
-            
-            mapa_cnpj = df_cadastral.set_index('REGISTRO_OPERADORA')['CNPJ'].to_dict()
-            mapa_razao = df_cadastral.set_index('REGISTRO_OPERADORA')['RAZAO_SOCIAL'].to_dict()
-        except Exception as e:
-            logging.error(f"Erro ao carregar cadastro em {caminho_cad}: {e}")
+    caminho_csv = os.path.join(CONSOLIDADO_DIR, "consolidado_despesas.csv")
+
+    # 1. Carregamento do Cadastro (Ponte), antes de ler as despesas
+    try:
+        mapa_cnpj, mapa_razao = carregar_cadastro(CADASTRO_DIR)
+    except Exception as e:
+        logging.error(f"Erro ao carregar cadastro em {CADASTRO_DIR}: {e}")
+        return
+
+    inicio = time.perf_counter()
+    alteracoes = {"completo": True, "chaves": []}
+
+    if incremental:
+        # 2. Só arquivos novos/alterados são lidos; o resto vem das partes guardadas
+        alteracoes, relidos = consolidar_incremental(
+            fontes, mapa_cnpj, mapa_razao, caminho_csv, os.path.join(RAIZ_DADOS, "partes_consolidado"),
+            calcular_hash(os.path.join(CADASTRO_DIR, "Relatorio_cadop.csv")), workers, manifesto
+        )
+        salvar_manifesto(caminho_manifesto, manifesto)
+        logging.info(
+            f"Incremental: {relidos} de {len(fontes)} arquivos relidos, "
+            f"{'carga completa' if alteracoes['completo'] else str(len(alteracoes['chaves'])) + ' chaves alteradas'} "
+            f"em {time.perf_counter() - inicio:.2f}s"
+        )
+        if not relidos:
+            # Nada mudou: consolidado e ZIP continuam os da execução anterior
+            return gravar_alteracoes(CONSOLIDADO_DIR, alteracoes)
+    elif streaming:
+        # 2. Cada chunk já sai transformado para o CSV: memória limitada ao tamanho do chunk
+        total = consolidar_streaming(fontes, mapa_cnpj, mapa_razao, caminho_csv, workers, manifesto)
+        salvar_manifesto(caminho_manifesto, manifesto)
+        logging.info(f"Leitura de {len(fontes)} arquivos concluída em {time.perf_counter() - inicio:.2f}s ({workers} worker(s))")
+        if not total:
+            logging.warning("Nenhum dado filtrado encontrado para consolidar.")
+            return
+    else:
+        df_list = []
+
+        # 2. Processamento dos arquivos de despesas (um arquivo por worker com --workers > 1)
+        for rotulo, parcial, linhas, duracao in filtrar_fontes(fontes, workers):
+            filtradas = len(parcial) if parcial is not None else 0
+            logging.info(f"{rotulo}: {linhas} linhas lidas, {filtradas} filtradas em {duracao:.2f}s")
+            manifesto[rotulo]["linhas"] = linhas
+            if filtradas:
+                df_list.append(parcial)
+        salvar_manifesto(caminho_manifesto, manifesto)
+        logging.info(f"Leitura de {len(fontes)} arquivos concluída em {time.perf_counter() - inicio:.2f}s ({workers} worker(s))")
+
+        if not df_list:
+            logging.warning("Nenhum dado filtrado encontrado para consolidar.")
             return
 
         # 3. Tratamento de dados
-        df_final["data"] = pd.to_datetime(df_final["data"], errors="coerce")
-        df_final["ano"] = df_final["data"].dt.year
-        df_final["trimestre"] = df_final["data"].dt.quarter
-        
-        saldo_ini = pd.to_numeric(df_final["vl_saldo_inicial"].astype(str).str.replace(",", "."), errors="coerce")
-        saldo_fim = pd.to_numeric(df_final["vl_saldo_final"].astype(str).str.replace(",", "."), errors="coerce")
-        df_final["valor_despesas"] = abs(saldo_fim - saldo_ini).round(2)
-
-        df_final['reg_ans_str'] = df_final['reg_ans'].astype(str).str.replace('.0', '', regex=False).str.strip()
-        df_final["cnpj"] = df_final["reg_ans_str"].map(mapa_cnpj)
-        df_final["razao_social"] = df_final["reg_ans_str"].map(mapa_razao)
-
-        # 4. Exportação
-        df_consolidado = pd.DataFrame({
-            "CNPJ": df_final["cnpj"],
-            "RazaoSocial": df_final["razao_social"],
-            "Ano": df_final["ano"],
-            "Trimestre": df_final["trimestre"],
-            "ValorDespesas": df_final["valor_despesas"]
-        })
-
-        caminho_csv = os.path.join(CONSOLIDADO_DIR, "consolidado_despesas.csv")
-        df_consolidado.to_csv(caminho_csv, index=False, encoding="utf-8-sig", sep=";")
-
-        caminho_zip = os.path.join(CONSOLIDADO_DIR, "consolidado_despesas.zip")
-        with zipfile.ZipFile(caminho_zip, 'w', zipfile.ZIP_DEFLATED) as zipf:
-            # zipf.write(caminho_csv, arcname="consolidado_despesas.csv")
-            zipf.write(caminho_csv, os.path.basename(caminho_csv))
-
-        logging.info(f"Sucesso! Arquivo consolidado gerado em: {CONSOLIDADO_DIR}")
-    else:
-        logging.warning("Nenhum dado filtrado encontrado para consolidar.")
+        df_consolidado = transformar(pd.concat(df_list, ignore_index=True), mapa_cnpj, mapa_razao)
+
+        # 4. Exportação (o CSV é entrega final; a versão tipada só existe com FORMATO_INTERMEDIARIO)
+        gravar(df_consolidado, caminho_csv, manter_csv=True, index=False, encoding="utf-8-sig", sep=";")
+
+    if streaming or incremental:
+        # Consolidado montado por concatenação de partes: a versão tipada sai do próprio CSV
+        converter_csv(caminho_csv, TIPOS_CONSOLIDADO)
+    compactar(caminho_csv)
+    pendentes = gravar_alteracoes(CONSOLIDADO_DIR, alteracoes)
+    logging.info(f"Sucesso! Arquivo consolidado gerado em: {CONSOLIDADO_DIR}")
+    return pendentes
+
+def gravar_alteracoes(consolidado_dir, alteracoes):
+    """Soma as alterações desta execução às pendentes de carga em alteracoes.json.
+
+    O arquivo só é baixado pelo supabase_script/carga_incremental.py depois do commit no
+    banco: execuções com --sem-banco, cargas que falharam ou duas execuções seguidas não
+    perdem chaves. Retorna as pendentes.
+    """
+    caminho = os.path.join(consolidado_dir, "alteracoes.json")
+    pendentes = carregar_manifesto(caminho)
+    if os.path.exists(caminho) and not pendentes:
+        # Arquivo ilegível: não dá para saber o que faltou carregar
+        pendentes = {"completo": True}
+
+    completo = alteracoes["completo"] or pendentes.get("completo", False)
+    chaves = set() if completo else {tuple(c) for c in pendentes.get("chaves", []) + list(alteracoes["chaves"])}
+    pendentes = {"completo": completo, "chaves": sorted(chaves)}
+    salvar_manifesto(caminho, pendentes)
+    return pendentes
 
 if __name__ == "__main__":
-    executar_processamento()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Consolida as despesas com eventos/sinistros dos arquivos da ANS")
+    parser.add_argument("--origem", choices=["auto", "zip", "extraidos"], default="auto",
+                        help="ler direto dos ZIPs (sem extração) ou de arquivos_extraidos")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="processos lendo arquivos em paralelo (0 = núcleos da máquina)")
+    parser.add_argument("--streaming", action="store_true",
+                        help="grava cada chunk já transformado (memória limitada ao tamanho do chunk)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="relê só arquivos novos/alterados, reaproveitando as partes da execução anterior")
+    args = parser.parse_args()
+
+    executar_processamento(args.origem, args.workers or os.cpu_count(), args.streaming, args.incremental)
\ No newline at end of file
@@ -3,6 +3,8 @@ import re
 import logging
 import pandas as pd
 
+from intermediarios import gravar, ler
+
 # Retorna um objeto Logger com o nome "validador_cnpj"
 logger = logging.getLogger("validador_cnpj")
 # logs para debug
@@ -77,6 +79,9 @@ class ValidadorDados:
     def parse_num(self, valor):
         if pd.isna(valor):
             return None
+        # consolidado lido do Parquet/Arrow já vem numérico: sem parse de texto
+        if isinstance(valor, (int, float)):
+            return float(valor)
         string = str(valor).strip()
         if string == "":
             return None
@@ -124,7 +129,7 @@ class ValidadorDados:
             return None
 
         self.logger.info("Lendo arquivo consolidado: %s", caminho_csv)
-        df = pd.read_csv(caminho_csv, sep=';', dtype=str, encoding='utf-8-sig', keep_default_na=False)
+        df = ler(caminho_csv, sep=';', dtype=str, encoding='utf-8-sig', keep_default_na=False)
 
         # detectar nomes de coluna comuns
         cols = [c.lower() for c in df.columns]
@@ -196,7 +201,7 @@ class ValidadorDados:
             out = os.path.join(target_dir, "consolidado_validado.csv")
 
         try:
-            df.to_csv(out, index=False, sep=';', encoding='utf-8-sig')
+            gravar(df, out, index=False, sep=';', encoding='utf-8-sig')
             self.logger.info("Arquivo validado salvo em: %s", out)
         except Exception as e:
             self.logger.warning("Falha ao salvar arquivo validado: %s", e)
@@ -4,5 +4,11 @@ DROP TABLE IF EXISTS
     dados_cadastrais,
     staging_consolidado_despesas,
     staging_dados_cadastrais,
-    staging_despesas_agregadas
+    staging_despesas_agregadas,
+    rollup_estatisticas_globais,
+    rollup_top_operadoras,
+    rollup_despesas_uf,
+    rollup_indicadores_operadora,
+    rollup_despesas_trimestrais,
+    rollup_cubo_despesas
 CASCADE;
@@ -1,3 +1,15 @@
+-- EXTENSÕES PARA BUSCA TEXTUAL (TRIGRAM E REMOÇÃO DE ACENTOS)
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE EXTENSION IF NOT EXISTS unaccent;
+
+-- unaccent() não é IMMUTABLE, então não pode ser usada direto em índice;
+-- este wrapper fixa o dicionário e normaliza caixa para busca ("ASSISTÊNCIA" = "assistencia")
+CREATE OR REPLACE FUNCTION f_normalizar_busca(texto TEXT)
+RETURNS TEXT
+LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+SET search_path = public, extensions, pg_catalog
+AS $$ SELECT lower(unaccent('unaccent'::regdictionary, texto)) $$;
+
 -- TABELA DE DADOS CADASTRAIS DAS OPERADORAS ATIVAS 
 CREATE TABLE IF NOT EXISTS dados_cadastrais (
     registro_operadora VARCHAR(50),
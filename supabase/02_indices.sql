@@ -2,4 +2,16 @@
 CREATE INDEX idx_despesas_cnpj ON consolidado_despesas(cnpj);
 CREATE INDEX idx_despesas_data ON consolidado_despesas(Ano, Trimestre);
 CREATE INDEX idx_agregadas_razao_uf
-ON despesas_agregadas(razao_social, uf);
\ No newline at end of file
+ON despesas_agregadas(razao_social, uf);
+
+-- INDICES PARA PAGINAÇÃO POR CURSOR (KEYSET)
+CREATE INDEX idx_cadastrais_razao_cnpj
+ON dados_cadastrais ((COALESCE(razao_social, '')), cnpj);
+CREATE INDEX idx_despesas_cnpj_periodo
+ON consolidado_despesas(cnpj, ano, trimestre, id_despesa);
+
+-- INDICES PARA BUSCA DE OPERADORAS (RAZÃO SOCIAL SEM ACENTO/CAIXA E PREFIXO DE CNPJ)
+CREATE INDEX idx_cadastrais_razao_trgm
+ON dados_cadastrais USING gin (f_normalizar_busca(razao_social) gin_trgm_ops);
+CREATE INDEX idx_cadastrais_cnpj_prefixo
+ON dados_cadastrais (cnpj varchar_pattern_ops);
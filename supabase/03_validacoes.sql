@@ -84,12 +84,14 @@ SELECT
     -- Trimestre: aceita apenas 1 a 4
     trimestre::INT,
 
-    -- Valor: troca vírgula por ponto, converte para decimal
+    -- Valor: o consolidado usa ponto decimal; com vírgula é o padrão brasileiro (1.234,56).
+    -- Mesma conversão do _valor do modo snapshot (backend/services/snapshot_service.py)
     NULLIF(
-        REPLACE(
-            REGEXP_REPLACE(valor_despesas, '[^0-9,]', '', 'g'),
-            ',', '.'
-        ),
+        CASE
+            WHEN valor_despesas LIKE '%,%'
+                THEN REPLACE(REGEXP_REPLACE(valor_despesas, '[^0-9,]', '', 'g'), ',', '.')
+            ELSE REGEXP_REPLACE(valor_despesas, '[^0-9.]', '', 'g')
+        END,
         ''
     )::DECIMAL(15,2) AS valor_despesas
 
@@ -135,3 +137,9 @@ SELECT
     )::DECIMAL(15,2) AS desvio_padrao
 
 FROM staging_despesas_agregadas;
+
+
+-- ATUALIZA AS ESTATÍSTICAS DO PLANNER (USADAS TAMBÉM NAS CONTAGENS ESTIMADAS DA API)
+ANALYZE dados_cadastrais;
+ANALYZE consolidado_despesas;
+ANALYZE despesas_agregadas;
@@ -0,0 +1,114 @@
+-- TABELAS DE ROLLUP (PRÉ-AGREGADOS LIDOS PELA API NO LUGAR DE SUM/AVG/GROUP BY EM TEMPO DE CONSULTA)
+-- Recalculadas pelo processar_sql.py a cada carga, depois do 03_validacoes.sql
+
+-- TOTAIS GERAIS (LINHA ÚNICA)
+CREATE TABLE IF NOT EXISTS rollup_estatisticas_globais (
+    id INT PRIMARY KEY DEFAULT 1 CHECK (id = 1),
+    total_despesas NUMERIC,
+    media_despesas NUMERIC,
+    qtd_registros BIGINT,
+    atualizado_em TIMESTAMPTZ DEFAULT now()
+);
+
+-- RANKING DE OPERADORAS POR DESPESA TOTAL
+CREATE TABLE IF NOT EXISTS rollup_top_operadoras (
+    posicao INT PRIMARY KEY,
+    razao_social VARCHAR(255),
+    total_despesas NUMERIC
+);
+
+-- TOTAL DE DESPESAS POR UF
+CREATE TABLE IF NOT EXISTS rollup_despesas_uf (
+    uf CHAR(2) PRIMARY KEY,
+    total NUMERIC
+);
+
+-- INDICADORES POR OPERADORA (CNPJ)
+CREATE TABLE IF NOT EXISTS rollup_indicadores_operadora (
+    cnpj VARCHAR(14) PRIMARY KEY,
+    total_valor NUMERIC,
+    media_valor NUMERIC,
+    anos_ativos INT,
+    qtd_registros BIGINT
+);
+
+-- SÉRIE TRIMESTRAL POR OPERADORA (UM PONTO POR CNPJ/ANO/TRIMESTRE, JÁ SOMADO)
+CREATE TABLE IF NOT EXISTS rollup_despesas_trimestrais (
+    cnpj VARCHAR(14),
+    ano INT,
+    trimestre INT,
+    total NUMERIC,
+    qtd_registros BIGINT,
+    PRIMARY KEY (cnpj, ano, trimestre)
+);
+
+-- CUBO DE DESPESAS POR UF/MODALIDADE/ANO/TRIMESTRE (BASE DO /api/ranking)
+-- Operadoras sem cadastro entram como 'NAO_INFORMADO', como na QUERY 2 do 04_queries_analiticas.sql
+CREATE TABLE IF NOT EXISTS rollup_cubo_despesas (
+    uf VARCHAR(20),
+    modalidade VARCHAR(100),
+    ano INT,
+    trimestre INT,
+    total NUMERIC,
+    qtd_registros BIGINT
+);
+
+TRUNCATE
+    rollup_estatisticas_globais,
+    rollup_top_operadoras,
+    rollup_despesas_uf,
+    rollup_indicadores_operadora,
+    rollup_despesas_trimestrais,
+    rollup_cubo_despesas;
+
+INSERT INTO rollup_estatisticas_globais (id, total_despesas, media_despesas, qtd_registros)
+SELECT 1, SUM(valor_despesas), AVG(valor_despesas), COUNT(*)
+FROM consolidado_despesas;
+
+INSERT INTO rollup_top_operadoras (posicao, razao_social, total_despesas)
+SELECT
+    ROW_NUMBER() OVER (ORDER BY SUM(valor_despesas) DESC NULLS LAST, razao_social) AS posicao,
+    razao_social,
+    SUM(valor_despesas) AS total_despesas
+FROM consolidado_despesas
+GROUP BY razao_social;
+
+INSERT INTO rollup_despesas_uf (uf, total)
+SELECT d.uf, SUM(c.valor_despesas) AS total
+FROM dados_cadastrais d
+JOIN consolidado_despesas c ON d.cnpj = c.cnpj
+GROUP BY d.uf;
+
+INSERT INTO rollup_indicadores_operadora (cnpj, total_valor, media_valor, anos_ativos, qtd_registros)
+SELECT
+    cnpj,
+    COALESCE(SUM(valor_despesas), 0),
+    COALESCE(AVG(valor_despesas), 0),
+    COUNT(DISTINCT ano),
+    COUNT(*)
+FROM consolidado_despesas
+WHERE cnpj IS NOT NULL
+GROUP BY cnpj;
+
+INSERT INTO rollup_despesas_trimestrais (cnpj, ano, trimestre, total, qtd_registros)
+SELECT
+    cnpj,
+    ano,
+    trimestre,
+    COALESCE(SUM(valor_despesas), 0),
+    COUNT(*)
+FROM consolidado_despesas
+WHERE cnpj IS NOT NULL
+GROUP BY cnpj, ano, trimestre;
+
+INSERT INTO rollup_cubo_despesas (uf, modalidade, ano, trimestre, total, qtd_registros)
+SELECT
+    COALESCE(d.uf, 'NAO_INFORMADO'),
+    COALESCE(d.modalidade, 'NAO_INFORMADO'),
+    c.ano,
+    c.trimestre,
+    COALESCE(SUM(c.valor_despesas), 0),
+    COUNT(*)
+FROM consolidado_despesas c
+LEFT JOIN dados_cadastrais d ON d.cnpj = c.cnpj
+GROUP BY 1, 2, 3, 4;
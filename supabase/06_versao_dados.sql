@@ -0,0 +1,10 @@
+-- REGISTRA A VERSÃO DOS DADOS (MOMENTO DA ÚLTIMA CARGA)
+-- Usada pela API para ETag/Last-Modified: respostas só mudam quando há nova carga
+CREATE TABLE IF NOT EXISTS versao_dados (
+    id INT PRIMARY KEY DEFAULT 1 CHECK (id = 1),
+    carregado_em TIMESTAMPTZ NOT NULL
+);
+
+INSERT INTO versao_dados (id, carregado_em)
+VALUES (1, clock_timestamp())
+ON CONFLICT (id) DO UPDATE SET carregado_em = EXCLUDED.carregado_em;
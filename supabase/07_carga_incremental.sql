@@ -0,0 +1,153 @@
+-- CARGA INCREMENTAL (EXECUTADA PELO supabase_script/carga_incremental.py NO LUGAR DO 00 AO 05)
+-- Espera, na mesma transação:
+--   chaves_alteradas (TEMP): cnpj, ano, trimestre cujas linhas mudaram desde a última carga
+--   staging_consolidado_despesas: só as linhas atuais dessas chaves
+--   staging_despesas_agregadas: o despesas_agregadas.csv completo (uma linha por operadora/UF)
+
+-- 1. TROCA AS LINHAS DAS CHAVES ALTERADAS (CNPJ NULO = DESPESA SEM CADASTRO)
+DELETE FROM consolidado_despesas c
+USING chaves_alteradas k
+WHERE c.cnpj IS NOT DISTINCT FROM k.cnpj
+  AND c.ano = k.ano
+  AND c.trimestre = k.trimestre;
+
+INSERT INTO consolidado_despesas (
+    cnpj,
+    razao_social,
+    ano,
+    trimestre,
+    valor_despesas
+)
+SELECT
+    REGEXP_REPLACE(cnpj, '[^0-9]', '', 'g') AS cnpj,
+    NULLIF(TRIM(razao_social), '') AS razao_social,
+    ano::INT,
+    trimestre::INT,
+    NULLIF(
+        CASE
+            WHEN valor_despesas LIKE '%,%'
+                THEN REPLACE(REGEXP_REPLACE(valor_despesas, '[^0-9,]', '', 'g'), ',', '.')
+            ELSE REGEXP_REPLACE(valor_despesas, '[^0-9.]', '', 'g')
+        END,
+        ''
+    )::DECIMAL(15,2) AS valor_despesas
+FROM staging_consolidado_despesas
+WHERE
+    ano ~ '^\d{4}$'
+    AND trimestre IN ('1','2','3','4');
+
+-- 2. ROLLUPS POR CHAVE: SÓ AS LINHAS/OPERADORAS/CÉLULAS AFETADAS SÃO RECALCULADAS
+
+-- SÉRIE TRIMESTRAL
+DELETE FROM rollup_despesas_trimestrais r
+USING chaves_alteradas k
+WHERE r.cnpj = k.cnpj
+  AND r.ano = k.ano
+  AND r.trimestre = k.trimestre;
+
+INSERT INTO rollup_despesas_trimestrais (cnpj, ano, trimestre, total, qtd_registros)
+SELECT
+    c.cnpj,
+    c.ano,
+    c.trimestre,
+    COALESCE(SUM(c.valor_despesas), 0),
+    COUNT(*)
+FROM consolidado_despesas c
+JOIN (SELECT DISTINCT cnpj, ano, trimestre FROM chaves_alteradas WHERE cnpj IS NOT NULL) k
+    ON c.cnpj = k.cnpj AND c.ano = k.ano AND c.trimestre = k.trimestre
+GROUP BY c.cnpj, c.ano, c.trimestre;
+
+-- INDICADORES DAS OPERADORAS AFETADAS
+DELETE FROM rollup_indicadores_operadora
+WHERE cnpj IN (SELECT cnpj FROM chaves_alteradas);
+
+INSERT INTO rollup_indicadores_operadora (cnpj, total_valor, media_valor, anos_ativos, qtd_registros)
+SELECT
+    cnpj,
+    COALESCE(SUM(valor_despesas), 0),
+    COALESCE(AVG(valor_despesas), 0),
+    COUNT(DISTINCT ano),
+    COUNT(*)
+FROM consolidado_despesas
+WHERE cnpj IN (SELECT cnpj FROM chaves_alteradas)
+GROUP BY cnpj;
+
+-- CÉLULAS DO CUBO (UF/MODALIDADE/ANO/TRIMESTRE) QUE CONTÊM ALGUMA CHAVE ALTERADA
+CREATE TEMP TABLE celulas_alteradas ON COMMIT DROP AS
+SELECT DISTINCT
+    COALESCE(d.uf, 'NAO_INFORMADO') AS uf,
+    COALESCE(d.modalidade, 'NAO_INFORMADO') AS modalidade,
+    k.ano,
+    k.trimestre
+FROM chaves_alteradas k
+LEFT JOIN dados_cadastrais d ON d.cnpj = k.cnpj;
+
+DELETE FROM rollup_cubo_despesas r
+USING celulas_alteradas a
+WHERE r.uf = a.uf
+  AND r.modalidade = a.modalidade
+  AND r.ano = a.ano
+  AND r.trimestre = a.trimestre;
+
+INSERT INTO rollup_cubo_despesas (uf, modalidade, ano, trimestre, total, qtd_registros)
+SELECT
+    COALESCE(d.uf, 'NAO_INFORMADO'),
+    COALESCE(d.modalidade, 'NAO_INFORMADO'),
+    c.ano,
+    c.trimestre,
+    COALESCE(SUM(c.valor_despesas), 0),
+    COUNT(*)
+FROM consolidado_despesas c
+LEFT JOIN dados_cadastrais d ON d.cnpj = c.cnpj
+JOIN celulas_alteradas a
+    ON a.uf = COALESCE(d.uf, 'NAO_INFORMADO')
+   AND a.modalidade = COALESCE(d.modalidade, 'NAO_INFORMADO')
+   AND a.ano = c.ano
+   AND a.trimestre = c.trimestre
+GROUP BY 1, 2, 3, 4;
+
+-- 3. ROLLUPS GLOBAIS (POUCAS LINHAS)
+
+-- POR UF: SOMA DO CUBO, SEM VARRER consolidado_despesas
+TRUNCATE rollup_despesas_uf;
+INSERT INTO rollup_despesas_uf (uf, total)
+SELECT uf, SUM(total)
+FROM rollup_cubo_despesas
+WHERE uf <> 'NAO_INFORMADO'
+GROUP BY uf;
+
+-- TOTAIS E RANKING POR RAZÃO SOCIAL DEPENDEM DE TODAS AS LINHAS: UMA PASSADA DE AGREGAÇÃO
+TRUNCATE rollup_estatisticas_globais, rollup_top_operadoras;
+
+INSERT INTO rollup_estatisticas_globais (id, total_despesas, media_despesas, qtd_registros)
+SELECT 1, SUM(valor_despesas), AVG(valor_despesas), COUNT(*)
+FROM consolidado_despesas;
+
+INSERT INTO rollup_top_operadoras (posicao, razao_social, total_despesas)
+SELECT
+    ROW_NUMBER() OVER (ORDER BY SUM(valor_despesas) DESC NULLS LAST, razao_social) AS posicao,
+    razao_social,
+    SUM(valor_despesas) AS total_despesas
+FROM consolidado_despesas
+GROUP BY razao_social;
+
+-- 4. DESPESAS AGREGADAS (UMA LINHA POR OPERADORA/UF): RECARREGADA INTEIRA
+TRUNCATE despesas_agregadas;
+
+INSERT INTO despesas_agregadas (
+    razao_social,
+    uf,
+    total_despesas,
+    media_trimestral,
+    desvio_padrao
+)
+SELECT
+    NULLIF(TRIM(razao_social), '') AS razao_social,
+    NULLIF(TRIM(uf), '') AS uf,
+    NULLIF(REPLACE(total_despesas, ',', '.'), '')::DECIMAL(15,2) AS total_despesas,
+    NULLIF(REPLACE(media_trimestral, ',', '.'), '')::DECIMAL(15,2) AS media_trimestral,
+    NULLIF(REPLACE(desvio_padrao, ',', '.'), '')::DECIMAL(15,2) AS desvio_padrao
+FROM staging_despesas_agregadas;
+
+ANALYZE consolidado_despesas;
+ANALYZE despesas_agregadas;
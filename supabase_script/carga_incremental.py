@@ -0,0 +1,137 @@
+"""Carga incremental no banco: aplica só as chaves (cnpj, ano, trimestre) que mudaram.
+
+Lê consolidado_despesas/alteracoes.json (alterações pendentes, acumuladas pelo
+processar_arquivos.py) e troca apenas essas linhas e os rollups afetados
+(supabase/07_carga_incremental.sql) numa única transação, sem passar pelo 00_drop_all.sql.
+Quando a carga precisa ser completa (primeira execução, cadastro novo ou processamento sem
+--incremental), roda o processar_sql.py. As pendentes só são baixadas depois da carga.
+"""
+import csv
+import io
+import json
+import os
+import re
+import subprocess
+import sys
+
+import psycopg2
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# --- MAPEAMENTO DE DIRETÓRIOS ---
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJETO_ROOT = os.path.dirname(SCRIPT_DIR)
+PASTA_DADOS = os.path.join(PROJETO_ROOT, 'arquivos_csv_zips')
+PASTA_SQL = os.path.join(PROJETO_ROOT, 'supabase')
+
+
+def run_sql(cur, filename):
+    with open(os.path.join(PASTA_SQL, filename), "r", encoding="utf-8") as f:
+        sql = f.read().strip()
+    if sql:
+        cur.execute(sql)
+
+
+def copy_linhas(cur, table, linhas):
+    # Campos vazios viram NULL, como no COPY dos CSVs da carga completa
+    buffer = io.StringIO()
+    csv.writer(buffer, delimiter=';').writerows(linhas)
+    buffer.seek(0)
+    cur.copy_expert(f"COPY {table} FROM STDIN WITH (FORMAT csv, DELIMITER ';')", buffer)
+
+
+def copy_csv(cur, table, relative_csv_path):
+    with open(os.path.join(PASTA_DADOS, relative_csv_path), "r", encoding="utf-8") as f:
+        cur.copy_expert(
+            f"COPY {table} FROM STDIN WITH (FORMAT csv, HEADER true, DELIMITER ';', ENCODING 'UTF8')",
+            f
+        )
+
+
+def chaves_validas(alteracoes):
+    # Só chaves que o 03_validacoes.sql aceitaria (ano com 4 dígitos, trimestre de 1 a 4)
+    return {
+        (cnpj, ano, trimestre) for cnpj, ano, trimestre in alteracoes["chaves"]
+        if re.fullmatch(r"\d{4}", ano) and trimestre in ("1", "2", "3", "4")
+    }
+
+
+def linhas_das_chaves(caminho_csv, chaves):
+    # Linhas atuais do consolidado cujas chaves mudaram (CNPJ normalizado como no 03)
+    with open(caminho_csv, "r", encoding="utf-8-sig", newline="") as f:
+        leitor = csv.reader(f, delimiter=';')
+        next(leitor, None)
+        for linha in leitor:
+            if (re.sub(r"\D", "", linha[0]), linha[2], linha[3]) in chaves:
+                yield linha
+
+
+def baixar_pendentes(caminho_alteracoes, aplicadas):
+    # Tira só o que foi carregado: chaves somadas por outra execução durante a carga continuam
+    with open(caminho_alteracoes, "r", encoding="utf-8") as f:
+        pendentes = json.load(f)
+
+    aplicadas_chaves = {tuple(c) for c in aplicadas["chaves"]}
+    restantes = {
+        "completo": pendentes["completo"] and not aplicadas["completo"],
+        "chaves": [c for c in pendentes["chaves"] if tuple(c) not in aplicadas_chaves],
+    }
+    temporario = caminho_alteracoes + ".tmp"
+    with open(temporario, "w", encoding="utf-8") as f:
+        json.dump(restantes, f)
+    os.replace(temporario, caminho_alteracoes)
+
+
+def executar_carga_incremental():
+    caminho_alteracoes = os.path.join(PASTA_DADOS, "consolidado_despesas", "alteracoes.json")
+    if not os.path.exists(caminho_alteracoes):
+        print(f"Erro: {caminho_alteracoes} não encontrado; rode o processar_arquivos.py antes.")
+        return
+
+    with open(caminho_alteracoes, "r", encoding="utf-8") as f:
+        alteracoes = json.load(f)
+
+    if alteracoes["completo"]:
+        print("Carga completa necessária (primeira carga ou cadastro alterado); executando processar_sql.py")
+        subprocess.run([sys.executable, os.path.join(SCRIPT_DIR, "processar_sql.py")], check=True)
+        baixar_pendentes(caminho_alteracoes, alteracoes)
+        return
+
+    chaves = chaves_validas(alteracoes)
+    if not chaves:
+        # Chaves que o 03_validacoes.sql descartaria não têm o que carregar
+        baixar_pendentes(caminho_alteracoes, alteracoes)
+        print("Nenhuma chave alterada; o banco já está atualizado.")
+        return
+
+    conn = psycopg2.connect(
+        host=os.getenv("DB_HOST"),
+        database=os.getenv("DB_NAME"),
+        user=os.getenv("DB_USER"),
+        password=os.getenv("DB_PASSWORD"),
+        port=os.getenv("DB_PORT")
+    )
+    try:
+        # Uma transação: a API só enxerga a carga inteira, nunca a metade
+        with conn.cursor() as cur:
+            cur.execute("TRUNCATE staging_consolidado_despesas, staging_despesas_agregadas;")
+            cur.execute("CREATE TEMP TABLE chaves_alteradas (cnpj TEXT, ano INT, trimestre INT) ON COMMIT DROP;")
+            copy_linhas(cur, "chaves_alteradas", sorted(chaves))
+            copy_linhas(
+                cur, "staging_consolidado_despesas",
+                linhas_das_chaves(os.path.join(PASTA_DADOS, "consolidado_despesas", "consolidado_despesas.csv"), chaves)
+            )
+            copy_csv(cur, "staging_despesas_agregadas", "despesas_agregadas/despesas_agregadas.csv")
+
+            run_sql(cur, "07_carga_incremental.sql")
+            run_sql(cur, "06_versao_dados.sql")
+        conn.commit()
+        baixar_pendentes(caminho_alteracoes, alteracoes)
+        print(f"Carga incremental concluída: {len(chaves)} chaves (cnpj, ano, trimestre) atualizadas.")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    executar_carga_incremental()
@@ -71,5 +71,13 @@ conn.commit()
 run_sql("04_queries_analiticas.sql")
 conn.commit()
 
+# 4. Recalcular rollups lidos pela API (estatísticas e indicadores por operadora)
+run_sql("05_rollups.sql")
+conn.commit()
+
+# 5. Registrar a versão dos dados (ETag/Last-Modified da API)
+run_sql("06_versao_dados.sql")
+conn.commit()
+
 cur.close()
 conn.close()
\ No newline at end of file